@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Arbitrage scanner for WoW Classic SoD Recipe Calculator
+Ranks vendor flips, cross-realm/faction trades and crafts that beat buying.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import ARBITRAGE_CONFIG, PRICING_CONFIG, REALMS_CONFIG, VENDOR_PRICES_FILE
+from profit_table import ProfitTable
+from realm_prices import RealmPrices
+from utils import PriceCalculator
+
+logger = logging.getLogger(__name__)
+
+OPPORTUNITY_TYPES = ('vendor_flip', 'vendor_sell', 'cross_realm', 'craft_vs_buy')
+
+
+def net_sale(price: float) -> float:
+    """Return what selling one unit at price leaves after the AH cut and deposit."""
+    return PriceCalculator.calculate_ah_fees(price, PriceCalculator.estimate_deposit(price))['net_profit']
+
+
+def opportunity(kind: str, item_id: int, name: str, buy_from: str, buy_price: float,
+                sell_to: str, sell_price: float, proceeds: float, **extra: Any) -> Dict[str, Any]:
+    """Build one opportunity record; profit is per unit, after fees."""
+    profit = proceeds - buy_price
+    return {
+        'type': kind,
+        'item_id': item_id,
+        'name': name,
+        'buy_from': buy_from,
+        'buy_price': buy_price,
+        'sell_to': sell_to,
+        'sell_price': sell_price,
+        'profit': profit,
+        'roi': profit / buy_price * 100 if buy_price > 0 else 0,
+        **extra
+    }
+
+
+def load_vendor_prices(file_path: Path = VENDOR_PRICES_FILE) -> Dict[int, Dict[str, int]]:
+    """
+    Load vendor prices as itemId -> {'buy': copper, 'sell': copper}.
+    
+    'buy' is what a vendor charges, 'sell' what a vendor pays; either may be
+    missing. DEFAULT_VENDOR_PRICES is not used here: its values are
+    placeholder reagent costs, not real vendor prices.
+    """
+    if not Path(file_path).exists():
+        return {}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {int(item_id): prices for item_id, prices in data.items() if isinstance(prices, dict)}
+
+
+def vendor_flips(prices: RealmPrices, vendor_prices: Dict[int, Dict[str, int]],
+                 names: Dict[int, str]) -> List[Dict[str, Any]]:
+    """Items a vendor sells below their AH price, or buys above their cheapest listing."""
+    sell_field = PRICING_CONFIG['price_field']
+    positions = prices.item_index.positions
+    results = []
+    for key in prices.keys():
+        sells = prices.column(key, sell_field)
+        buys = prices.column(key, ARBITRAGE_CONFIG['buy_field'])
+        supplies = prices.column(key, 'quantity')
+        for item_id, vendor in vendor_prices.items():
+            position = positions.get(item_id)
+            if position is None:
+                continue
+            name = names.get(item_id, 'Unknown')
+            if vendor.get('buy') and sells[position] > 0:
+                results.append(opportunity('vendor_flip', item_id, name, 'vendor', vendor['buy'],
+                                           key, sells[position], net_sale(sells[position])))
+            if vendor.get('sell') and buys[position] > 0 and supplies[position] > 0:
+                results.append(opportunity('vendor_sell', item_id, name, key, buys[position],
+                                           'vendor', vendor['sell'], vendor['sell'],
+                                           available=supplies[position]))
+    return results
+
+
+def cross_realm(prices: RealmPrices, names: Dict[int, str],
+                min_profit: float) -> List[Dict[str, Any]]:
+    """
+    Items listed on one realm or faction below what they sell for on another.
+    
+    One pass over the item index joins the aligned buy, supply and sell
+    columns of every realm; only the cheapest listing and the best other
+    market of each item are compared.
+    """
+    keys = prices.keys()
+    if len(keys) < 2:
+        return []
+    
+    sell_field = PRICING_CONFIG['price_field']
+    buys = [prices.column(key, ARBITRAGE_CONFIG['buy_field']) for key in keys]
+    supplies = [prices.column(key, 'quantity') for key in keys]
+    sells = [prices.column(key, sell_field) for key in keys]
+    # Fees are a fixed fraction of the price, so the share of a sale kept is net_sale(1)
+    keep = net_sale(1)
+    
+    results = []
+    # zip(*columns) turns per-realm columns into per-item rows across realms
+    for item_id, item_buys, item_supplies, item_sells in zip(prices.item_index.item_ids, zip(*buys),
+                                                             zip(*supplies), zip(*sells)):
+        best_buy, buy_realm = None, None
+        for realm, (buy, supply) in enumerate(zip(item_buys, item_supplies)):
+            if buy > 0 and supply > 0 and (best_buy is None or buy < best_buy):
+                best_buy, buy_realm = buy, realm
+        if best_buy is None:
+            continue
+        
+        best_sell, sell_realm = 0, None
+        for realm, sell in enumerate(item_sells):
+            if realm != buy_realm and sell > best_sell:
+                best_sell, sell_realm = sell, realm
+        if sell_realm is None or best_sell * keep - best_buy < min_profit:
+            continue
+        
+        results.append(opportunity('cross_realm', item_id, names.get(item_id, 'Unknown'), keys[buy_realm],
+                                   best_buy, keys[sell_realm], best_sell, net_sale(best_sell),
+                                   available=item_supplies[buy_realm]))
+    return results
+
+
+def craft_vs_buy(table: ProfitTable, source: str) -> List[Dict[str, Any]]:
+    """Crafted items whose reagents cost less than buying the result on the AH."""
+    results = []
+    for recipe_id, recipe in table.recipes.items():
+        profit_data = table.profits.get(recipe_id) or {}
+        cost = profit_data.get('cost', 0)
+        buy_price = profit_data.get('result_value', 0)
+        materials = profit_data.get('material_costs', [])
+        # Unpriced reagents would make the craft look cheaper than it is
+        if cost <= 0 or buy_price <= 0 or not materials or any(m['unit_price'] <= 0 for m in materials):
+            continue
+        results.append(opportunity('craft_vs_buy', recipe.get('result_item_id'), recipe.get('name', 'Unknown'),
+                                   'craft', cost, source, buy_price, buy_price,
+                                   recipe_id=recipe_id, profession=recipe.get('profession')))
+    return results
+
+
+def scan(prices: RealmPrices, table: Optional[ProfitTable] = None,
+         names: Optional[Dict[int, str]] = None,
+         vendor_prices: Optional[Dict[int, Dict[str, int]]] = None,
+         min_profit: float = ARBITRAGE_CONFIG['min_profit'],
+         min_roi: float = ARBITRAGE_CONFIG['min_roi'],
+         kind: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Return every opportunity above both thresholds, best profit first.
+    
+    prices holds one snapshot per realm and faction; table, if given,
+    supplies crafting costs for the craft-vs-buy comparison. kind keeps
+    one type of opportunity, and limit is applied after every filter.
+    """
+    names = names or {}
+    candidates = vendor_flips(prices, vendor_prices or {}, names) + cross_realm(prices, names, min_profit)
+    if table is not None:
+        candidates += craft_vs_buy(table, REALMS_CONFIG['default'])
+    
+    results = [c for c in candidates if c['profit'] >= min_profit and c['roi'] >= min_roi
+               and (kind is None or c['type'] == kind)]
+    results.sort(key=lambda c: c['profit'], reverse=True)
+    logger.info(f"Arbitrage scan found {len(results)} opportunities in {len(prices.keys())} snapshots")
+    return results if limit is None else results[:limit]
+
+
+def main():
+    """Main function to print the current arbitrage opportunities."""
+    import argparse
+    from config import HORDE_FILE
+    from price_history import load_snapshot
+    from realm_prices import load_realm_files
+    from utils import DataLoader
+    
+    parser = argparse.ArgumentParser(description="Scan for arbitrage across realms, factions and vendors")
+    parser.add_argument("--type", choices=OPPORTUNITY_TYPES, help="Only show one kind of opportunity")
+    parser.add_argument("--min-profit", type=float, default=ARBITRAGE_CONFIG['min_profit'],
+                       help="Minimum profit per unit in copper")
+    parser.add_argument("--min-roi", type=float, default=ARBITRAGE_CONFIG['min_roi'],
+                       help="Minimum return on the buy price in percent")
+    parser.add_argument("--limit", type=int, default=20, help="Number of opportunities to print")
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    
+    recipes = DataLoader.load_recipes_data()
+    materials = DataLoader.load_materials_data()
+    snapshot = load_snapshot(HORDE_FILE)
+    
+    prices = RealmPrices()
+    load_realm_files(prices)
+    prices.put(REALMS_CONFIG['default'], snapshot)
+    table = ProfitTable(recipes, materials, snapshot)
+    names = {item_id: item.get('name', 'Unknown') for item_id, item in materials.items()}
+    
+    results = scan(prices, table, names, load_vendor_prices(), min_profit=args.min_profit, min_roi=args.min_roi,
+                   kind=args.type, limit=args.limit)
+    
+    for result in results:
+        print(f"{result['type']:<13} {result['name'][:32]:<32} {result['buy_from']:>16} "
+              f"{PriceCalculator.format_price(result['buy_price']):>12} -> {result['sell_to']:<16} "
+              f"{PriceCalculator.format_price(result['sell_price']):>12} "
+              f"+{PriceCalculator.format_price(result['profit'])} ({result['roi']:.0f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Async scraper for WoW Classic SoD Recipe Calculator
+Fetches recipe pages concurrently under a rate limit and parses them in worker processes.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - only needed to run the async scraper
+    aiohttp = None
+
+from config import SCRAPER_CONFIG
+from recipe_parser import RecipeData, parse_recipe
+from scrape_telemetry import PageRecord, ScrapeTelemetry
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Rate limiter allowing rate requests per second on average.
+    
+    Up to capacity tokens accumulate while idle, so a short burst can
+    start back to back before callers are spaced 1/rate seconds apart.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncScraper:
+    """
+    Scrapes many recipe pages at once over one keep-alive connection pool.
+    
+    A semaphore bounds the requests in flight and a token bucket bounds
+    how often new ones start. Parsing runs in a process pool, so the
+    event loop keeps fetching while earlier pages are parsed.
+    Use as an async context manager.
+    """
+    
+    def __init__(self, concurrency: int = SCRAPER_CONFIG['concurrency'],
+                 requests_per_second: float = SCRAPER_CONFIG['requests_per_second'],
+                 burst: int = SCRAPER_CONFIG['burst'],
+                 timeout: float = SCRAPER_CONFIG['timeout'],
+                 max_retries: int = SCRAPER_CONFIG['max_retries'],
+                 delay: float = SCRAPER_CONFIG['delay'],
+                 parse_workers: Optional[int] = SCRAPER_CONFIG['parse_workers']):
+        self.concurrency = concurrency
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.delay = delay
+        self.parse_workers = parse_workers
+        self.session = None
+        self.pool: Optional[ProcessPoolExecutor] = None
+    
+    async def __aenter__(self):
+        if aiohttp is None:
+            raise ImportError("The async scraper needs aiohttp: pip install aiohttp")
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.bucket = TokenBucket(self.requests_per_second, self.burst)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={'User-Agent': SCRAPER_CONFIG['user_agent']}
+        )
+        self.pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.session.close()
+        self.pool.shutdown()
+    
+    async def fetch(self, url: str) -> str:
+        """Download one page once a connection slot and a rate limit token are free."""
+        async with self.semaphore:
+            await self.bucket.acquire()
+            async with self.session.get(url) as response:
+                response.raise_for_status()
+                return await response.text()
+    
+    async def scrape_recipe(self, url: str) -> Tuple[Optional[RecipeData], PageRecord]:
+        """Fetch and parse one recipe, retrying with backoff; returns the recipe and its telemetry."""
+        loop = asyncio.get_running_loop()
+        recipe_data = None
+        page = PageRecord(url=url, success=False)
+        started = time.perf_counter()
+        
+        for attempt in range(self.max_retries):
+            page.retries = attempt
+            try:
+                start = time.perf_counter()
+                html = await self.fetch(url)
+                page.fetch_seconds += time.perf_counter() - start
+                page.bytes += len(html.encode('utf-8'))
+                
+                start = time.perf_counter()
+                try:
+                    recipe_data = await loop.run_in_executor(self.pool, parse_recipe, url, html)
+                finally:
+                    page.parse_seconds += time.perf_counter() - start
+                page.error_class = page.error = None
+                break
+            except Exception as e:
+                logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
+                page.error_class = type(e).__name__
+                page.error = str(e)
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(self.delay * (attempt + 1))
+        
+        page.success = recipe_data is not None
+        page.elapsed_seconds = time.perf_counter() - started
+        return recipe_data, page
+    
+    async def scrape_urls(self, urls: List[str],
+                          telemetry: Optional[ScrapeTelemetry] = None) -> List[Optional[RecipeData]]:
+        """Scrape every URL concurrently; results keep the order of urls, None where scraping failed."""
+        async def scrape_one(url: str) -> Optional[RecipeData]:
+            recipe_data, page = await self.scrape_recipe(url)
+            if telemetry is not None:
+                telemetry.record(page)
+            if recipe_data is None:
+                logger.error(f"Failed to scrape after {self.max_retries} attempts: {url}")
+            return recipe_data
+        
+        return await asyncio.gather(*(scrape_one(url) for url in urls))
+    
+    async def scrape_from_file(self, input_file: str, output_file: str,
+                               telemetry_file: Optional[str] = None) -> Dict[str, Any]:
+        """Scrape recipes from a file containing URLs, writing the same output as WowheadScraper."""
+        input_path = Path(input_file)
+        if not input_path.exists():
+            raise FileNotFoundError(f"Input file not found: {input_file}")
+        
+        with open(input_path, 'r') as f:
+            urls = [line.strip() for line in f if line.strip()]
+        
+        logger.info(f"Found {len(urls)} URLs to scrape with {self.concurrency} connections "
+                    f"at {self.requests_per_second} requests/s")
+        
+        telemetry = ScrapeTelemetry(telemetry_file)
+        results = await self.scrape_urls(urls, telemetry)
+        recipes = [asdict(recipe_data) for recipe_data in results if recipe_data is not None]
+        stats = {
+            'total_urls': len(urls),
+            'successful': len(recipes),
+            'failed': len(urls) - len(recipes),
+            'recipes': recipes,
+            'telemetry': telemetry.close()
+        }
+        
+        with open(output_file, 'w') as f:
+            json.dump(stats, f, indent=2)
+        
+        logger.info(f"Scraping completed. Success: {stats['successful']}, Failed: {stats['failed']}, "
+                    f"{stats['telemetry']['urls_per_minute']} URLs/min, "
+                    f"p95 page time {stats['telemetry']['p95_page_seconds']}s")
+        return stats
+
+
+def main():
+    """Main function to run the async scraper."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Scrape WoW Classic SoD recipes from Wowhead concurrently")
+    parser.add_argument("input_file", help="File containing URLs to scrape")
+    parser.add_argument("output_file", help="Output JSON file")
+    parser.add_argument("--concurrency", type=int, default=SCRAPER_CONFIG['concurrency'],
+                       help="Requests in flight at once")
+    parser.add_argument("--rate", type=float, default=SCRAPER_CONFIG['requests_per_second'],
+                       help="Average requests started per second")
+    parser.add_argument("--burst", type=int, default=SCRAPER_CONFIG['burst'],
+                       help="Requests that may start back to back")
+    parser.add_argument("--workers", type=int, default=SCRAPER_CONFIG['parse_workers'],
+                       help="HTML parser processes (default: one per CPU)")
+    parser.add_argument("--timeout", type=float, default=SCRAPER_CONFIG['timeout'],
+                       help="Page download timeout in seconds")
+    parser.add_argument("--max-retries", type=int, default=SCRAPER_CONFIG['max_retries'],
+                       help="Maximum retry attempts per URL")
+    parser.add_argument("--delay", type=float, default=SCRAPER_CONFIG['delay'],
+                       help="Base backoff between retries in seconds")
+    parser.add_argument("--telemetry", default=str(SCRAPER_CONFIG['telemetry_file']),
+                       help="JSONL file for per-URL timings and the run summary")
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    
+    async def run() -> Dict[str, Any]:
+        async with AsyncScraper(concurrency=args.concurrency, requests_per_second=args.rate,
+                                burst=args.burst, timeout=args.timeout, max_retries=args.max_retries,
+                                delay=args.delay, parse_workers=args.workers) as scraper:
+            return await scraper.scrape_from_file(args.input_file, args.output_file, args.telemetry)
+    
+    try:
+        stats = asyncio.run(run())
+    except KeyboardInterrupt:
+        logger.info("Scraping interrupted by user")
+        return 1
+    except Exception as e:
+        logger.error(f"Scraping failed: {e}")
+        return 1
+    
+    print(f"Successful: {stats['successful']}/{stats['total_urls']}")
+    print(f"Throughput: {stats['telemetry']['urls_per_minute']} URLs/min")
+    print(f"p95 page time: {stats['telemetry']['p95_page_seconds']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
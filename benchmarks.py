@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for WoW Classic SoD Recipe Calculator
+Times the pricing, filtering and serving hot paths on real and scaled catalogues.
+"""
+
+import gc
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import BENCHMARK_CONFIG
+from price_history import PriceSnapshot, load_snapshot
+from profit_table import ProfitTable
+from recipe_index import RecipeIndex
+from utils import DataLoader, DataProcessor
+
+logger = logging.getLogger(__name__)
+
+# Offset between the ids of successive synthetic copies of the catalogue
+SCALE_ID_OFFSET = 10_000_000
+
+
+def scale_dataset(recipes: List[Dict[str, Any]], materials_index: Dict[int, Dict[str, Any]],
+                  snapshot: PriceSnapshot, factor: int) -> Tuple[List[Dict[str, Any]],
+                                                                 Dict[int, Dict[str, Any]], PriceSnapshot]:
+    """
+    Return a catalogue factor times larger.
+    
+    Each copy shifts recipe and item ids by SCALE_ID_OFFSET, so the number
+    of distinct items grows with the recipes as it would with more expansions.
+    """
+    if factor <= 1:
+        return recipes, materials_index, snapshot
+    
+    scaled_recipes = list(recipes)
+    scaled_materials = dict(materials_index)
+    scaled_snapshot = dict(snapshot)
+    for copy in range(1, factor):
+        offset = copy * SCALE_ID_OFFSET
+        for recipe in recipes:
+            scaled_recipes.append({
+                **recipe,
+                'recipe_id': recipe['recipe_id'] + offset,
+                'name': f"{recipe.get('name', '')} {copy}",
+                'materials': [
+                    {'itemId': material['itemId'] + offset, 'quantity': material['quantity']}
+                    for material in recipe.get('materials', [])
+                ],
+                'result_item_id': (recipe.get('result_item_id') or 0) + offset,
+            })
+        for item_id, item in materials_index.items():
+            scaled_materials[item_id + offset] = {**item, 'itemId': item_id + offset}
+        for item_id, values in snapshot.items():
+            scaled_snapshot[item_id + offset] = values
+    
+    return scaled_recipes, scaled_materials, scaled_snapshot
+
+
+def measure(func: Callable[[], Any], min_time: float = BENCHMARK_CONFIG['min_time'],
+            max_rounds: int = BENCHMARK_CONFIG['max_rounds']) -> Dict[str, float]:
+    """Run func repeatedly and return throughput, latency percentiles and allocations."""
+    func()  # warm up caches and lazy imports
+    
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_rounds and (time.perf_counter() - started < min_time or len(timings) < 5):
+        start = time.perf_counter_ns()
+        func()
+        timings.append(time.perf_counter_ns() - start)
+    
+    timings.sort()
+    total_seconds = sum(timings) / 1e9
+    return {
+        'rounds': len(timings),
+        'ops_per_sec': len(timings) / total_seconds if total_seconds else 0.0,
+        'p50_ms': timings[len(timings) // 2] / 1e6,
+        'p99_ms': timings[min(len(timings) - 1, int(len(timings) * 0.99))] / 1e6,
+        'mean_ms': statistics.fmean(timings) / 1e6,
+        'alloc_peak_kb': peak / 1024,
+    }
+
+
+def build_cases(recipes: List[Dict[str, Any]], materials_index: Dict[int, Dict[str, Any]],
+                snapshot: PriceSnapshot) -> Dict[str, Callable[[], Any]]:
+    """Return the benchmarked operations over one catalogue."""
+    import server
+    
+    table = ProfitTable(recipes, materials_index, snapshot)
+    profits = table.profits
+    filters = {'profession': 'Alchemy', 'min_skill': 100, 'search': 'potion'}
+    index = RecipeIndex(recipes)
+    
+    # Serve the catalogue through the real Flask views, bypassing the response cache
+    server.CACHE_CONFIG['enabled'] = False
+    server.recipes_cache = recipes
+    server.materials_cache = materials_index
+    server.profit_table = table
+    server.smoothed_profit_table = table
+    client = server.app.test_client()
+    
+    def profit_all():
+        for recipe in recipes:
+            DataProcessor.calculate_recipe_profit(recipe, table.priced_materials, table.result_price(recipe))
+    
+    def api_recipes():
+        response = client.get('/api/recipes?profession=Alchemy&sort_by=profit&sort_order=desc')
+        assert response.status_code == 200
+    
+    return {
+        'calculate_recipe_profit': profit_all,
+        'profit_table_build': lambda: ProfitTable(recipes, materials_index, snapshot),
+        'filter_recipes': lambda: DataProcessor.filter_recipes(recipes, filters, profits),
+        'sort_recipes': lambda: DataProcessor.sort_recipes(recipes, 'profit', 'desc', profits),
+        'index_select': lambda: index.select(filters, 'profit', 'desc', profits, table.version),
+        'api_recipes': api_recipes,
+    }
+
+
+def run_benchmarks(scales: List[int], selected: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    """Run every case at every scale; results are keyed '<case>[<scale>x]'."""
+    base = (DataLoader.load_recipes_data(), DataLoader.load_materials_data(), load_snapshot())
+    results = {}
+    
+    for factor in scales:
+        recipes, materials_index, snapshot = scale_dataset(*base, factor)
+        for name, func in build_cases(recipes, materials_index, snapshot).items():
+            if selected and name not in selected:
+                continue
+            key = f"{name}[{factor}x]"
+            results[key] = measure(func)
+            logger.info(f"{key}: p50 {results[key]['p50_ms']:.2f} ms")
+    
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float = BENCHMARK_CONFIG['regression_threshold']) -> List[str]:
+    """Return a message for every case whose p50 regressed beyond threshold."""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if not reference or not reference.get('p50_ms'):
+            continue
+        change = result['p50_ms'] / reference['p50_ms'] - 1
+        if change > threshold:
+            regressions.append(f"{key}: p50 {reference['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms "
+                               f"(+{change:.0%})")
+    return regressions
+
+
+def print_report(results: Dict[str, Dict[str, float]],
+                 baseline: Optional[Dict[str, Dict[str, float]]] = None) -> None:
+    """Print results as a table, with the p50 change against the baseline if given."""
+    print(f"{'benchmark':<32} {'ops/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'peak KB':>10} {'vs base':>8}")
+    for key, result in results.items():
+        reference = (baseline or {}).get(key)
+        versus = f"{result['p50_ms'] / reference['p50_ms'] - 1:+.0%}" if reference else ''
+        print(f"{key:<32} {result['ops_per_sec']:>10.1f} {result['p50_ms']:>10.2f} "
+              f"{result['p99_ms']:>10.2f} {result['alloc_peak_kb']:>10.0f} {versus:>8}")
+
+
+def main():
+    """Main function to run the benchmarks."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="WoW Classic SoD Recipe Calculator benchmarks")
+    parser.add_argument("--scales", default=",".join(str(s) for s in BENCHMARK_CONFIG['scales']),
+                       help="Comma-separated catalogue scale factors, e.g. 1,10,100")
+    parser.add_argument("--only", help="Comma-separated benchmark names to run")
+    parser.add_argument("--baseline", default=str(BENCHMARK_CONFIG['baseline_file']),
+                       help="Baseline results file")
+    parser.add_argument("--save-baseline", action="store_true",
+                       help="Store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=BENCHMARK_CONFIG['regression_threshold'],
+                       help="Allowed p50 slowdown before failing, as a fraction")
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    
+    scales = [int(scale) for scale in args.scales.split(',')]
+    selected = args.only.split(',') if args.only else None
+    results = run_benchmarks(scales, selected)
+    
+    baseline_path = Path(args.baseline)
+    baseline = None
+    if baseline_path.exists():
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    
+    print_report(results, baseline)
+    
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'results': results
+            }, f, indent=2)
+        print(f"Saved baseline to {baseline_path}")
+        return 0
+    
+    if baseline is None:
+        print(f"No baseline at {baseline_path}; run with --save-baseline to create one")
+        return 0
+    
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    exit(main())
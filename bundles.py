@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Per-profession data bundles for WoW Classic SoD Recipe Calculator
+Precomputes small, content-hashed JSON files so a page only downloads one profession.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import BUNDLES_DIR, HORDE_FILE, HORDE_UPDATE_FILE
+from price_history import PriceSnapshot, load_snapshot
+from profit_table import ProfitTable
+from utils import DataLoader, JSONSerializer
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+# Names write_hashed produces, e.g. first-aid.0123456789ab.json.gz
+HASHED_NAME_PATTERN = re.compile(r'^[a-z0-9-]+\.[0-9a-f]{12}\.json(\.gz)?$')
+
+
+def profession_slug(profession: str) -> str:
+    """Return the file name prefix of a profession bundle."""
+    return profession.lower().replace(' ', '-')
+
+
+def load_pricing_rows(file_path: Path = HORDE_FILE) -> Dict[int, Dict[str, Any]]:
+    """Load the raw horde.json pricing rows keyed by itemId."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    rows = data.get('pricing_data', []) if isinstance(data, dict) else data
+    return {row['itemId']: row for row in rows if isinstance(row.get('itemId'), int)}
+
+
+def read_last_updated(update_file: Path = HORDE_UPDATE_FILE) -> Optional[str]:
+    """Return the last_updated value of horde_update.json, if present."""
+    try:
+        with open(update_file, 'r', encoding='utf-8') as f:
+            return json.load(f).get('last_updated')
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read {update_file}: {e}")
+        return None
+
+
+def write_hashed(output_dir: Path, prefix: str, body: bytes) -> Dict[str, Any]:
+    """Write body and a gzip copy under a content-hashed name; returns the manifest entry."""
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    file_name = f"{prefix}.{digest}.json"
+    file_path = output_dir / file_name
+    
+    # Same content means same name, so an existing file is already correct
+    if not file_path.exists():
+        file_path.write_bytes(body)
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    gzip_path = output_dir / f"{file_name}.gz"
+    if not gzip_path.exists():
+        gzip_path.write_bytes(compressed)
+    
+    return {
+        'file': file_name,
+        'size': len(body),
+        'gzip_size': len(compressed)
+    }
+
+
+def build_profession_bundle(profession: str, recipes: List[Dict[str, Any]], table: ProfitTable,
+                            materials_index: Dict[int, Dict[str, Any]],
+                            pricing_rows: Dict[int, Dict[str, Any]],
+                            last_updated: Optional[str]) -> Dict[str, Any]:
+    """Join one profession's recipes with their profits and referenced items."""
+    item_ids = set()
+    bundle_recipes = []
+    for recipe in recipes:
+        item_ids.update(material['itemId'] for material in recipe.get('materials', []))
+        item_ids.add(recipe.get('result_item_id'))
+        bundle_recipes.append({**recipe, 'profit_data': table.get(recipe)})
+    
+    item_ids = sorted(item_id for item_id in item_ids if isinstance(item_id, int))
+    
+    return {
+        'profession': profession,
+        'last_updated': last_updated,
+        'recipes': bundle_recipes,
+        'materials': [materials_index[item_id] for item_id in item_ids if item_id in materials_index],
+        'pricing': [pricing_rows[item_id] for item_id in item_ids if item_id in pricing_rows]
+    }
+
+
+def remove_stale_bundles(output_dir: Path, keep: set) -> None:
+    """Delete hashed bundle files that no manifest refers to any more; other files are left alone."""
+    for file_path in output_dir.glob('*.json*'):
+        if not HASHED_NAME_PATTERN.match(file_path.name):
+            continue
+        name = file_path.name[:-3] if file_path.name.endswith('.gz') else file_path.name
+        if name not in keep:
+            file_path.unlink()
+
+
+def build_bundles(recipes: List[Dict[str, Any]], materials_index: Dict[int, Dict[str, Any]],
+                  snapshot: PriceSnapshot, pricing_rows: Dict[int, Dict[str, Any]],
+                  last_updated: Optional[str], output_dir: Path = BUNDLES_DIR) -> Dict[str, Any]:
+    """
+    Build one bundle per profession and write the manifest that points to them.
+    
+    Bundles are named by content hash and can be cached forever; only the
+    small manifest keeps a stable name. Files referenced by the previous
+    manifest are kept so pages that loaded it can still fetch their bundles.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    table = ProfitTable(recipes, materials_index, snapshot)
+    
+    by_profession: Dict[str, List[Dict[str, Any]]] = {}
+    for recipe in recipes:
+        by_profession.setdefault(recipe.get('profession', 'Unknown'), []).append(recipe)
+    
+    manifest = {
+        'last_updated': last_updated,
+        'generated_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'bundles': {}
+    }
+    for profession in sorted(by_profession):
+        bundle = build_profession_bundle(profession, by_profession[profession], table,
+                                         materials_index, pricing_rows, last_updated)
+        entry = write_hashed(output_dir, profession_slug(profession), JSONSerializer.dumps(bundle))
+        entry['recipes'] = len(bundle['recipes'])
+        manifest['bundles'][profession] = entry
+    
+    manifest_path = output_dir / MANIFEST_NAME
+    keep = {entry['file'] for entry in manifest['bundles'].values()}
+    if manifest_path.exists():
+        try:
+            previous = JSONSerializer.loads(manifest_path.read_bytes())
+            keep |= {entry['file'] for entry in previous.get('bundles', {}).values()}
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable previous manifest: {e}")
+    
+    manifest_path.write_bytes(JSONSerializer.dumps(manifest, pretty=True))
+    remove_stale_bundles(output_dir, keep)
+    
+    total = sum(entry['gzip_size'] for entry in manifest['bundles'].values())
+    logger.info(f"Built {len(manifest['bundles'])} profession bundles "
+                f"({total / 1024:.0f} KB compressed) in {output_dir}")
+    return manifest
+
+
+def main():
+    """Main function to build the profession bundles."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Build per-profession data bundles")
+    parser.add_argument("--output", default=str(BUNDLES_DIR),
+                       help="Directory to write bundles to")
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    
+    manifest = build_bundles(
+        DataLoader.load_recipes_data(),
+        DataLoader.load_materials_data(),
+        load_snapshot(HORDE_FILE),
+        load_pricing_rows(HORDE_FILE),
+        read_last_updated(HORDE_UPDATE_FILE),
+        Path(args.output)
+    )
+    for profession, entry in manifest['bundles'].items():
+        print(f"{profession:<16} {entry['file']:<36} {entry['gzip_size'] / 1024:>7.1f} KB")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
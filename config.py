@@ -10,14 +10,18 @@ from typing import Dict, Any
 PROJECT_ROOT = Path(__file__).parent
 DATA_DIR = PROJECT_ROOT / "data"
 LOGS_DIR = PROJECT_ROOT / "logs"
-
-# Ensure directories exist
-DATA_DIR.mkdir(exist_ok=True)
-LOGS_DIR.mkdir(exist_ok=True)
+# Directories are created by the code that writes to them, so importing config has no side effects
 
 # File paths
 RECIPES_FILE = PROJECT_ROOT / "recipes.json"
 MATERIALS_FILE = PROJECT_ROOT / "materials.json"
+HORDE_FILE = PROJECT_ROOT / "horde.json"
+HORDE_UPDATE_FILE = PROJECT_ROOT / "horde_update.json"
+PRICE_HISTORY_DIR = DATA_DIR / "price_history"
+REALMS_DIR = DATA_DIR / "realms"
+VENDOR_PRICES_FILE = DATA_DIR / "vendor_prices.json"
+BUNDLES_DIR = PROJECT_ROOT / "bundles"
+SITE_DIR = PROJECT_ROOT / "dist"
 URLS_FILE = PROJECT_ROOT / "urls.txt"
 FAILED_URLS_FILE = PROJECT_ROOT / "failed_urls.txt"
 LOG_FILE = LOGS_DIR / "scraper.log"
@@ -28,6 +32,11 @@ SCRAPER_CONFIG = {
     "timeout": 15,
     "max_retries": 3,
     "delay": 2.0,
+    "telemetry_file": LOGS_DIR / "scrape_telemetry.jsonl",  # per-URL timings and run summary
+    "concurrency": 8,  # async scraper: requests in flight at once
+    "requests_per_second": 4.0,  # async scraper: token bucket refill rate
+    "burst": 4,  # async scraper: requests that may start back to back
+    "parse_workers": None,  # async scraper: HTML parser processes, None for one per CPU
     "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
     "chrome_options": [
         "--no-sandbox",
@@ -55,6 +64,14 @@ WOWHEAD_CONFIG = {
     "max_concurrent": 1,  # max concurrent requests
 }
 
+# Recipe URL discovery settings
+DISCOVERY_CONFIG = {
+    # Wowhead listing page of every recipe of a profession
+    "listing_url": "https://www.wowhead.com/classic/spells/professions/{profession}",
+    "queue_file": DATA_DIR / "url_queue.txt",  # deduplicated URLs for the scrapers
+    "skip_scraped": True,  # leave out spells already in recipes.json
+}
+
 # Web interface settings
 WEB_CONFIG = {
     "port": 8000,
@@ -62,6 +79,89 @@ WEB_CONFIG = {
     "debug": True,
     "auto_reload": True,
     "cors_enabled": True,
+    "stream_batch_size": 100,  # recipes per chunk in streamed NDJSON responses
+    "background_load": True,  # start serving /api/health while data loads
+}
+
+# API response cache settings
+CACHE_CONFIG = {
+    "enabled": True,
+    "max_entries": 256,
+    "max_bytes": 64 * 1024 * 1024,  # total size of cached response bodies
+    # Serialized recipes and profit records kept by JSONSerializer.fragment, least recently used dropped
+    "max_fragments": 32768,
+}
+
+# Server-Sent Events settings
+EVENTS_CONFIG = {
+    "max_queue": 32,  # undelivered events before a slow subscriber is dropped
+    "replay_size": 64,  # recent events kept for clients reconnecting with Last-Event-ID
+    "heartbeat_seconds": 15,
+    "retry_ms": 3000,
+}
+
+# Static site settings
+SITE_CONFIG = {
+    # Recipe list orderings rendered for every profession
+    "sort_keys": ["name", "skill_level", "profit", "net_profit", "gold_per_hour"],
+    "sort_orders": ["asc", "desc"],
+    "top_k": 20,
+    "compress_level": 9,
+    # Pages and the data files they fall back to, copied next to the rendered API
+    "assets": ["index.html", "indexv2.html", "cooking.html",
+               "recipes.json", "materials.json", "horde.json", "horde_update.json"],
+}
+
+# Optional SQLite storage backend
+DATABASE_CONFIG = {
+    "enabled": False,  # filter and sort /api/recipes in SQL instead of in memory
+    "path": DATA_DIR / "recipes.db",
+}
+
+# Benchmark settings
+BENCHMARK_CONFIG = {
+    "scales": [1, 10],  # catalogue sizes to run, as multiples of recipes.json
+    "min_time": 1.0,  # seconds to keep repeating each benchmark
+    "max_rounds": 200,
+    "regression_threshold": 0.25,  # fail when p50 is this much slower than the baseline
+    "baseline_file": DATA_DIR / "benchmark_baseline.json",
+}
+
+# Multi-realm prices, served side by side with horde.json
+REALMS_CONFIG = {
+    "default": "default",  # ?realm= value that selects horde.json
+    "max_tables": 8,  # realm profit tables kept built; the least recently used is dropped
+    # Snapshot key -> URL of a horde.json-format pricing file, e.g.
+    # "living-flame-alliance": "https://.../alliance.json"
+    "sources": {},
+}
+
+# Arbitrage scanner thresholds; prices are in copper per unit
+ARBITRAGE_CONFIG = {
+    "min_profit": 1000,  # 10 silver after AH fees
+    "min_roi": 20,  # percent of the buy price
+    "max_results": 200,
+    "buy_field": "minBuyout",  # cross-realm purchases pay the cheapest listing
+}
+
+# Request metrics and profiling
+METRICS_CONFIG = {
+    "enabled": True,  # time request stages and serve /api/metrics
+    # Histogram bucket bounds in seconds
+    "buckets": [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0],
+    "profile_slow_ms": 0,  # sample API requests and save profiles of those slower than this; 0 disables
+    "profile_interval": 0.001,  # seconds between stack samples
+    "profile_dir": LOGS_DIR / "profiles",
+}
+
+# Load test settings
+LOADTEST_CONFIG = {
+    "base_url": "http://localhost:8000",
+    "concurrency": [1, 4, 16, 64],  # worker counts to step through
+    "duration": 10.0,  # seconds per concurrency level
+    "timeout": 30.0,
+    # Relative weights of the synthetic request kinds
+    "mix": {"list": 0.4, "detail": 0.3, "top": 0.1, "stats": 0.05, "calculate": 0.15},
 }
 
 # Data processing settings
@@ -70,6 +170,40 @@ DATA_CONFIG = {
     "backup_count": 5,
     "compression_enabled": False,
     "validation_enabled": True,
+    "compact_json": True,  # write machine-consumed data files without indentation
+}
+
+# Pricing settings
+PRICING_CONFIG = {
+    "price_field": "marketValue",  # horde.json field used to price reagents and results
+    "ah_cut": 0.05,  # share of a successful sale the auction house keeps
+    # horde.json has no vendor sell prices, so the deposit is estimated from the sale price
+    "deposit_rate": 0.015,
+    "turnover_hours": 48,  # hours for the listed market quantity to sell through
+}
+
+# Profession levelling settings
+LEVELING_CONFIG = {
+    # Skill above a recipe's learn level where it turns yellow and grey.
+    # Recipe data only has the learn level, so these are typical offsets.
+    "yellow_offset": 25,
+    "grey_offset": 50,
+    "max_skill": 300,  # profession skill cap; plans cannot target beyond it
+}
+
+# Price analytics settings
+ANALYTICS_CONFIG = {
+    "ema_half_life_hours": 24,
+    "window_days": 7,
+    "smoothing": "median",  # "median" or "ema" for smoothed profit pricing
+}
+
+# Price history settings
+HISTORY_CONFIG = {
+    # Order of the values stored per item in every snapshot record
+    "fields": ["minBuyout", "quantity", "marketValue", "numAuctions"],
+    "compress_level": 9,
+    "retention_days": None,  # keep every partition when None
 }
 
 # Logging settings
@@ -307,13 +441,34 @@ __all__ = [
     "LOGS_DIR",
     "RECIPES_FILE",
     "MATERIALS_FILE",
+    "HORDE_FILE",
+    "HORDE_UPDATE_FILE",
+    "PRICE_HISTORY_DIR",
+    "REALMS_DIR",
+    "VENDOR_PRICES_FILE",
+    "BUNDLES_DIR",
+    "SITE_DIR",
     "URLS_FILE",
     "FAILED_URLS_FILE",
     "LOG_FILE",
     "SCRAPER_CONFIG",
     "WOWHEAD_CONFIG",
+    "DISCOVERY_CONFIG",
     "WEB_CONFIG",
+    "CACHE_CONFIG",
+    "EVENTS_CONFIG",
+    "SITE_CONFIG",
     "DATA_CONFIG",
+    "DATABASE_CONFIG",
+    "BENCHMARK_CONFIG",
+    "REALMS_CONFIG",
+    "ARBITRAGE_CONFIG",
+    "METRICS_CONFIG",
+    "LOADTEST_CONFIG",
+    "PRICING_CONFIG",
+    "LEVELING_CONFIG",
+    "ANALYTICS_CONFIG",
+    "HISTORY_CONFIG",
     "LOGGING_CONFIG",
     "PROFESSIONS",
     "QUALITY_COLORS",
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+SQLite storage backend for WoW Classic SoD Recipe Calculator
+Keeps recipes, items and prices in indexed tables and answers recipe queries in SQL.
+"""
+
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import DATABASE_CONFIG, DEFAULT_VENDOR_PRICES, HORDE_FILE, PRICING_CONFIG
+from price_history import PRICE_FIELDS, PriceSnapshot, SnapshotDelta, diff_snapshots, load_snapshot
+from utils import PROFIT_SORT_KEYS
+
+logger = logging.getLogger(__name__)
+
+# horde.json field -> prices table column
+PRICE_COLUMNS = {
+    'minBuyout': 'min_buyout',
+    'quantity': 'quantity',
+    'marketValue': 'market_value',
+    'numAuctions': 'num_auctions',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    recipe_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    profession TEXT NOT NULL,
+    skill_level INTEGER NOT NULL DEFAULT 0,
+    icon_name TEXT,
+    result_item_id INTEGER,
+    result_quantity INTEGER NOT NULL DEFAULT 1,
+    url TEXT,
+    scraped_at TEXT,
+    position INTEGER NOT NULL  -- insertion order, the order recipes.json lists them in
+);
+CREATE INDEX IF NOT EXISTS idx_recipes_profession_skill ON recipes (profession COLLATE NOCASE, skill_level);
+CREATE INDEX IF NOT EXISTS idx_recipes_name ON recipes (name);
+CREATE INDEX IF NOT EXISTS idx_recipes_result_item ON recipes (result_item_id);
+CREATE INDEX IF NOT EXISTS idx_recipes_position ON recipes (position);
+
+CREATE TABLE IF NOT EXISTS recipe_materials (
+    recipe_id INTEGER NOT NULL REFERENCES recipes (recipe_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (recipe_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_recipe_materials_item ON recipe_materials (item_id);
+
+CREATE TABLE IF NOT EXISTS items (
+    item_id INTEGER PRIMARY KEY,
+    name TEXT,
+    quality INTEGER,
+    icon_name TEXT,
+    price REAL  -- legacy materials.json price, used when the item has no market price
+);
+
+CREATE TABLE IF NOT EXISTS vendor_prices (
+    item_id INTEGER PRIMARY KEY,
+    price REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS prices (
+    item_id INTEGER PRIMARY KEY,
+    min_buyout INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    market_value INTEGER NOT NULL,
+    num_auctions INTEGER NOT NULL
+);
+
+-- Reagent cost per craft, kept up to date incrementally as prices change
+CREATE TABLE IF NOT EXISTS recipe_costs (
+    recipe_id INTEGER PRIMARY KEY REFERENCES recipes (recipe_id) ON DELETE CASCADE,
+    cost REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Reagent cost of the recipes listed in the temp table _recipe_ids, or of all recipes
+COST_QUERY = """
+INSERT OR REPLACE INTO recipe_costs (recipe_id, cost)
+SELECT r.recipe_id, COALESCE(SUM(rm.quantity * COALESCE(p.{price}, i.price, v.price, 0)), 0)
+FROM recipes r
+LEFT JOIN recipe_materials rm ON rm.recipe_id = r.recipe_id
+LEFT JOIN prices p ON p.item_id = rm.item_id
+LEFT JOIN items i ON i.item_id = rm.item_id
+LEFT JOIN vendor_prices v ON v.item_id = rm.item_id
+{where}
+GROUP BY r.recipe_id
+"""
+
+# Profit data of every recipe, mirroring DataProcessor.calculate_recipe_profit and
+# ProfitTable. Created per connection so the price field and fee settings are current.
+PROFIT_VIEW = """
+CREATE TEMP VIEW IF NOT EXISTS recipe_profits AS
+WITH vals AS (
+    SELECT r.recipe_id,
+           COALESCE(c.cost, 0) AS cost,
+           r.result_quantity * COALESCE(rp.{price}, 0) AS result_value,
+           CASE WHEN COALESCE(rp.quantity, 0) > 0
+                THEN rp.quantity / {turnover_hours} / (rp.num_auctions + 1.0) / MAX(r.result_quantity, 1)
+                ELSE 0.0 END AS sales_per_hour
+    FROM recipes r
+    LEFT JOIN recipe_costs c ON c.recipe_id = r.recipe_id
+    LEFT JOIN prices rp ON rp.item_id = r.result_item_id
+)
+SELECT recipe_id, cost, result_value,
+       result_value - cost AS profit,
+       CASE WHEN cost > 0 THEN (result_value - cost) * 100.0 / cost ELSE 0 END AS profit_margin,
+       CASE WHEN cost > 0 THEN (result_value - cost) * 100.0 / cost ELSE 0 END AS roi,
+       result_value * {fee_factor} - cost AS net_profit,
+       sales_per_hour,
+       CASE WHEN result_value * {fee_factor} - cost > 0
+            THEN (result_value * {fee_factor} - cost) * sales_per_hour ELSE 0.0 END AS gold_per_hour
+FROM vals
+"""
+
+# sort_by -> SQL expression; other values keep insertion order like sort_recipes
+SORT_COLUMNS = {
+    'name': 'r.name',
+    'skill_level': 'r.skill_level',
+    'profession': 'r.profession',
+    **{key: f'rp.{key}' for key in PROFIT_SORT_KEYS},
+}
+
+
+def build_recipe_query(filters: Dict[str, Any], sort_by: str = 'name', sort_order: str = 'asc',
+                       limit: Optional[int] = None, offset: int = 0) -> Tuple[str, List[Any]]:
+    """Compile filter_recipes filters and a sort_recipes ordering into SQL and parameters."""
+    conditions = []
+    params: List[Any] = []
+    
+    if filters.get('profession'):
+        conditions.append('r.profession = ? COLLATE NOCASE')
+        params.append(filters['profession'])
+    if filters.get('min_skill') is not None:
+        conditions.append('r.skill_level >= ?')
+        params.append(int(filters['min_skill']))
+    if filters.get('max_skill') is not None:
+        conditions.append('r.skill_level <= ?')
+        params.append(int(filters['max_skill']))
+    if filters.get('min_profit') is not None:
+        conditions.append('rp.profit >= ?')
+        params.append(float(filters['min_profit']))
+    if filters.get('search'):
+        conditions.append('instr(lower(r.name), ?) > 0')
+        params.append(filters['search'].lower())
+    
+    sql = 'SELECT r.recipe_id FROM recipes r JOIN recipe_profits rp ON rp.recipe_id = r.recipe_id'
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    
+    # Ties keep insertion order, matching the stable sort in sort_recipes
+    direction = 'DESC' if sort_order.lower() == 'desc' else 'ASC'
+    column = SORT_COLUMNS.get(sort_by)
+    sql += f' ORDER BY {column} {direction}, r.position' if column else ' ORDER BY r.position'
+    
+    if limit is not None:
+        sql += ' LIMIT ? OFFSET ?'
+        params.extend([int(limit), int(offset)])
+    
+    return sql, params
+
+
+class RecipeDatabase:
+    """
+    SQLite store for recipes, items and prices.
+    
+    Recipe filtering, sorting and profit calculation run as indexed SQL
+    queries, so only the requested page of recipes is ever loaded.
+    Price syncs upsert just the items that changed since the last sync,
+    and only the stored reagent costs of recipes using them are recomputed.
+    The one connection is shared by the server's threads, so every use
+    of it holds a lock.
+    """
+    
+    def __init__(self, path: Path = DATABASE_CONFIG['path'],
+                 price_field: str = PRICING_CONFIG['price_field']):
+        self.path = Path(path)
+        self.price_column = PRICE_COLUMNS[price_field]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.executescript(SCHEMA)
+        self.connection.execute('CREATE TEMP TABLE IF NOT EXISTS _recipe_ids (recipe_id INTEGER PRIMARY KEY)')
+        self.connection.executescript(PROFIT_VIEW.format(
+            price=self.price_column,
+            turnover_hours=float(PRICING_CONFIG['turnover_hours']),
+            fee_factor=1 - PRICING_CONFIG['ah_cut'] - PRICING_CONFIG['deposit_rate'],
+        ))
+        self._sync_cost_basis(price_field)
+    
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self.connection.close()
+    
+    def _sync_cost_basis(self, price_field: str) -> None:
+        """Mirror DEFAULT_VENDOR_PRICES and recompute every cost if they or the price field changed."""
+        basis = f"{price_field}:{sorted(DEFAULT_VENDOR_PRICES.items())}"
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'cost_basis'").fetchone()
+        if row is not None and row[0] == basis:
+            return
+        
+        with self.connection:
+            self.connection.execute('DELETE FROM vendor_prices')
+            self.connection.executemany(
+                'INSERT INTO vendor_prices (item_id, price) VALUES (?, ?)',
+                DEFAULT_VENDOR_PRICES.items()
+            )
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('cost_basis', ?)", (basis,))
+            self._refresh_costs()
+    
+    def _refresh_costs(self, recipe_ids: Optional[Iterable[int]] = None) -> None:
+        """Recompute the stored cost of the given recipes, or of all recipes if None."""
+        if recipe_ids is None:
+            self.connection.execute(COST_QUERY.format(price=self.price_column, where=''))
+            return
+        
+        self.connection.execute('DELETE FROM _recipe_ids')
+        self.connection.executemany('INSERT OR IGNORE INTO _recipe_ids VALUES (?)',
+                                    [(recipe_id,) for recipe_id in recipe_ids])
+        self.connection.execute(COST_QUERY.format(
+            price=self.price_column, where='WHERE r.recipe_id IN (SELECT recipe_id FROM _recipe_ids)'
+        ))
+    
+    def _refresh_costs_for_items(self, item_ids: Iterable[int]) -> None:
+        """Recompute the stored cost of every recipe that uses one of the given items."""
+        item_ids = list(item_ids)
+        recipe_ids = set()
+        for start in range(0, len(item_ids), 500):
+            chunk = item_ids[start:start + 500]
+            recipe_ids.update(row[0] for row in self.connection.execute(
+                f"SELECT DISTINCT recipe_id FROM recipe_materials WHERE item_id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            ))
+        self._refresh_costs(recipe_ids)
+    
+    def upsert_recipes(self, recipes: List[Dict[str, Any]]) -> int:
+        """Insert or update recipes and replace their materials; returns the number written."""
+        with self._lock, self.connection:
+            # New recipes go after existing ones; updated recipes keep their position
+            next_position = self.connection.execute(
+                'SELECT COALESCE(MAX(position), -1) + 1 FROM recipes'
+            ).fetchone()[0]
+            self.connection.executemany(
+                """
+                INSERT INTO recipes (recipe_id, name, profession, skill_level, icon_name,
+                                     result_item_id, result_quantity, url, scraped_at, position)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (recipe_id) DO UPDATE SET
+                    name = excluded.name, profession = excluded.profession,
+                    skill_level = excluded.skill_level, icon_name = excluded.icon_name,
+                    result_item_id = excluded.result_item_id,
+                    result_quantity = excluded.result_quantity,
+                    url = excluded.url, scraped_at = excluded.scraped_at
+                """,
+                [
+                    (recipe['recipe_id'], recipe.get('name', ''), recipe.get('profession', 'Unknown'),
+                     recipe.get('skill_level', 0), recipe.get('icon_name'), recipe.get('result_item_id'),
+                     recipe.get('result_quantity', 1), recipe.get('url'), recipe.get('scraped_at'),
+                     next_position + index)
+                    for index, recipe in enumerate(recipes)
+                ]
+            )
+            self.connection.executemany(
+                'DELETE FROM recipe_materials WHERE recipe_id = ?',
+                [(recipe['recipe_id'],) for recipe in recipes]
+            )
+            self.connection.executemany(
+                'INSERT INTO recipe_materials (recipe_id, position, item_id, quantity) VALUES (?, ?, ?, ?)',
+                [
+                    (recipe['recipe_id'], position, material['itemId'], material['quantity'])
+                    for recipe in recipes
+                    for position, material in enumerate(recipe.get('materials', []))
+                ]
+            )
+            self._refresh_costs(recipe['recipe_id'] for recipe in recipes)
+        return len(recipes)
+    
+    def upsert_items(self, materials_index: Dict[int, Dict[str, Any]]) -> int:
+        """Insert or update items from a materials index; returns the number written."""
+        with self._lock, self.connection:
+            self.connection.executemany(
+                """
+                INSERT INTO items (item_id, name, quality, icon_name, price) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (item_id) DO UPDATE SET
+                    name = excluded.name, quality = excluded.quality,
+                    icon_name = excluded.icon_name, price = excluded.price
+                """,
+                [
+                    (item_id, item.get('name'), item.get('quality'), item.get('iconname'), item.get('price'))
+                    for item_id, item in materials_index.items()
+                ]
+            )
+            self._refresh_costs_for_items(materials_index.keys())
+        return len(materials_index)
+    
+    def load_prices(self) -> PriceSnapshot:
+        """Return the stored prices as a snapshot."""
+        columns = ', '.join(PRICE_COLUMNS[field] for field in PRICE_FIELDS)
+        with self._lock:
+            return {
+                row[0]: tuple(row[1:])
+                for row in self.connection.execute(f'SELECT item_id, {columns} FROM prices')
+            }
+    
+    def sync_prices(self, snapshot: PriceSnapshot, delta: Optional[SnapshotDelta] = None) -> SnapshotDelta:
+        """Upsert the items that changed since the stored prices and delete delisted ones."""
+        with self._lock:
+            if delta is None:
+                delta = diff_snapshots(self.load_prices(), snapshot)
+            if not delta:
+                return delta
+            
+            columns = [PRICE_COLUMNS[field] for field in PRICE_FIELDS]
+            updates = ', '.join(f'{column} = excluded.{column}' for column in columns)
+            with self.connection:
+                self.connection.executemany(
+                    f"""
+                    INSERT INTO prices (item_id, {', '.join(columns)}) VALUES (?{', ?' * len(columns)})
+                    ON CONFLICT (item_id) DO UPDATE SET {updates}
+                    """,
+                    [(item_id, *values) for item_id, values in delta.changed.items()]
+                )
+                self.connection.executemany(
+                    'DELETE FROM prices WHERE item_id = ?', [(item_id,) for item_id in delta.removed]
+                )
+                self._refresh_costs_for_items(delta.item_ids)
+        
+        logger.info(f"Synced prices: {len(delta.changed)} upserted, {len(delta.removed)} removed")
+        return delta
+    
+    def _materials_for(self, recipe_ids: List[int]) -> Dict[int, List[Dict[str, int]]]:
+        """Return the ordered materials of the given recipes."""
+        materials: Dict[int, List[Dict[str, int]]] = {recipe_id: [] for recipe_id in recipe_ids}
+        for start in range(0, len(recipe_ids), 500):
+            chunk = recipe_ids[start:start + 500]
+            rows = self.connection.execute(
+                f"""
+                SELECT recipe_id, item_id, quantity FROM recipe_materials
+                WHERE recipe_id IN ({', '.join('?' * len(chunk))}) ORDER BY recipe_id, position
+                """,
+                chunk
+            )
+            for row in rows:
+                materials[row['recipe_id']].append({'itemId': row['item_id'], 'quantity': row['quantity']})
+        return materials
+    
+    def get_recipes(self, recipe_ids: List[int]) -> List[Dict[str, Any]]:
+        """Load recipes in the given order, in the same shape as recipes.json."""
+        if not recipe_ids:
+            return []
+        
+        rows = {}
+        with self._lock:
+            for start in range(0, len(recipe_ids), 500):
+                chunk = recipe_ids[start:start + 500]
+                for row in self.connection.execute(
+                    f"SELECT * FROM recipes WHERE recipe_id IN ({', '.join('?' * len(chunk))})", chunk
+                ):
+                    rows[row['recipe_id']] = row
+            materials = self._materials_for(recipe_ids)
+        
+        recipes = []
+        for recipe_id in recipe_ids:
+            row = rows.get(recipe_id)
+            if row is None:
+                continue
+            recipe = {key: row[key] for key in row.keys() if key != 'position' and row[key] is not None}
+            recipe['materials'] = materials[recipe_id]
+            recipes.append(recipe)
+        return recipes
+    
+    def query_recipe_ids(self, filters: Dict[str, Any], sort_by: str = 'name', sort_order: str = 'asc',
+                         limit: Optional[int] = None, offset: int = 0) -> List[int]:
+        """Return the ids of the recipes matching filters in sort order."""
+        sql, params = build_recipe_query(filters, sort_by, sort_order, limit, offset)
+        with self._lock:
+            return [row[0] for row in self.connection.execute(sql, params)]
+    
+    def query_recipes(self, filters: Dict[str, Any], sort_by: str = 'name', sort_order: str = 'asc',
+                      limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """Filter and sort recipes in SQL and load just the matching page."""
+        return self.get_recipes(self.query_recipe_ids(filters, sort_by, sort_order, limit, offset))
+    
+    def profit(self, recipe_id: int) -> Optional[Dict[str, float]]:
+        """Return the SQL-computed profit data of a recipe."""
+        with self._lock:
+            row = self.connection.execute('SELECT * FROM recipe_profits WHERE recipe_id = ?',
+                                          (recipe_id,)).fetchone()
+        return dict(row) if row else None
+    
+    def iter_recipes(self, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Yield every recipe in insertion order without loading them all at once."""
+        last_position = -1
+        while True:
+            with self._lock:
+                rows = self.connection.execute(
+                    'SELECT position, recipe_id FROM recipes WHERE position > ? ORDER BY position LIMIT ?',
+                    (last_position, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_position = rows[-1]['position']
+            yield from self.get_recipes([row['recipe_id'] for row in rows])
+    
+    def count_recipes(self) -> int:
+        """Return the number of stored recipes."""
+        with self._lock:
+            return self.connection.execute('SELECT COUNT(*) FROM recipes').fetchone()[0]
+
+
+def main():
+    """Main function to import data into and query the SQLite backend."""
+    import argparse
+    from utils import DataLoader
+    
+    parser = argparse.ArgumentParser(description="WoW Classic SoD SQLite data backend")
+    parser.add_argument("--db", default=str(DATABASE_CONFIG['path']), help="SQLite database file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    subparsers.add_parser("import", help="Import recipes.json, materials.json and horde.json")
+    
+    sync_parser = subparsers.add_parser("sync", help="Upsert changed prices from a horde.json snapshot")
+    sync_parser.add_argument("snapshot_file", nargs="?", default=str(HORDE_FILE),
+                            help="Pricing snapshot to sync")
+    
+    query_parser = subparsers.add_parser("query", help="Filter and sort recipes")
+    query_parser.add_argument("--profession", help="Profession to filter by")
+    query_parser.add_argument("--min-skill", type=int, help="Minimum skill level")
+    query_parser.add_argument("--max-skill", type=int, help="Maximum skill level")
+    query_parser.add_argument("--min-profit", type=float, help="Minimum profit in copper")
+    query_parser.add_argument("--search", help="Text to search recipe names for")
+    query_parser.add_argument("--sort-by", default="name", help="Sort field")
+    query_parser.add_argument("--sort-order", default="asc", choices=["asc", "desc"], help="Sort order")
+    query_parser.add_argument("--limit", type=int, default=20, help="Number of recipes to show")
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    database = RecipeDatabase(Path(args.db))
+    
+    if args.command == "import":
+        database.upsert_recipes(DataLoader.load_recipes_data())
+        database.upsert_items(DataLoader.load_materials_data())
+        database.sync_prices(load_snapshot(HORDE_FILE))
+        logger.info(f"Imported {database.count_recipes()} recipes into {args.db}")
+    elif args.command == "sync":
+        database.sync_prices(load_snapshot(Path(args.snapshot_file)))
+    else:
+        filters = {
+            'profession': args.profession,
+            'min_skill': args.min_skill,
+            'max_skill': args.max_skill,
+            'min_profit': args.min_profit,
+            'search': args.search,
+        }
+        for recipe_id in database.query_recipe_ids(filters, args.sort_by, args.sort_order, args.limit):
+            profit_data = database.profit(recipe_id)
+            recipe = database.get_recipes([recipe_id])[0]
+            print(f"{recipe_id:>6}  {recipe['name']:<40} {recipe['skill_level']:>4}  {profit_data['profit']:>10.0f}")
+    
+    database.close()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
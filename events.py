@@ -0,0 +1,96 @@
+"""
+Server-Sent Events broadcasting for WoW Classic SoD Recipe Calculator
+Pushes changed recipe profits to connected clients when a price snapshot is applied.
+"""
+
+import logging
+import queue
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from config import EVENTS_CONFIG
+from utils import JSONSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(event_id: int, event_type: str, data: bytes) -> bytes:
+    """Encode one event in the text/event-stream wire format."""
+    return b'id: %d\nevent: %s\ndata: %s\n\n' % (event_id, event_type.encode(), data)
+
+
+class EventBroadcaster:
+    """
+    Fan-out of serialized events to any number of subscribers.
+    
+    Each event is serialized once and the same bytes are queued for
+    every subscriber. Subscribers that fall max_queue events behind are
+    dropped rather than buffered without bound; they reconnect with
+    Last-Event-ID and catch up from the replay buffer.
+    """
+    
+    def __init__(self, max_queue: int = EVENTS_CONFIG['max_queue'],
+                 replay_size: int = EVENTS_CONFIG['replay_size']):
+        self.max_queue = max_queue
+        self._subscribers: List[queue.Queue] = []
+        self._recent: Deque[Tuple[int, bytes]] = deque(maxlen=replay_size)
+        self._lock = threading.Lock()
+        self._last_id = 0
+    
+    @property
+    def subscriber_count(self) -> int:
+        """Number of connected subscribers."""
+        with self._lock:
+            return len(self._subscribers)
+    
+    def publish(self, event_type: str, payload: Dict[str, Any]) -> int:
+        """Serialize an event once and queue it for every subscriber; returns its id."""
+        with self._lock:
+            self._last_id += 1
+            message = format_event(self._last_id, event_type, JSONSerializer.dumps(payload))
+            self._recent.append((self._last_id, message))
+            
+            for subscriber in list(self._subscribers):
+                if subscriber.qsize() >= self.max_queue:
+                    self._subscribers.remove(subscriber)
+                    subscriber.put_nowait(None)  # wakes the stream so it can close
+                    logger.warning("Dropped a slow event subscriber")
+                else:
+                    subscriber.put_nowait(message)
+            return self._last_id
+    
+    def subscribe(self, last_event_id: Optional[int] = None) -> queue.Queue:
+        """Register a subscriber, pre-filled with the events it missed since last_event_id."""
+        # One extra slot so a full queue still has room for the close marker
+        subscriber: queue.Queue = queue.Queue(maxsize=self.max_queue + 1)
+        with self._lock:
+            if last_event_id is not None:
+                missed = [message for event_id, message in self._recent if event_id > last_event_id]
+                for message in missed[-self.max_queue:]:
+                    subscriber.put_nowait(message)
+            self._subscribers.append(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        """Remove a subscriber if it is still registered."""
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+    
+    def stream(self, subscriber: queue.Queue,
+               heartbeat: float = EVENTS_CONFIG['heartbeat_seconds']) -> Iterator[bytes]:
+        """Yield queued events, with comment heartbeats while idle, until dropped."""
+        try:
+            yield b'retry: %d\n\n' % EVENTS_CONFIG['retry_ms']
+            while True:
+                try:
+                    message = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield b': keepalive\n\n'
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
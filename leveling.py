@@ -0,0 +1,159 @@
+"""
+Profession levelling planner for WoW Classic SoD Recipe Calculator
+Finds the cheapest sequence of crafts to level a profession between two skill levels.
+"""
+
+import bisect
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import LEVELING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class LevelingPlanner:
+    """
+    Cheapest levelling route over skill points.
+    
+    Each skill point is a step whose expected cost is the crafting cost
+    of a recipe divided by its chance to give a skill-up at that level.
+    Steps are independent, so the cheapest route from A to B is the sum
+    of the cheapest step at every skill point; the cheapest step per
+    skill level is memoized per profession and reused across queries.
+    """
+    
+    def __init__(self, recipes: List[Dict[str, Any]], profits: Dict[int, Dict[str, Any]],
+                 yellow_offset: int = LEVELING_CONFIG['yellow_offset'],
+                 grey_offset: int = LEVELING_CONFIG['grey_offset'],
+                 max_skill: int = LEVELING_CONFIG['max_skill']):
+        self.recipes = recipes
+        self.yellow_offset = yellow_offset
+        self.grey_offset = grey_offset
+        self.max_skill = max_skill
+        
+        # Lower-cased profession -> name as spelled in the recipes, for every profession seen
+        self.professions: Dict[str, str] = {}
+        # Lower-cased profession -> [(skill_level, craft cost, recipe)] sorted by skill level
+        self.recipes_by_profession: Dict[str, List[Tuple[int, float, Dict[str, Any]]]] = {}
+        for recipe in recipes:
+            profession = recipe.get('profession', 'Unknown')
+            self.professions.setdefault(profession.lower(), profession)
+            cost = self._craft_cost(profits.get(recipe['recipe_id']))
+            if cost is None:
+                continue
+            self.recipes_by_profession.setdefault(profession.lower(), []).append(
+                (recipe.get('skill_level', 0), cost, recipe)
+            )
+        # profession -> sorted skill levels, for bisecting the usable recipes
+        self._levels: Dict[str, List[int]] = {}
+        for profession, candidates in self.recipes_by_profession.items():
+            candidates.sort(key=lambda candidate: candidate[0])
+            self._levels[profession] = [candidate[0] for candidate in candidates]
+        
+        # (lower-cased profession, skill) -> (expected cost of the point, expected crafts, recipe)
+        self._steps: Dict[Tuple[str, int], Optional[Tuple[float, float, Dict[str, Any]]]] = {}
+    
+    @staticmethod
+    def _craft_cost(profit_data: Optional[Dict[str, Any]]) -> Optional[float]:
+        """Return the cost of one craft, or None if a reagent has no known price."""
+        if not profit_data or not profit_data.get('material_costs'):
+            return None
+        for material in profit_data['material_costs']:
+            if not material.get('unit_price'):
+                return None
+        return profit_data['cost']
+    
+    def knows(self, profession: str) -> bool:
+        """Return whether any recipe belongs to the profession, in any letter case."""
+        return profession.lower() in self.professions
+    
+    def skill_up_chance(self, skill_level: int, skill: int) -> float:
+        """Chance that crafting a recipe at the given skill raises it by one point."""
+        yellow = skill_level + self.yellow_offset
+        grey = skill_level + self.grey_offset
+        if skill < skill_level or skill >= grey:
+            return 0.0
+        if skill < yellow:
+            return 1.0
+        return (grey - skill) / (grey - yellow)
+    
+    def best_step(self, profession: str, skill: int) -> Optional[Tuple[float, float, Dict[str, Any]]]:
+        """Return the cheapest way to gain the point at skill, or None if nothing gives one."""
+        profession = profession.lower()
+        candidates = self.recipes_by_profession.get(profession)
+        if not candidates:
+            # Not memoized, so arbitrary profession names cannot grow _steps
+            return None
+        
+        key = (profession, skill)
+        if key in self._steps:
+            return self._steps[key]
+        
+        levels = self._levels[profession]
+        # Only recipes learned at or below skill and not yet grey can give a point
+        low = bisect.bisect_right(levels, skill - self.grey_offset)
+        high = bisect.bisect_right(levels, skill)
+        
+        best = None
+        for skill_level, cost, recipe in candidates[low:high]:
+            chance = self.skill_up_chance(skill_level, skill)
+            if chance <= 0:
+                continue
+            expected_cost = cost / chance
+            if best is None or expected_cost < best[0]:
+                best = (expected_cost, 1 / chance, recipe)
+        
+        self._steps[key] = best
+        return best
+    
+    def cheapest_path(self, profession: str, start: int, target: int) -> Dict[str, Any]:
+        """
+        Plan the cheapest crafts to level a profession from start to target.
+        
+        Raises ValueError for a range outside 0..max_skill.
+        """
+        if start < 0 or target > self.max_skill or target <= start:
+            raise ValueError(f"start and target must satisfy 0 <= start < target <= {self.max_skill}")
+        
+        steps = []
+        gaps = []
+        total_cost = 0.0
+        total_crafts = 0.0
+        
+        for skill in range(start, target):
+            best = self.best_step(profession, skill)
+            if best is None:
+                gaps.append(skill)
+                continue
+            
+            expected_cost, expected_crafts, recipe = best
+            total_cost += expected_cost
+            total_crafts += expected_crafts
+            
+            # Merge consecutive points gained with the same recipe
+            if steps and steps[-1]['recipe_id'] == recipe['recipe_id'] and steps[-1]['to_skill'] == skill:
+                step = steps[-1]
+                step['to_skill'] = skill + 1
+                step['expected_crafts'] += expected_crafts
+                step['expected_cost'] += expected_cost
+            else:
+                steps.append({
+                    'recipe_id': recipe['recipe_id'],
+                    'name': recipe.get('name', 'Unknown'),
+                    'skill_level': recipe.get('skill_level', 0),
+                    'from_skill': skill,
+                    'to_skill': skill + 1,
+                    'expected_crafts': expected_crafts,
+                    'expected_cost': expected_cost
+                })
+        
+        return {
+            'profession': self.professions.get(profession.lower(), profession),
+            'start': start,
+            'target': target,
+            'steps': steps,
+            'total_cost': total_cost,
+            'expected_crafts': total_crafts,
+            'gaps': gaps
+        }
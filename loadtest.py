@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Load generator for the WoW Classic SoD Recipe Calculator API
+Drives a running server with synthetic or recorded traffic at increasing concurrency.
+"""
+
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import LOADTEST_CONFIG, PROFESSIONS
+from utils import PROFIT_SORT_KEYS
+
+logger = logging.getLogger(__name__)
+
+# A request to send: {"method": ..., "path": ..., "json": optional body}
+LoadRequest = Dict[str, Any]
+
+
+class TrafficMix:
+    """
+    Synthetic dashboard traffic.
+    
+    Draws weighted request kinds: filtered and sorted recipe lists, detail
+    lookups, top lists, stats polls and batch profit POSTs. Parameters are
+    drawn from small pools, so repeated queries occur as they would from
+    real dashboards.
+    """
+    
+    def __init__(self, recipe_ids: List[int], weights: Dict[str, float] = LOADTEST_CONFIG['mix'],
+                 seed: Optional[int] = None):
+        self.recipe_ids = recipe_ids or [0]
+        self.kinds = list(weights)
+        self.weights = [weights[kind] for kind in self.kinds]
+        self.random = random.Random(seed)
+        self.professions = list(PROFESSIONS)
+        self.sort_keys = ['name', 'skill_level'] + list(PROFIT_SORT_KEYS)
+    
+    def next_request(self) -> LoadRequest:
+        """Return the next request of the mix."""
+        kind = self.random.choices(self.kinds, self.weights)[0]
+        choice = self.random.choice
+        
+        if kind == 'list':
+            path = (f"/api/recipes?profession={choice(self.professions)}"
+                    f"&sort_by={choice(self.sort_keys)}&sort_order={choice(['asc', 'desc'])}")
+        elif kind == 'detail':
+            path = f"/api/recipes/{choice(self.recipe_ids)}"
+        elif kind == 'top':
+            path = f"/api/recipes/top?profession={choice(self.professions)}&k=20"
+        elif kind == 'stats':
+            path = '/api/stats'
+        else:
+            return {
+                'method': 'POST',
+                'path': '/api/calculate-profit',
+                'json': {'recipe_id': choice(self.recipe_ids)}
+            }
+        return {'method': 'GET', 'path': path}
+    
+    def __iter__(self) -> Iterator[LoadRequest]:
+        while True:
+            yield self.next_request()
+
+
+def load_request_log(file_path: Path) -> List[LoadRequest]:
+    """Load a JSONL request log, as written by ``server.py --record``."""
+    requests_list = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                logger.warning(f"Skipping line {line_number} of {file_path}: {e}")
+                continue
+            if 'path' not in entry:
+                logger.warning(f"Skipping line {line_number} of {file_path}: no path")
+                continue
+            requests_list.append({
+                'method': entry.get('method', 'GET'),
+                'path': entry['path'],
+                'json': entry.get('json')
+            })
+    return requests_list
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Return the value at a fraction of a sorted list, or 0 if it is empty."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run_level(base_url: str, source: Iterator[LoadRequest], concurrency: int,
+              duration: float, timeout: float = LOADTEST_CONFIG['timeout']) -> Dict[str, Any]:
+    """Send requests from source with concurrency workers for duration seconds."""
+    import requests
+    
+    lock = threading.Lock()
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+    
+    def next_request() -> LoadRequest:
+        with lock:
+            return next(source)
+    
+    def worker() -> None:
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            request = next_request()
+            start = time.perf_counter()
+            try:
+                response = session.request(request['method'], base_url + request['path'],
+                                           json=request.get('json'), timeout=timeout)
+                status = str(response.status_code)
+            except requests.RequestException as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    wall_time = time.perf_counter() - started
+    
+    latencies.sort()
+    total = len(latencies)
+    errors = sum(count for status, count in statuses.items() if not status.startswith(('2', '3')))
+    return {
+        'concurrency': concurrency,
+        'requests': total,
+        'throughput': total / wall_time if wall_time else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p90_ms': percentile(latencies, 0.90) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'error_rate': errors / total if total else 0.0,
+        'statuses': statuses
+    }
+
+
+def main():
+    """Main function to run the load test."""
+    import argparse
+    from utils import DataLoader
+    
+    parser = argparse.ArgumentParser(description="Load test the recipe calculator API")
+    parser.add_argument("--url", default=LOADTEST_CONFIG['base_url'], help="Base URL of the server")
+    parser.add_argument("--replay", help="JSONL request log to replay instead of synthetic traffic")
+    parser.add_argument("--concurrency", default=",".join(str(c) for c in LOADTEST_CONFIG['concurrency']),
+                       help="Comma-separated worker counts to step through")
+    parser.add_argument("--duration", type=float, default=LOADTEST_CONFIG['duration'],
+                       help="Seconds to run each concurrency level")
+    parser.add_argument("--seed", type=int, help="Random seed for the synthetic mix")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    
+    if args.replay:
+        recorded = load_request_log(Path(args.replay))
+        if not recorded:
+            logger.error(f"No requests to replay in {args.replay}")
+            return 1
+        source_factory = lambda: itertools.cycle(recorded)
+        logger.info(f"Replaying {len(recorded)} recorded requests")
+    else:
+        recipe_ids = [recipe['recipe_id'] for recipe in DataLoader.load_recipes_data()]
+        source_factory = lambda: iter(TrafficMix(recipe_ids, seed=args.seed))
+    
+    results = []
+    print(f"{'workers':>8} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for concurrency in (int(c) for c in args.concurrency.split(',')):
+        result = run_level(args.url, source_factory(), concurrency, args.duration)
+        results.append(result)
+        print(f"{concurrency:>8} {result['requests']:>9} {result['throughput']:>9.1f} "
+              f"{result['p50_ms']:>8.1f} {result['p90_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+              f"{result['error_rate']:>7.1%}")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
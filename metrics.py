@@ -0,0 +1,185 @@
+"""
+Request metrics for WoW Classic SoD Recipe Calculator
+Stage timings, Prometheus-style histograms and a sampling profiler for slow requests.
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import METRICS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def format_labels(labels: Labels) -> str:
+    """Render labels in the Prometheus text format, escaping their values."""
+    if not labels:
+        return ''
+    parts = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms rendered in the Prometheus text format.
+    
+    Metrics are created on first use; every series of a metric should use
+    the same label names. Histograms are cumulative over the process lifetime.
+    """
+    
+    def __init__(self, buckets: List[float] = METRICS_CONFIG['buckets']):
+        self.buckets = sorted(buckets)
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}
+        self._lock = threading.Lock()
+    
+    def increment(self, name: str, labels: Labels = (), value: float = 1.0, help_text: str = '') -> None:
+        """Add value to a counter series."""
+        with self._lock:
+            self._help.setdefault(name, ('counter', help_text))
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0.0) + value
+    
+    def observe(self, name: str, value: float, labels: Labels = (), help_text: str = '') -> None:
+        """Record one observation in a histogram series."""
+        with self._lock:
+            self._help.setdefault(name, ('histogram', help_text))
+            series = self._histograms.setdefault(name, {})
+            # Per-bucket counts, then sum and count
+            state = series.get(labels)
+            if state is None:
+                state = series[labels] = [0.0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+    
+    def render(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """Return every metric, plus the given point-in-time gauges, as exposition text."""
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                kind, help_text = self._help[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{format_labels(labels)} {value:g}")
+            
+            for name in sorted(self._histograms):
+                kind, help_text = self._help[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, state in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, state):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{format_labels(labels + (('le', f'{bound:g}'),))} "
+                                     f"{cumulative:g}")
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {state[-1]:g}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {state[-2]:.6f}")
+                    lines.append(f"{name}_count{format_labels(labels)} {state[-1]:g}")
+        
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value:g}")
+        
+        return '\n'.join(lines) + '\n'
+
+
+class RequestTimer:
+    """Accumulates the time one request spends in each named stage."""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block and add it to the stage total."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+    
+    def elapsed(self) -> float:
+        """Return the seconds since the request started."""
+        return time.perf_counter() - self.started
+    
+    def server_timing(self, total: float) -> str:
+        """Return a Server-Timing header value with stage and total durations in ms."""
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ', '.join(parts)
+
+
+class StackSampler:
+    """
+    Samples the call stack of one thread at a fixed interval.
+    
+    Samples are kept as folded stacks ("outer;inner;leaf count" lines),
+    the input format of flamegraph.pl, speedscope and similar viewers.
+    """
+    
+    def __init__(self, thread_id: int, interval: float = METRICS_CONFIG['profile_interval']):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+    
+    def start(self) -> 'StackSampler':
+        self._thread.start()
+        return self
+    
+    def stop(self) -> Counter:
+        """Stop sampling and return the folded stack counts."""
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                # Function rather than line granularity, so samples within a function merge
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+
+def write_profile(directory: Path, endpoint: str, duration: float, samples: Counter) -> Optional[Path]:
+    """Write folded stack samples for a slow request; returns the file, if any samples were taken."""
+    if not samples:
+        return None
+    
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    name = endpoint.strip('/').replace('/', '_').replace('<', '').replace('>', '') or 'root'
+    file_path = directory / f"{stamp}-{name}-{duration * 1000:.0f}ms.folded"
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+    
+    logger.info(f"Slow request {endpoint} took {duration * 1000:.0f} ms; profile written to {file_path}")
+    return file_path
@@ -0,0 +1,151 @@
+"""
+Batch crafting planner for WoW Classic SoD Recipe Calculator
+Turns a queue of crafts into one consolidated, depth-aware shopping list.
+"""
+
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from config import DEFAULT_VENDOR_PRICES
+from price_history import PRICE_FIELDS, PriceSnapshot
+
+logger = logging.getLogger(__name__)
+
+MIN_BUYOUT_POSITION = PRICE_FIELDS.index('minBuyout')
+QUANTITY_POSITION = PRICE_FIELDS.index('quantity')
+MARKET_VALUE_POSITION = PRICE_FIELDS.index('marketValue')
+
+
+class OrderBook:
+    """
+    Approximate auction depth for one item from a horde.json row.
+    
+    Only the cheapest price, the listed quantity and the market value are
+    known, so the book is modelled as prices rising linearly from
+    minBuyout over the listed quantity, with the slope chosen so the
+    average listed price equals marketValue. Demand beyond the listed
+    quantity is reported as a shortfall priced at the top of the book.
+    """
+    
+    def __init__(self, min_buyout: float, quantity: int, market_value: float):
+        self.min_buyout = float(min_buyout)
+        self.quantity = max(int(quantity), 0)
+        self.max_price = max(2 * float(market_value) - self.min_buyout, self.min_buyout)
+        self._slope = (self.max_price - self.min_buyout) / self.quantity if self.quantity else 0.0
+    
+    @classmethod
+    def from_values(cls, values: Tuple[int, ...]) -> 'OrderBook':
+        """Build an order book from snapshot values."""
+        return cls(values[MIN_BUYOUT_POSITION], values[QUANTITY_POSITION],
+                   values[MARKET_VALUE_POSITION])
+    
+    def price_at(self, units: float) -> float:
+        """Price of the unit bought after the first `units` units."""
+        return self.min_buyout + self._slope * min(units, self.quantity)
+    
+    def cost(self, units: int) -> Dict[str, float]:
+        """Cost of buying the cheapest `units` units, walking up the book."""
+        available = min(units, self.quantity)
+        shortfall = units - available
+        
+        book_cost = available * self.min_buyout + self._slope * available * available / 2
+        total_cost = book_cost + shortfall * self.max_price
+        
+        return {
+            'total_cost': total_cost,
+            'average_price': total_cost / units if units else 0.0,
+            'marginal_price': self.price_at(max(units - 1, 0)),
+            'available': available,
+            'shortfall': shortfall
+        }
+
+
+class CraftPlanner:
+    """Plans the reagent purchases for a queue of crafts."""
+    
+    def __init__(self, recipes: List[Dict[str, Any]], materials_index: Dict[int, Dict[str, Any]],
+                 snapshot: PriceSnapshot):
+        self.recipes = {recipe['recipe_id']: recipe for recipe in recipes}
+        self.materials_index = materials_index
+        self.snapshot = snapshot
+    
+    def aggregate_demand(self, queue: List[Dict[str, int]]) -> Tuple[Counter, int, List[Dict[str, Any]]]:
+        """
+        Sum reagent demand over the queue in a single pass.
+        
+        Returns the itemId -> units counter, the number of planned crafts
+        and the entries whose recipe is unknown. Raises ValueError for a
+        malformed entry, before any demand is summed.
+        """
+        for position, entry in enumerate(queue):
+            if not isinstance(entry, dict):
+                raise ValueError(f"Queue entry {position} must be an object")
+            recipe_id = entry.get('recipe_id')
+            count = entry.get('count', 1)
+            if not isinstance(recipe_id, int) or isinstance(recipe_id, bool):
+                raise ValueError(f"Queue entry {position}: recipe_id must be an integer")
+            if not isinstance(count, int) or isinstance(count, bool) or count <= 0:
+                raise ValueError(f"Queue entry {position}: count must be a positive integer")
+        
+        demand = Counter()
+        crafts = 0
+        skipped = []
+        
+        for entry in queue:
+            recipe = self.recipes.get(entry['recipe_id'])
+            count = entry.get('count', 1)
+            if recipe is None:
+                skipped.append(entry)
+                continue
+            crafts += count
+            for material in recipe['materials']:
+                demand[material['itemId']] += material['quantity'] * count
+        
+        return demand, crafts, skipped
+    
+    def _price_item(self, item_id: int, units: int) -> Dict[str, Any]:
+        """Price the purchase of one reagent line."""
+        name = self.materials_index.get(item_id, {}).get('name', 'Unknown')
+        values = self.snapshot.get(item_id)
+        
+        if values is not None and values[QUANTITY_POSITION] > 0:
+            book = OrderBook.from_values(values)
+            line = book.cost(units)
+            line.update({'source': 'auction', 'min_buyout': book.min_buyout,
+                         'naive_cost': units * book.min_buyout})
+        else:
+            vendor_price = DEFAULT_VENDOR_PRICES.get(item_id, 0)
+            line = {
+                'total_cost': vendor_price * units,
+                'average_price': vendor_price,
+                'marginal_price': vendor_price,
+                'available': units,
+                'shortfall': 0,
+                'source': 'vendor',
+                'min_buyout': vendor_price,
+                'naive_cost': vendor_price * units
+            }
+        
+        line.update({'itemId': item_id, 'name': name, 'quantity': units})
+        return line
+    
+    def plan(self, queue: List[Dict[str, int]]) -> Dict[str, Any]:
+        """Build a consolidated shopping list for a craft queue."""
+        demand, crafts, skipped = self.aggregate_demand(queue)
+        
+        shopping_list = [self._price_item(item_id, units) for item_id, units in demand.items()]
+        shopping_list.sort(key=lambda line: line['total_cost'], reverse=True)
+        
+        total_cost = sum(line['total_cost'] for line in shopping_list)
+        naive_cost = sum(line['naive_cost'] for line in shopping_list)
+        
+        return {
+            'shopping_list': shopping_list,
+            'total_cost': total_cost,
+            'naive_cost': naive_cost,
+            'depth_premium': total_cost - naive_cost,
+            'crafts': crafts,
+            'shortfall_items': [line['itemId'] for line in shopping_list if line['shortfall'] > 0],
+            'skipped': skipped
+        }
@@ -0,0 +1,270 @@
+"""
+Price trend analytics for WoW Classic SoD Recipe Calculator
+Rolling per-item statistics that smooth out one-off underpriced auctions.
+"""
+
+import logging
+import math
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+from config import ANALYTICS_CONFIG
+from price_history import PRICE_FIELDS, PriceHistoryStore, PriceSnapshot, SnapshotDelta
+
+logger = logging.getLogger(__name__)
+
+QUANTITY_POSITION = PRICE_FIELDS.index('quantity')
+AUCTIONS_POSITION = PRICE_FIELDS.index('numAuctions')
+
+
+@dataclass
+class ItemTrend:
+    """Rolling state of one item; values hold from updated_at until the next change."""
+    value: Optional[int]
+    quantity: int
+    num_auctions: int
+    updated_at: int
+    ema: float
+    ema_quantity: float
+    ema_auctions: float
+    # (timestamp, value) change points, value None while the item is not listed
+    window: Deque[Tuple[int, Optional[int]]] = field(default_factory=deque)
+
+
+class PriceAnalytics:
+    """
+    Per-item EMA, median, standard deviation and liquidity.
+    
+    Prices are treated as step functions that only change when a sync
+    reports a new value, so each sync costs O(changed items): the EMA
+    is decayed in closed form over the time a value was held, and the
+    median and deviation are weighted by how long each price lasted
+    within the rolling window.
+    """
+    
+    def __init__(self, price_field: str = 'marketValue',
+                 half_life_hours: float = ANALYTICS_CONFIG['ema_half_life_hours'],
+                 window_days: float = ANALYTICS_CONFIG['window_days']):
+        self.price_field = price_field
+        self._price_position = PRICE_FIELDS.index(price_field)
+        self._tau = half_life_hours * 3600 / math.log(2)
+        self.window_seconds = int(window_days * 86400)
+        self.items: Dict[int, ItemTrend] = {}
+        self.updated_at: Optional[int] = None
+    
+    def _decay(self, elapsed: float) -> float:
+        """Weight left on the previous EMA after elapsed seconds."""
+        return math.exp(-max(elapsed, 0) / self._tau)
+    
+    def _advance(self, trend: ItemTrend, now: int) -> Tuple[float, float, float]:
+        """Return the EMAs of a trend brought forward to now."""
+        if trend.value is None:
+            return trend.ema, trend.ema_quantity, trend.ema_auctions
+        
+        decay = self._decay(now - trend.updated_at)
+        return (
+            trend.value + (trend.ema - trend.value) * decay,
+            trend.quantity + (trend.ema_quantity - trend.quantity) * decay,
+            trend.num_auctions + (trend.ema_auctions - trend.num_auctions) * decay,
+        )
+    
+    def update_item(self, item_id: int, values: Optional[Tuple[int, ...]], timestamp: int) -> None:
+        """Record the values of one item at a sync, or None if it was delisted."""
+        trend = self.items.get(item_id)
+        
+        if trend is None:
+            if values is None:
+                return
+            value = values[self._price_position]
+            trend = ItemTrend(
+                value=value,
+                quantity=values[QUANTITY_POSITION],
+                num_auctions=values[AUCTIONS_POSITION],
+                updated_at=timestamp,
+                ema=float(value),
+                ema_quantity=float(values[QUANTITY_POSITION]),
+                ema_auctions=float(values[AUCTIONS_POSITION]),
+            )
+            trend.window.append((timestamp, value))
+            self.items[item_id] = trend
+            return
+        
+        trend.ema, trend.ema_quantity, trend.ema_auctions = self._advance(trend, timestamp)
+        trend.updated_at = timestamp
+        
+        if values is None:
+            trend.value = None
+            trend.quantity = trend.num_auctions = 0
+        else:
+            trend.value = values[self._price_position]
+            trend.quantity = values[QUANTITY_POSITION]
+            trend.num_auctions = values[AUCTIONS_POSITION]
+        
+        if trend.window[-1][1] != trend.value:
+            trend.window.append((timestamp, trend.value))
+        self._prune(trend, timestamp)
+    
+    def _prune(self, trend: ItemTrend, now: int) -> None:
+        """Drop change points that no longer overlap the rolling window."""
+        window_start = now - self.window_seconds
+        while len(trend.window) > 1 and trend.window[1][0] <= window_start:
+            trend.window.popleft()
+    
+    def apply_delta(self, delta: SnapshotDelta, timestamp: int) -> None:
+        """Update the statistics of the items in a snapshot delta."""
+        for item_id, values in delta.changed.items():
+            self.update_item(item_id, values, timestamp)
+        for item_id in delta.removed:
+            self.update_item(item_id, None, timestamp)
+        self.updated_at = timestamp
+    
+    def apply_snapshot(self, snapshot: PriceSnapshot, timestamp: int) -> None:
+        """Update the statistics from a full snapshot; unchanged items cost little."""
+        for item_id, values in snapshot.items():
+            trend = self.items.get(item_id)
+            if trend is None or trend.value != values[self._price_position] \
+                    or trend.quantity != values[QUANTITY_POSITION] \
+                    or trend.num_auctions != values[AUCTIONS_POSITION]:
+                self.update_item(item_id, values, timestamp)
+        for item_id, trend in self.items.items():
+            if trend.value is not None and item_id not in snapshot:
+                self.update_item(item_id, None, timestamp)
+        self.updated_at = timestamp
+    
+    @classmethod
+    def from_history(cls, store: PriceHistoryStore, start: Optional[int] = None,
+                     **kwargs: Any) -> 'PriceAnalytics':
+        """Build analytics by replaying the price history from start onwards."""
+        analytics = cls(**kwargs)
+        
+        for timestamp, state, record in store.iter_states(start):
+            if record['type'] == 'full':
+                analytics.apply_snapshot(state, timestamp)
+            else:
+                delta = SnapshotDelta()
+                for item_id, values in record['items'].items():
+                    if values is None:
+                        delta.removed.add(int(item_id))
+                    else:
+                        delta.changed[int(item_id)] = tuple(values)
+                analytics.apply_delta(delta, timestamp)
+        
+        logger.info(f"Built price analytics for {len(analytics.items)} items")
+        return analytics
+    
+    def _weighted_values(self, trend: ItemTrend, now: int) -> Dict[int, float]:
+        """Return value -> seconds held within the window ending at now."""
+        window_start = now - self.window_seconds
+        weights: Dict[int, float] = {}
+        points = list(trend.window)
+        
+        for i, (timestamp, value) in enumerate(points):
+            if value is None:
+                continue
+            segment_end = points[i + 1][0] if i + 1 < len(points) else now
+            duration = segment_end - max(timestamp, window_start)
+            if duration > 0:
+                weights[value] = weights.get(value, 0) + duration
+        
+        if not weights and trend.value is not None:
+            weights[trend.value] = 1.0
+        return weights
+    
+    def stats(self, item_id: int, now: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Return the rolling statistics of an item, or None if it was never seen."""
+        trend = self.items.get(item_id)
+        if trend is None:
+            return None
+        
+        now = now if now is not None else (self.updated_at or trend.updated_at)
+        ema, ema_quantity, ema_auctions = self._advance(trend, now)
+        weights = self._weighted_values(trend, now)
+        
+        median = mean = std = None
+        if weights:
+            total = sum(weights.values())
+            mean = sum(value * weight for value, weight in weights.items()) / total
+            variance = sum(weight * (value - mean) ** 2 for value, weight in weights.items()) / total
+            std = math.sqrt(variance)
+            
+            cumulative = 0.0
+            for value in sorted(weights):
+                cumulative += weights[value]
+                if cumulative >= total / 2:
+                    median = value
+                    break
+        
+        return {
+            'item_id': item_id,
+            'field': self.price_field,
+            'current': trend.value,
+            'ema': ema,
+            'median': median,
+            'mean': mean,
+            'std': std,
+            'volatility': (std / mean) if mean else None,
+            'liquidity': {
+                'quantity': trend.quantity,
+                'num_auctions': trend.num_auctions,
+                'avg_quantity': ema_quantity,
+                'avg_auctions': ema_auctions,
+            },
+            'updated_at': trend.updated_at,
+        }
+    
+    def smoothed_price(self, item_id: int, method: str = ANALYTICS_CONFIG['smoothing'],
+                       now: Optional[int] = None) -> Optional[float]:
+        """Return the EMA or rolling median price of an item."""
+        item_stats = self.stats(item_id, now)
+        if item_stats is None:
+            return None
+        return item_stats['ema'] if method == 'ema' else item_stats['median']
+    
+    def _smoothed_values(self, item_id: int, values: Tuple[int, ...], method: str,
+                         now: Optional[int]) -> Tuple[int, ...]:
+        """Return values with the price field replaced by the item's smoothed price."""
+        price = self.smoothed_price(item_id, method, now)
+        if price is None:
+            return values
+        values = list(values)
+        values[self._price_position] = int(round(price))
+        return tuple(values)
+    
+    def smoothed_snapshot(self, snapshot: PriceSnapshot, method: str = ANALYTICS_CONFIG['smoothing'],
+                          now: Optional[int] = None) -> PriceSnapshot:
+        """Return a copy of snapshot with the price field replaced by smoothed values."""
+        return {
+            item_id: self._smoothed_values(item_id, values, method, now)
+            for item_id, values in snapshot.items()
+        }
+    
+    def update_smoothed(self, smoothed: PriceSnapshot, snapshot: PriceSnapshot, item_ids: Iterable[int],
+                        method: str = ANALYTICS_CONFIG['smoothing'],
+                        now: Optional[int] = None) -> Tuple[PriceSnapshot, SnapshotDelta]:
+        """
+        Re-smooth only item_ids of a smoothed snapshot against the new snapshot.
+        
+        Returns the new smoothed snapshot and its delta. Unchanged items
+        keep their smoothed value from the sync that last touched them,
+        so only changed items are re-smoothed. The snapshot itself is
+        still copied, an O(all items) dict copy, because request threads
+        may be reading the previous one.
+        """
+        updated = dict(smoothed)
+        delta = SnapshotDelta()
+        for item_id in item_ids:
+            previous = updated.get(item_id)
+            values = snapshot.get(item_id)
+            if values is None:
+                if previous is not None:
+                    del updated[item_id]
+                    delta.removed.add(item_id)
+                    delta.previous[item_id] = previous
+                continue
+            
+            values = self._smoothed_values(item_id, values, method, now)
+            if values != previous:
+                updated[item_id] = delta.changed[item_id] = values
+                delta.previous[item_id] = previous
+        return updated, delta
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Historical price store for WoW Classic SoD Recipe Calculator
+Keeps every hourly horde.json snapshot as an append-only, compressed history.
+"""
+
+import gzip
+import json
+import logging
+import shutil
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from config import HORDE_FILE, HORDE_UPDATE_FILE, PRICE_HISTORY_DIR, HISTORY_CONFIG
+
+logger = logging.getLogger(__name__)
+
+PRICE_FIELDS = tuple(HISTORY_CONFIG["fields"])
+
+# itemId -> values in PRICE_FIELDS order
+PriceSnapshot = Dict[int, Tuple[int, ...]]
+
+
+@dataclass
+class SnapshotDelta:
+    """Differences between two pricing snapshots."""
+    changed: Dict[int, Tuple[int, ...]] = field(default_factory=dict)
+    removed: Set[int] = field(default_factory=set)
+    previous: Dict[int, Optional[Tuple[int, ...]]] = field(default_factory=dict)
+    
+    @property
+    def item_ids(self) -> Set[int]:
+        """All itemIds that were added, changed or removed."""
+        return self.changed.keys() | self.removed
+    
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.removed)
+    
+    def __len__(self) -> int:
+        return len(self.changed) + len(self.removed)
+    
+    def field_deltas(self, field_name: str = 'marketValue') -> Dict[int, int]:
+        """Return new minus old value of one field for every touched item."""
+        index = PRICE_FIELDS.index(field_name)
+        deltas = {}
+        for item_id in self.item_ids:
+            old_values = self.previous.get(item_id)
+            new_values = self.changed.get(item_id)
+            old_value = old_values[index] if old_values else 0
+            new_value = new_values[index] if new_values else 0
+            deltas[item_id] = new_value - old_value
+        return deltas
+    
+    def to_record(self) -> Dict[str, Optional[List[int]]]:
+        """Return the delta as a JSON-ready mapping, with None for removed items."""
+        record = {str(item_id): list(values) for item_id, values in self.changed.items()}
+        for item_id in self.removed:
+            record[str(item_id)] = None
+        return record
+
+
+def diff_snapshots(previous: PriceSnapshot, current: PriceSnapshot) -> SnapshotDelta:
+    """Compare two snapshots and return the items that changed between them."""
+    delta = SnapshotDelta()
+    for item_id, values in current.items():
+        old_values = previous.get(item_id)
+        if old_values != values:
+            delta.changed[item_id] = values
+            delta.previous[item_id] = old_values
+    for item_id in previous.keys() - current.keys():
+        delta.removed.add(item_id)
+        delta.previous[item_id] = previous[item_id]
+    return delta
+
+
+def load_snapshot(file_path: Path = HORDE_FILE) -> PriceSnapshot:
+    """Load a horde.json pricing file into an itemId-keyed snapshot."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    rows = data.get('pricing_data', []) if isinstance(data, dict) else data
+    snapshot = {}
+    for row in rows:
+        item_id = row.get('itemId')
+        if not isinstance(item_id, int):
+            continue
+        snapshot[item_id] = tuple(int(row.get(field) or 0) for field in PRICE_FIELDS)
+    
+    return snapshot
+
+
+def snapshot_timestamp(update_file: Path = HORDE_UPDATE_FILE) -> int:
+    """Read the sync timestamp from horde_update.json, falling back to now."""
+    try:
+        with open(update_file, 'r', encoding='utf-8') as f:
+            last_updated = json.load(f)['last_updated']
+        return int(datetime.strptime(last_updated, '%Y-%m-%dT%H:%M:%SZ')
+                   .replace(tzinfo=timezone.utc).timestamp())
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning(f"Could not read snapshot timestamp from {update_file}: {e}")
+        return int(datetime.now(timezone.utc).timestamp())
+
+
+class PriceHistoryStore:
+    """
+    Append-only price history partitioned by UTC day.
+    
+    Every ingested snapshot becomes one immutable gzip file named after
+    its timestamp inside a ``YYYY-MM-DD`` partition directory. The first
+    snapshot of a day is stored in full as a keyframe and later ones only
+    hold the items that changed (``null`` for items that disappeared), so
+    a partition can be replayed on its own and files are never rewritten.
+    """
+    
+    def __init__(self, root: Path = PRICE_HISTORY_DIR):
+        self.root = Path(root)
+    
+    @staticmethod
+    def _partition_name(timestamp: int) -> str:
+        """Return the partition directory name for a timestamp."""
+        return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d')
+    
+    def partitions(self) -> List[Path]:
+        """Return partition directories in chronological order."""
+        if not self.root.exists():
+            return []
+        return sorted(p for p in self.root.iterdir() if p.is_dir())
+    
+    @staticmethod
+    def _record_files(partition: Path) -> List[Path]:
+        """Return the snapshot files of a partition in timestamp order."""
+        return sorted(partition.glob('*.json.gz'), key=lambda p: int(p.name.split('.')[0]))
+    
+    @staticmethod
+    def _read_record(file_path: Path) -> Dict:
+        """Read one snapshot record."""
+        with gzip.open(file_path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _last_timestamp(self, partition: Path) -> Optional[int]:
+        """Return the timestamp of the newest snapshot in a partition."""
+        if not partition.exists():
+            return None
+        record_files = self._record_files(partition)
+        return int(record_files[-1].name.split('.')[0]) if record_files else None
+    
+    def _replay_partition(self, partition: Path, until: Optional[int] = None) -> Tuple[PriceSnapshot, Optional[int]]:
+        """Rebuild the latest state of a partition, optionally up to a timestamp."""
+        state: PriceSnapshot = {}
+        last_timestamp = None
+        
+        for file_path in self._record_files(partition):
+            timestamp = int(file_path.name.split('.')[0])
+            if until is not None and timestamp > until:
+                break
+            record = self._read_record(file_path)
+            self._apply_record(state, record)
+            last_timestamp = timestamp
+        
+        return state, last_timestamp
+    
+    @staticmethod
+    def _apply_record(state: PriceSnapshot, record: Dict) -> None:
+        """Apply a keyframe or delta record to a snapshot state in place."""
+        if record['type'] == 'full':
+            state.clear()
+        for item_id, values in record['items'].items():
+            if values is None:
+                state.pop(int(item_id), None)
+            else:
+                state[int(item_id)] = tuple(values)
+    
+    def ingest(self, snapshot: PriceSnapshot, timestamp: int,
+               delta: Optional[SnapshotDelta] = None) -> Optional[Path]:
+        """
+        Append a snapshot to the history.
+        
+        A delta already computed against the previous snapshot can be
+        passed in to skip replaying the current partition. Returns the
+        written file, or None when nothing changed since the previous
+        snapshot of the same day.
+        """
+        partition = self.root / self._partition_name(timestamp)
+        last_timestamp = self._last_timestamp(partition)
+        
+        if last_timestamp is not None and timestamp <= last_timestamp:
+            raise ValueError(f"Snapshot at {timestamp} is not newer than {last_timestamp}")
+        
+        if last_timestamp is None:
+            record_type = 'full'
+            items = {str(item_id): list(values) for item_id, values in snapshot.items()}
+        else:
+            if delta is None:
+                previous, _ = self._replay_partition(partition)
+                delta = diff_snapshots(previous, snapshot)
+            if not delta:
+                logger.info(f"No price changes at {timestamp}, nothing to store")
+                return None
+            record_type, items = 'delta', delta.to_record()
+        
+        record = {
+            'timestamp': timestamp,
+            'type': record_type,
+            'fields': list(PRICE_FIELDS),
+            'items': items,
+        }
+        
+        partition.mkdir(parents=True, exist_ok=True)
+        file_path = partition / f"{timestamp}.json.gz"
+        tmp_path = file_path.with_suffix('.tmp')
+        with gzip.open(tmp_path, 'wt', encoding='utf-8',
+                       compresslevel=HISTORY_CONFIG['compress_level']) as f:
+            json.dump(record, f, separators=(',', ':'))
+        tmp_path.replace(file_path)
+        
+        logger.info(f"Stored {record_type} snapshot with {len(items)} items at {file_path}")
+        self._apply_retention(timestamp)
+        return file_path
+    
+    def _apply_retention(self, now: int) -> None:
+        """Drop partitions older than the configured retention window."""
+        retention_days = HISTORY_CONFIG.get('retention_days')
+        if not retention_days:
+            return
+        
+        cutoff = self._partition_name(now - retention_days * 86400)
+        for partition in self.partitions():
+            if partition.name < cutoff:
+                shutil.rmtree(partition)
+                logger.debug(f"Removed expired price history partition: {partition}")
+    
+    def iter_states(self, start: Optional[int] = None,
+                    end: Optional[int] = None) -> Iterator[Tuple[int, PriceSnapshot, Dict]]:
+        """
+        Replay the history between start and end (inclusive).
+        
+        Yields ``(timestamp, state, record)`` for every stored snapshot,
+        where state is the full snapshot at that time. The state object is
+        reused between iterations and must not be kept by the caller.
+        """
+        start_partition = self._partition_name(start) if start is not None else None
+        end_partition = self._partition_name(end) if end is not None else None
+        
+        for partition in self.partitions():
+            if start_partition and partition.name < start_partition:
+                continue
+            if end_partition and partition.name > end_partition:
+                break
+            
+            state: PriceSnapshot = {}
+            for file_path in self._record_files(partition):
+                timestamp = int(file_path.name.split('.')[0])
+                if end is not None and timestamp > end:
+                    return
+                record = self._read_record(file_path)
+                self._apply_record(state, record)
+                if start is None or timestamp >= start:
+                    yield timestamp, state, record
+    
+    def series(self, item_id: int, field: str = 'marketValue', start: Optional[int] = None,
+               end: Optional[int] = None) -> List[Tuple[int, Optional[int]]]:
+        """
+        Return ``(timestamp, value)`` points for one item and field.
+        
+        A point is emitted for the first snapshot in range and whenever the
+        value changes; None means the item was not listed at that time.
+        """
+        index = PRICE_FIELDS.index(field)
+        points = []
+        last_value = object()
+        
+        for timestamp, state, record in self.iter_states(start, end):
+            if points and record['type'] == 'delta' and str(item_id) not in record['items']:
+                continue
+            values = state.get(item_id)
+            value = values[index] if values is not None else None
+            if value != last_value:
+                points.append((timestamp, value))
+                last_value = value
+        
+        return points
+    
+    def snapshot_at(self, timestamp: int) -> PriceSnapshot:
+        """Return the most recent stored snapshot at or before timestamp."""
+        for partition in reversed(self.partitions()):
+            if partition.name > self._partition_name(timestamp):
+                continue
+            state, last_timestamp = self._replay_partition(partition, until=timestamp)
+            if last_timestamp is not None:
+                return state
+        return {}
+
+
+def main():
+    """Main function to ingest and query price history."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="WoW Classic SoD price history store")
+    parser.add_argument("--root", default=str(PRICE_HISTORY_DIR),
+                       help="Price history directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    ingest_parser = subparsers.add_parser("ingest", help="Store a horde.json snapshot")
+    ingest_parser.add_argument("snapshot_file", nargs="?", default=str(HORDE_FILE),
+                              help="Pricing snapshot to ingest")
+    ingest_parser.add_argument("--timestamp", type=int,
+                              help="Snapshot time as a Unix timestamp (default: horde_update.json)")
+    ingest_parser.add_argument("--previous",
+                              help="The last ingested snapshot file; stores its diff without replaying the day")
+    
+    series_parser = subparsers.add_parser("series", help="Print the price series of an item")
+    series_parser.add_argument("item_id", type=int, help="Item ID to query")
+    series_parser.add_argument("--field", default="marketValue", choices=PRICE_FIELDS,
+                              help="Price field to query")
+    series_parser.add_argument("--days", type=int, default=7,
+                              help="Number of days to look back")
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    store = PriceHistoryStore(Path(args.root))
+    
+    if args.command == "ingest":
+        timestamp = args.timestamp if args.timestamp is not None else snapshot_timestamp()
+        snapshot = load_snapshot(Path(args.snapshot_file))
+        delta = None
+        if args.previous and Path(args.previous).exists():
+            delta = diff_snapshots(load_snapshot(Path(args.previous)), snapshot)
+        store.ingest(snapshot, timestamp, delta)
+    else:
+        end = int(datetime.now(timezone.utc).timestamp())
+        start = end - int(timedelta(days=args.days).total_seconds())
+        for timestamp, value in store.series(args.item_id, args.field, start, end):
+            when = datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d %H:%M')
+            print(f"{when}  {value}")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,151 @@
+"""
+Incrementally maintained recipe profit table for WoW Classic SoD Recipe Calculator
+"""
+
+import heapq
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import PRICING_CONFIG
+from price_history import PRICE_FIELDS, PriceSnapshot, SnapshotDelta, diff_snapshots
+from utils import DataProcessor, JSONSerializer, PriceCalculator
+
+QUANTITY_POSITION = PRICE_FIELDS.index('quantity')
+AUCTIONS_POSITION = PRICE_FIELDS.index('numAuctions')
+
+logger = logging.getLogger(__name__)
+
+
+class ProfitTable:
+    """
+    Profit data for every recipe, priced from a horde.json snapshot.
+    
+    Keeps a reverse index from itemId to the recipes that use it as a
+    reagent or produce it, so applying a new snapshot only recomputes
+    the recipes touched by the items that actually changed.
+    """
+    
+    def __init__(self, recipes: List[Dict[str, Any]], materials_index: Dict[int, Dict[str, Any]],
+                 snapshot: PriceSnapshot, price_field: str = PRICING_CONFIG['price_field']):
+        self.recipes = {recipe['recipe_id']: recipe for recipe in recipes}
+        self.materials_index = materials_index
+        self.snapshot = snapshot
+        self.price_field = price_field
+        self._price_position = PRICE_FIELDS.index(price_field)
+        self.version = 0
+        
+        # itemId -> recipe_ids that use the item as a reagent or result
+        self.item_recipes: Dict[int, Set[int]] = {}
+        for recipe_id, recipe in self.recipes.items():
+            for material in recipe.get('materials', []):
+                self.item_recipes.setdefault(material['itemId'], set()).add(recipe_id)
+            self.item_recipes.setdefault(recipe.get('result_item_id'), set()).add(recipe_id)
+        
+        # Materials index with the current snapshot price merged in
+        self.priced_materials: Dict[int, Dict[str, Any]] = dict(materials_index)
+        for item_id in snapshot:
+            self._price_item(item_id)
+        
+        self.profits: Dict[int, Dict[str, Any]] = {
+            recipe_id: self._calculate(recipe) for recipe_id, recipe in self.recipes.items()
+        }
+    
+    def _price_item(self, item_id: int) -> None:
+        """Refresh the priced materials entry of one item from the snapshot."""
+        values = self.snapshot.get(item_id)
+        base = self.materials_index.get(item_id)
+        
+        if values is None:
+            if base is None:
+                self.priced_materials.pop(item_id, None)
+            else:
+                self.priced_materials[item_id] = base
+            return
+        
+        entry = dict(base) if base else {'itemId': item_id, 'name': 'Unknown'}
+        entry['price'] = values[self._price_position]
+        self.priced_materials[item_id] = entry
+    
+    def result_price(self, recipe: Dict[str, Any]) -> float:
+        """Return the current unit price of the item a recipe produces."""
+        values = self.snapshot.get(recipe.get('result_item_id'))
+        return values[self._price_position] if values else 0
+    
+    def _calculate(self, recipe: Dict[str, Any]) -> Dict[str, Any]:
+        """Calculate the profit data of one recipe at current prices, net of AH fees."""
+        profit_data = DataProcessor.calculate_recipe_profit(
+            recipe, self.priced_materials, self.result_price(recipe)
+        )
+        
+        result_value = profit_data['result_value']
+        fees = PriceCalculator.calculate_ah_fees(
+            result_value, PriceCalculator.estimate_deposit(result_value)
+        )
+        net_profit = fees['net_profit'] - profit_data['cost']
+        
+        # Crafts sold per hour, from the depth of the result item's market
+        values = self.snapshot.get(recipe.get('result_item_id'))
+        if values:
+            units_per_hour = PriceCalculator.estimate_sales_per_hour(
+                values[QUANTITY_POSITION], values[AUCTIONS_POSITION]
+            )
+        else:
+            units_per_hour = 0.0
+        sales_per_hour = units_per_hour / max(recipe.get('result_quantity', 1), 1)
+        
+        profit_data.update({
+            'ah_fees': fees['total_fees'],
+            'net_profit': net_profit,
+            'sales_per_hour': sales_per_hour,
+            'gold_per_hour': net_profit * sales_per_hour if net_profit > 0 else 0.0
+        })
+        return profit_data
+    
+    def get(self, recipe: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the profit data of a recipe, calculating it if it is unknown."""
+        profit_data = self.profits.get(recipe['recipe_id'])
+        if profit_data is None:
+            profit_data = self._calculate(recipe)
+        return profit_data
+    
+    def top_recipes(self, recipes: List[Dict[str, Any]], k: int = 20,
+                    rank_by: str = 'gold_per_hour') -> List[Dict[str, Any]]:
+        """Return the k best recipes by a profit data field in O(n log k)."""
+        profits = self.profits
+        return heapq.nlargest(
+            k, recipes, key=lambda recipe: profits[recipe['recipe_id']].get(rank_by, 0)
+        )
+    
+    def recipes_for_items(self, item_ids: Set[int]) -> Set[int]:
+        """Return the recipes that use or produce any of the given items."""
+        affected = set()
+        for item_id in item_ids:
+            affected |= self.item_recipes.get(item_id, set())
+        return affected
+    
+    def apply_snapshot(self, snapshot: PriceSnapshot,
+                       delta: Optional[SnapshotDelta] = None) -> Tuple[SnapshotDelta, Set[int]]:
+        """
+        Move the table to a new snapshot, recomputing only affected recipes.
+        
+        Returns the snapshot delta and the ids of the recomputed recipes.
+        """
+        if delta is None:
+            delta = diff_snapshots(self.snapshot, snapshot)
+        self.snapshot = snapshot
+        
+        if not delta:
+            return delta, set()
+        
+        for item_id in delta.item_ids:
+            self._price_item(item_id)
+        
+        affected = self.recipes_for_items(delta.item_ids)
+        for recipe_id in affected:
+            JSONSerializer.discard(self.profits.get(recipe_id))
+            self.profits[recipe_id] = self._calculate(self.recipes[recipe_id])
+        
+        self.version += 1
+        logger.info(f"Applied price snapshot v{self.version}: {len(delta)} items changed, "
+                    f"{len(affected)} recipes recomputed")
+        return delta, affected
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Multi-realm price storage for WoW Classic SoD Recipe Calculator
+Holds one compact price vector per realm and faction, aligned to a shared item index.
+"""
+
+import json
+import logging
+from array import array
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import REALMS_CONFIG, REALMS_DIR
+from price_history import PRICE_FIELDS, PriceSnapshot, load_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Value stored in every field of an item a realm has no price for
+MISSING = -1
+
+
+class ItemIndex:
+    """Append-only mapping of itemId to a column position shared by every realm."""
+    
+    def __init__(self):
+        self.positions: Dict[int, int] = {}
+        self.item_ids: List[int] = []
+    
+    def __len__(self) -> int:
+        return len(self.item_ids)
+    
+    def add(self, item_id: int) -> int:
+        """Return the position of an item, assigning the next free one if it is new."""
+        position = self.positions.get(item_id)
+        if position is None:
+            position = self.positions[item_id] = len(self.item_ids)
+            self.item_ids.append(item_id)
+        return position
+
+
+class RealmSnapshot(Mapping):
+    """
+    Read-only PriceSnapshot view over one realm's price vector.
+    
+    Behaves like the itemId -> values dict that load_snapshot returns,
+    so ProfitTable and diff_snapshots accept it unchanged, but the
+    values stay packed in a single array until an item is looked up.
+    """
+    
+    def __init__(self, item_index: ItemIndex, values: array, count: int):
+        self.item_index = item_index
+        self.values = values
+        self.count = count
+    
+    def _row(self, item_id: int) -> Optional[Tuple[int, ...]]:
+        position = self.item_index.positions.get(item_id)
+        if position is None:
+            return None
+        start = position * len(PRICE_FIELDS)
+        # Items added to the index after this vector was built are past its end
+        if start >= len(self.values) or self.values[start] == MISSING:
+            return None
+        return tuple(self.values[start:start + len(PRICE_FIELDS)])
+    
+    def __getitem__(self, item_id: int) -> Tuple[int, ...]:
+        row = self._row(item_id)
+        if row is None:
+            raise KeyError(item_id)
+        return row
+    
+    def get(self, item_id, default=None):
+        row = self._row(item_id)
+        return default if row is None else row
+    
+    def __contains__(self, item_id) -> bool:
+        return self._row(item_id) is not None
+    
+    def __iter__(self) -> Iterator[int]:
+        width = len(PRICE_FIELDS)
+        values = self.values
+        for position, item_id in enumerate(self.item_index.item_ids):
+            start = position * width
+            if start >= len(values):
+                return
+            if values[start] != MISSING:
+                yield item_id
+    
+    def __len__(self) -> int:
+        return self.count
+
+
+class RealmPrices:
+    """
+    Price snapshots of many realms and factions side by side.
+    
+    Every realm is one array of 64-bit integers, len(PRICE_FIELDS)
+    values per item, in the order of a single ItemIndex shared by all
+    realms. Adding a realm costs a few bytes per item it prices instead
+    of a dict of tuples per realm.
+    """
+    
+    def __init__(self):
+        self.item_index = ItemIndex()
+        self._values: Dict[str, array] = {}
+        self._counts: Dict[str, int] = {}
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._values
+    
+    def keys(self) -> List[str]:
+        return sorted(self._values)
+    
+    def put(self, key: str, snapshot: PriceSnapshot) -> bool:
+        """Store or replace a realm's prices; returns whether they changed."""
+        width = len(PRICE_FIELDS)
+        for item_id in snapshot:
+            self.item_index.add(item_id)
+        
+        values = array('q', [MISSING]) * (len(self.item_index) * width)
+        positions = self.item_index.positions
+        for item_id, row in snapshot.items():
+            start = positions[item_id] * width
+            values[start:start + width] = array('q', row)
+        
+        previous = self._values.get(key)
+        self._values[key] = values
+        self._counts[key] = len(snapshot)
+        # Trailing missing items do not count as a change after the index grew
+        return previous is None or values[:len(previous)] != previous or \
+            any(value != MISSING for value in values[len(previous)::width])
+    
+    def copy(self) -> 'RealmPrices':
+        """
+        Return a RealmPrices holding the same realms.
+        
+        The vectors and the append-only item index are shared; put and
+        remove replace vectors rather than modify them, so neither copy
+        sees the other's changes except for new index entries.
+        """
+        other = RealmPrices()
+        other.item_index = self.item_index
+        other._values = dict(self._values)
+        other._counts = dict(self._counts)
+        return other
+    
+    def remove(self, key: str) -> None:
+        self._values.pop(key, None)
+        self._counts.pop(key, None)
+    
+    def snapshot(self, key: str) -> RealmSnapshot:
+        """Return a realm's prices as a PriceSnapshot mapping."""
+        return RealmSnapshot(self.item_index, self._values[key], self._counts[key])
+    
+    def column(self, key: str, field_name: str) -> array:
+        """Return one field of a realm for every indexed item, MISSING where it has no price."""
+        # Unpriced items are MISSING in every field, so a strided slice is the column
+        column = self._values[key][PRICE_FIELDS.index(field_name)::len(PRICE_FIELDS)]
+        column.extend(array('q', [MISSING]) * (len(self.item_index) - len(column)))
+        return column
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return the priced item count and vector size of every realm."""
+        return {
+            key: {'items': self._counts[key], 'bytes': len(self._values[key]) * self._values[key].itemsize}
+            for key in self.keys()
+        }
+
+
+def load_realm_files(prices: RealmPrices, directory: Path = REALMS_DIR) -> List[str]:
+    """Load every <realm>-<faction>.json file in directory; returns the keys that changed."""
+    changed = []
+    if not Path(directory).exists():
+        return changed
+    
+    found = set()
+    for file_path in sorted(Path(directory).glob('*.json')):
+        key = file_path.stem
+        try:
+            snapshot = load_snapshot(file_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable realm prices {file_path}: {e}")
+            continue
+        found.add(key)
+        if prices.put(key, snapshot):
+            changed.append(key)
+    
+    for key in set(prices.keys()) - found:
+        prices.remove(key)
+        changed.append(key)
+    
+    if changed:
+        logger.info(f"Loaded prices for {len(found)} realms ({len(changed)} changed, "
+                    f"{len(prices.item_index)} items indexed)")
+    return changed
+
+
+def fetch_realms(sources: Dict[str, str] = REALMS_CONFIG['sources'],
+                 directory: Path = REALMS_DIR) -> List[Path]:
+    """Download the pricing file of every configured realm into directory."""
+    import requests
+    
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    written = []
+    for key, url in sources.items():
+        try:
+            response = requests.get(url, timeout=60)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"Could not fetch prices for {key} from {url}: {e}")
+            continue
+        
+        file_path = directory / f"{key}.json"
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        written.append(file_path)
+        logger.info(f"Fetched prices for {key}")
+    return written
+
+
+def main():
+    """Main function to manage realm price files."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="WoW Classic SoD multi-realm prices")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    fetch_parser = subparsers.add_parser("fetch", help="Download every realm in REALMS_CONFIG['sources']")
+    fetch_parser.add_argument("--dir", default=str(REALMS_DIR), help="Realm price directory")
+    
+    list_parser = subparsers.add_parser("list", help="Show the stored realms and their memory use")
+    list_parser.add_argument("--dir", default=str(REALMS_DIR), help="Realm price directory")
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    
+    if args.command == "fetch":
+        written = fetch_realms(directory=Path(args.dir))
+        return 0 if len(written) == len(REALMS_CONFIG['sources']) else 1
+    
+    prices = RealmPrices()
+    load_realm_files(prices, Path(args.dir))
+    for key, stats in prices.stats().items():
+        print(f"{key:<32} {stats['items']:>7} items {stats['bytes'] / 1024:>8.1f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
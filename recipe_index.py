@@ -0,0 +1,168 @@
+"""
+Recipe listing index for WoW Classic SoD Recipe Calculator
+Presorted recipe orders and bitmap filters, so a listing query does no sorting.
+"""
+
+import bisect
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils import DataProcessor, PROFIT_SORT_KEYS
+
+logger = logging.getLogger(__name__)
+
+# Sort keys read from the recipe itself, with the default DataProcessor.sort_recipes uses
+STATIC_SORT_KEYS = {'name': '', 'skill_level': 0, 'profession': ''}
+
+# Profit orders kept, across every profit table and sort key
+MAX_PROFIT_ORDERS = 64
+
+# Bit positions set in each byte value, for listing the members of a bitmap
+BYTE_POSITIONS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+class RecipeIndex:
+    """
+    Recipe positions as bitmaps, and recipe orders as presorted permutations.
+    
+    A bitmap is a Python int with bit i set for the recipe at position i
+    of the recipe list. Profession and skill filters become ANDs of
+    precomputed bitmaps. Each sort order is a permutation of positions,
+    built once and stable like sorted(), so the recipes that pass a
+    filter keep the same relative order they would get from
+    DataProcessor.filter_recipes and sort_recipes. Orders by a profit
+    field are rebuilt when the profit table's version changes.
+    """
+    
+    def __init__(self, recipes: List[Dict[str, Any]]):
+        self.recipes = recipes
+        self.size = len(recipes)
+        self.all_bits = (1 << self.size) - 1
+        
+        # Lower-cased profession -> bitmap
+        self.professions: Dict[str, int] = {}
+        # Distinct skill levels, and for each the bitmap of recipes at or below it
+        by_skill: Dict[int, int] = {}
+        for position, recipe in enumerate(recipes):
+            bit = 1 << position
+            profession = recipe.get('profession', '').lower()
+            self.professions[profession] = self.professions.get(profession, 0) | bit
+            skill_level = recipe.get('skill_level', 0)
+            by_skill[skill_level] = by_skill.get(skill_level, 0) | bit
+        
+        self.skill_levels = sorted(by_skill)
+        self.skill_at_most: List[int] = []
+        cumulative = 0
+        for skill_level in self.skill_levels:
+            cumulative |= by_skill[skill_level]
+            self.skill_at_most.append(cumulative)
+        
+        # (sort_by, reverse) -> (order, rank); profit orders also keep the table they were built from
+        self._orders: Dict[Tuple[str, bool], Tuple[List[int], List[int]]] = {}
+        self._profit_orders: Dict[Tuple[int, str, bool], Tuple[Any, int, List[int], List[int]]] = {}
+        # Request threads share the index; guards lookups, inserts and evictions of profit orders
+        self._profit_orders_lock = threading.Lock()
+    
+    def _at_most(self, skill_level: int) -> int:
+        """Return the bitmap of recipes with a skill level at or below skill_level."""
+        index = bisect.bisect_right(self.skill_levels, skill_level) - 1
+        return self.skill_at_most[index] if index >= 0 else 0
+    
+    def match(self, filters: Dict[str, Any]) -> int:
+        """Return the bitmap of recipes passing the profession and skill filters."""
+        bits = self.all_bits
+        if filters.get('profession'):
+            bits &= self.professions.get(filters['profession'].lower(), 0)
+        if filters.get('min_skill') is not None:
+            bits &= ~self._at_most(int(filters['min_skill']) - 1)
+        if filters.get('max_skill') is not None:
+            bits &= self._at_most(int(filters['max_skill']))
+        return bits
+    
+    def _sort(self, key, reverse: bool) -> Tuple[List[int], List[int]]:
+        order = sorted(range(self.size), key=key, reverse=reverse)
+        rank = [0] * self.size
+        for index, position in enumerate(order):
+            rank[position] = index
+        return order, rank
+    
+    def order(self, sort_by: Optional[str], reverse: bool = False,
+              profits: Optional[Dict[int, Dict[str, Any]]] = None,
+              version: int = 0) -> Tuple[List[int], List[int]]:
+        """
+        Return the presorted positions for a sort key, and each position's rank in it.
+        
+        Profit orders are cached per profits mapping and rebuilt when version changes.
+        """
+        if sort_by in PROFIT_SORT_KEYS and profits is not None:
+            cache_key = (id(profits), sort_by, reverse)
+            with self._profit_orders_lock:
+                cached = self._profit_orders.get(cache_key)
+            if cached is None or cached[0] is not profits or cached[1] != version:
+                # Sorted outside the lock; a concurrent request may build the same order
+                recipes = self.recipes
+                order, rank = self._sort(
+                    lambda p: profits.get(recipes[p]['recipe_id'], {}).get(sort_by, 0), reverse
+                )
+                cached = (profits, version, order, rank)
+                with self._profit_orders_lock:
+                    self._profit_orders[cache_key] = cached
+                    # Orders of profit tables that were dropped would otherwise pile up
+                    while len(self._profit_orders) > MAX_PROFIT_ORDERS:
+                        del self._profit_orders[next(iter(self._profit_orders))]
+            return cached[2], cached[3]
+        
+        if sort_by not in STATIC_SORT_KEYS:
+            sort_by, reverse = None, False
+        cached = self._orders.get((sort_by, reverse))
+        if cached is None:
+            if sort_by is None:
+                cached = (list(range(self.size)), list(range(self.size)))
+            else:
+                recipes = self.recipes
+                default = STATIC_SORT_KEYS[sort_by]
+                cached = self._sort(lambda p: recipes[p].get(sort_by, default), reverse)
+            self._orders[(sort_by, reverse)] = cached
+        return cached
+    
+    def positions(self, bits: int) -> List[int]:
+        """Return the positions set in a bitmap, in ascending order."""
+        positions = []
+        for byte_index, value in enumerate(bits.to_bytes((self.size + 7) // 8, 'little')):
+            if value:
+                base = byte_index * 8
+                positions.extend(base + bit for bit in BYTE_POSITIONS[value])
+        return positions
+    
+    def select(self, filters: Dict[str, Any], sort_by: Optional[str] = None, sort_order: str = 'asc',
+               profits: Optional[Dict[int, Dict[str, Any]]] = None,
+               version: int = 0) -> List[Dict[str, Any]]:
+        """
+        Filter and sort recipes like DataProcessor.filter_recipes followed by sort_recipes.
+        
+        Few matches are sorted by their precomputed rank; many are read
+        off the presorted order. Search and minimum profit filters are
+        checked on the recipes that pass the bitmap filters.
+        Without profits, profit sort keys keep the recipe list order.
+        """
+        bits = self.match(filters)
+        if not bits:
+            return []
+        order, rank = self.order(sort_by, sort_order.lower() == 'desc', profits, version)
+        
+        matched = bits.bit_count() if hasattr(bits, 'bit_count') else bin(bits).count('1')
+        if matched * 8 < self.size:
+            positions = sorted(self.positions(bits), key=rank.__getitem__)
+        elif bits == self.all_bits:
+            positions = order
+        else:
+            flags = bits.to_bytes((self.size + 7) // 8, 'little')
+            positions = [p for p in order if flags[p >> 3] >> (p & 7) & 1]
+        
+        recipes = [self.recipes[position] for position in positions]
+        
+        residual = {key: filters[key] for key in ('min_profit', 'search') if key in filters}
+        if residual:
+            recipes = DataProcessor.filter_recipes(recipes, residual, profits)
+        return recipes
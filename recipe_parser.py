@@ -0,0 +1,169 @@
+"""
+Recipe page parser for WoW Classic SoD Recipe Calculator
+Turns the HTML of a Wowhead recipe page into RecipeData, independent of how it was fetched.
+"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RecipeData:
+    """Data class for recipe information."""
+    recipe_id: int
+    name: str
+    profession: str
+    skill_level: int
+    icon_name: str
+    materials: List[Dict[str, int]]
+    result_item_id: int
+    result_quantity: int
+    url: str
+    scraped_at: str
+
+
+def extract_recipe_id(url: str) -> int:
+    """Extract recipe ID from URL."""
+    match = re.search(r"spell=(\d+)", url)
+    if not match:
+        raise ValueError(f"Could not extract recipe ID from URL: {url}")
+    return int(match.group(1))
+
+
+def extract_recipe_name(soup: BeautifulSoup) -> str:
+    """Extract recipe name from page."""
+    name_tag = soup.find("h1", class_="heading-size-1")
+    if not name_tag:
+        raise ValueError("Could not find recipe name")
+    return name_tag.text.strip()
+
+
+def extract_icon_name(soup: BeautifulSoup) -> str:
+    """Extract icon name from page."""
+    icon_li = soup.select_one("li.icon-db-link ins[style]")
+    if not icon_li or "background-image" not in icon_li.get("style", ""):
+        return ""
+    
+    match = re.search(r'url\(["\']?(.*?)["\']?\)', icon_li["style"])
+    if match:
+        icon_url = match.group(1)
+        return icon_url.split("/")[-1].split(".")[0]
+    return ""
+
+
+def extract_profession(soup: BeautifulSoup) -> str:
+    """Extract profession from breadcrumb navigation."""
+    breadcrumb = soup.select_one("div.breadcrumb")
+    if not breadcrumb:
+        return "Unknown"
+    
+    links = breadcrumb.find_all("a")
+    if links:
+        return links[-1].text.strip()
+    return "Unknown"
+
+
+def extract_skill_level(soup: BeautifulSoup) -> int:
+    """Extract required skill level."""
+    skill_divs = soup.find_all("div", attrs={"data-markup-content-target": "1"})
+    for div in skill_divs:
+        text = div.get_text(strip=True)
+        match = re.search(r"Requires .*?\((\d+)\)", text)
+        if match:
+            return int(match.group(1))
+    return 0  # Default to 0 if not found
+
+
+def extract_materials(soup: BeautifulSoup, recipe_id: int) -> List[Dict[str, int]]:
+    """Extract materials from recipe tooltip."""
+    materials = []
+    tooltip_div = soup.select_one(f"div#tt{recipe_id}")
+    
+    if not tooltip_div:
+        logger.warning(f"No tooltip found for recipe {recipe_id}")
+        return materials
+    
+    reagents_label = tooltip_div.find(string=re.compile(r"Reagents:"))
+    if not reagents_label:
+        return materials
+    
+    reagents_div = reagents_label.find_next("div", class_="indent q1")
+    if not reagents_div:
+        return materials
+    
+    reagent_text = reagents_div.get_text(separator=" ", strip=True)
+    links = reagents_div.find_all("a")
+    
+    for link in links:
+        href = link.get("href", "")
+        item_id_match = re.search(r"item=(\d+)", href)
+        if item_id_match:
+            item_id = int(item_id_match.group(1))
+            material_name = link.text.strip()
+            
+            # Extract quantity
+            quantity_match = re.search(
+                re.escape(material_name) + r"\s*\((\d+)\)", reagent_text
+            )
+            quantity = int(quantity_match.group(1)) if quantity_match else 1
+            
+            materials.append({"itemId": item_id, "quantity": quantity})
+    
+    return materials
+
+
+def extract_result_item(soup: BeautifulSoup, recipe_id: int) -> Tuple[int, int]:
+    """Extract result item ID and quantity."""
+    tooltip_div = soup.select_one(f"div#tt{recipe_id}")
+    if not tooltip_div:
+        return 0, 1
+    
+    item_links = tooltip_div.select("a[href*='/item=']")
+    if not item_links:
+        return 0, 1
+    
+    # Get the last item link (usually the result)
+    item_link = item_links[-1]
+    item_id_match = re.search(r"item=(\d+)", item_link["href"])
+    if item_id_match:
+        result_item_id = int(item_id_match.group(1))
+        
+        # Try to extract quantity from the link text
+        link_text = item_link.text.strip()
+        quantity_match = re.search(r"\((\d+)\)", link_text)
+        result_quantity = int(quantity_match.group(1)) if quantity_match else 1
+        
+        return result_item_id, result_quantity
+    
+    return 0, 1
+
+
+def parse_recipe(url: str, html: str) -> RecipeData:
+    """
+    Parse a recipe page into RecipeData.
+    
+    A plain module-level function, so a process pool can run it away
+    from the event loop or browser that fetched the page.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    recipe_id = extract_recipe_id(url)
+    result_item_id, result_quantity = extract_result_item(soup, recipe_id)
+    return RecipeData(
+        recipe_id=recipe_id,
+        name=extract_recipe_name(soup),
+        profession=extract_profession(soup),
+        skill_level=extract_skill_level(soup),
+        icon_name=extract_icon_name(soup),
+        materials=extract_materials(soup, recipe_id),
+        result_item_id=result_item_id,
+        result_quantity=result_quantity,
+        url=url,
+        scraped_at=time.strftime("%Y-%m-%d %H:%M:%S")
+    )
@@ -0,0 +1,92 @@
+"""
+API response cache for WoW Classic SoD Recipe Calculator
+Serves repeated dashboard polls from memory instead of re-running the profit pipeline.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from config import CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized response bodies.
+    
+    Keys combine the request path, the normalized query parameters and
+    the data version, so a response computed from stale data can never
+    be served once the data has been reloaded. Entries are evicted
+    least recently used first when either the entry or byte bound is hit.
+    """
+    
+    def __init__(self, max_entries: int = CACHE_CONFIG['max_entries'],
+                 max_bytes: int = CACHE_CONFIG['max_bytes']):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def make_key(path: str, args: Iterable[Tuple[str, str]], version: Any) -> Tuple:
+        """Build a cache key that ignores query parameter order and empty values."""
+        params = tuple(sorted((name, value) for name, value in args if value != ''))
+        return path, params, version
+    
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Return a cached body and mark it recently used, or None on a miss."""
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+    
+    def put(self, key: Hashable, body: bytes) -> None:
+        """Cache a body, evicting least recently used entries to stay in bounds."""
+        if len(body) > self.max_bytes:
+            return
+        
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            
+            self._entries[key] = body
+            self._size += len(body)
+            
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        """Drop every cached response, e.g. after a data reload."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.invalidations += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit and miss counters and the current cache size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
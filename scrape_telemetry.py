@@ -0,0 +1,110 @@
+"""
+Scraper telemetry for WoW Classic SoD Recipe Calculator
+Writes one JSONL record per scraped URL and an end-of-run summary.
+"""
+
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PageRecord:
+    """Timing and outcome of scraping one URL, summed over its attempts."""
+    url: str
+    success: bool
+    fetch_seconds: float = 0.0
+    parse_seconds: float = 0.0
+    elapsed_seconds: float = 0.0  # including retry back-off
+    retries: int = 0
+    bytes: int = 0
+    error_class: Optional[str] = None
+    error: Optional[str] = None
+    
+    @property
+    def page_seconds(self) -> float:
+        return self.fetch_seconds + self.parse_seconds
+
+
+def summarize(records: List[PageRecord], wall_seconds: float, slowest: int = 5) -> Dict[str, Any]:
+    """Return throughput, page time percentiles, slowest pages and failures by class."""
+    page_times = sorted(record.page_seconds for record in records)
+    
+    def percentile(fraction: float) -> float:
+        if not page_times:
+            return 0.0
+        return page_times[min(len(page_times) - 1, int(len(page_times) * fraction))]
+    
+    errors: Dict[str, int] = {}
+    for record in records:
+        if not record.success:
+            errors[record.error_class or 'NoData'] = errors.get(record.error_class or 'NoData', 0) + 1
+    
+    return {
+        'urls': len(records),
+        'successful': sum(1 for record in records if record.success),
+        'failed': sum(1 for record in records if not record.success),
+        'wall_seconds': round(wall_seconds, 3),
+        'urls_per_minute': round(len(records) / wall_seconds * 60, 2) if wall_seconds else 0.0,
+        'p50_page_seconds': round(percentile(0.50), 3),
+        'p95_page_seconds': round(percentile(0.95), 3),
+        'total_bytes': sum(record.bytes for record in records),
+        'total_retries': sum(record.retries for record in records),
+        'errors': errors,
+        'slowest': [
+            {'url': record.url, 'page_seconds': round(record.page_seconds, 3)}
+            for record in sorted(records, key=lambda r: r.page_seconds, reverse=True)[:slowest]
+        ]
+    }
+
+
+class ScrapeTelemetry:
+    """
+    Streams PageRecords to a JSONL file as they complete.
+    
+    Each line is {"type": "page", ...}; close() appends one
+    {"type": "summary", ...} line, so an interrupted run still leaves
+    every finished page on disk.
+    """
+    
+    def __init__(self, file_path: Optional[Path] = None):
+        self.file_path = Path(file_path) if file_path else None
+        self.records: List[PageRecord] = []
+        self.started = time.perf_counter()
+        self._file = None
+        if self.file_path:
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.file_path, 'a', encoding='utf-8')
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def record(self, page: PageRecord) -> None:
+        """Keep a page record and append it to the telemetry file."""
+        self.records.append(page)
+        if self._file:
+            self._write({'type': 'page', 'ts': round(time.time(), 3), **asdict(page)})
+    
+    def summary(self) -> Dict[str, Any]:
+        return summarize(self.records, time.perf_counter() - self.started)
+    
+    def close(self) -> Dict[str, Any]:
+        """Write the run summary and close the file; returns the summary."""
+        summary = self.summary()
+        if self._file:
+            self._write({'type': 'summary', 'ts': round(time.time(), 3), **summary})
+            self._file.close()
+            self._file = None
+        return summary
+    
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
@@ -5,14 +5,37 @@ Simple Flask web server for WoW Classic SoD Recipe Calculator
 
 import json
 import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import nullcontext
+from functools import wraps
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterable, Iterator, List, Any, Optional
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, g, has_request_context, request, send_from_directory
 from flask_cors import CORS
 
-from config import WEB_CONFIG, PROJECT_ROOT
-from utils import DataLoader, DataProcessor, DataValidator, PriceCalculator
+from arbitrage import OPPORTUNITY_TYPES, load_vendor_prices, scan as scan_arbitrage
+from config import (
+    WEB_CONFIG, ARBITRAGE_CONFIG, CACHE_CONFIG, DATABASE_CONFIG, LEVELING_CONFIG, METRICS_CONFIG, REALMS_CONFIG,
+    PROJECT_ROOT, HORDE_FILE
+)
+from database import RecipeDatabase
+from events import EventBroadcaster
+from leveling import LevelingPlanner
+from metrics import MetricsRegistry, RequestTimer, StackSampler, write_profile
+from price_analytics import PriceAnalytics
+from planner import CraftPlanner
+from price_history import PriceHistoryStore, load_snapshot, snapshot_timestamp
+from profit_table import ProfitTable
+from realm_prices import RealmPrices, load_realm_files
+from recipe_index import RecipeIndex
+from response_cache import ResponseCache
+from utils import (
+    DataLoader, DataProcessor, DataValidator, PriceCalculator, JSONSerializer, PROFIT_SORT_KEYS
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,18 +48,411 @@ CORS(app)  # Enable CORS for all routes
 # Global data cache
 recipes_cache = []
 materials_cache = {}
+profit_table = ProfitTable([], {}, {})
+smoothed_profit_table = ProfitTable([], {}, {})
+price_analytics = PriceAnalytics()
+recipe_database: Optional[RecipeDatabase] = None
+# Prices of other realms and factions, and the profit tables built from the recently used ones
+realm_prices = RealmPrices()
+realm_tables: 'OrderedDict[str, ProfitTable]' = OrderedDict()
+realm_tables_lock = threading.Lock()
+# Serializes price reloads so each delta is diffed and applied exactly once everywhere
+price_reload_lock = threading.Lock()
+# Every ranked arbitrage opportunity, rescanned whenever prices change
+arbitrage_results: List[Dict[str, Any]] = []
+# Presorted orders and filter bitmaps over recipes_cache
+recipe_index: Optional[RecipeIndex] = None
+# Profit table -> (table version, planner), so memoized steps survive between requests;
+# weakly keyed so planners go away with evicted realm tables
+leveling_planners: 'weakref.WeakKeyDictionary[ProfitTable, tuple]' = weakref.WeakKeyDictionary()
+
+# Cached response bodies, keyed by query and data version
+response_cache = ResponseCache()
+data_version = 0
+
+# Subscribers to live profit updates
+profit_events = EventBroadcaster()
+
+# Profit data fields pushed to event subscribers; material breakdowns are left out
+EVENT_PROFIT_FIELDS = ('cost', 'result_value', 'profit', 'profit_margin', 'roi',
+                       'net_profit', 'sales_per_hour', 'gold_per_hour')
+
+# Set while load_data runs in the background; data endpoints answer 503 until it clears
+data_loading = threading.Event()
+data_load_error: Optional[str] = None
+
+# Request durations by endpoint, and by processing stage
+request_metrics = MetricsRegistry()
+
+# Open JSONL file that API requests are recorded to for replay by loadtest.py
+request_log = None
+request_log_lock = threading.Lock()
+
+
+def load_price_snapshot() -> Dict[int, tuple]:
+    """Load the current horde.json pricing snapshot."""
+    if not HORDE_FILE.exists():
+        logger.warning(f"Pricing file not found: {HORDE_FILE}")
+        return {}
+    return load_snapshot(HORDE_FILE)
 
 
 def load_data():
     """Load data into cache."""
-    global recipes_cache, materials_cache
+    global recipes_cache, materials_cache, profit_table, smoothed_profit_table, price_analytics
+    global recipe_database, data_load_error
     
     try:
         recipes_cache = DataLoader.load_recipes_data()
         materials_cache = DataLoader.load_materials_data()
-        logger.info(f"Loaded {len(recipes_cache)} recipes and {len(materials_cache)} materials")
+        JSONSerializer.clear_cache()
+        
+        snapshot = load_price_snapshot()
+        timestamp = snapshot_timestamp()
+        price_analytics = PriceAnalytics.from_history(
+            PriceHistoryStore(), start=timestamp - price_analytics.window_seconds
+        )
+        price_analytics.apply_snapshot(snapshot, max(timestamp, price_analytics.updated_at or 0))
+        
+        profit_table = ProfitTable(recipes_cache, materials_cache, snapshot)
+        get_recipe_index()
+        
+        if DATABASE_CONFIG['enabled']:
+            recipe_database = recipe_database or RecipeDatabase()
+            recipe_database.upsert_recipes(recipes_cache)
+            recipe_database.upsert_items(materials_cache)
+            recipe_database.sync_prices(snapshot)
+        smoothed_profit_table = ProfitTable(
+            recipes_cache, materials_cache, price_analytics.smoothed_snapshot(snapshot)
+        )
+        with realm_tables_lock:
+            load_realm_files(realm_prices)
+            realm_tables.clear()
+        refresh_arbitrage()
+        invalidate_responses()
+        logger.info(f"Loaded {len(recipes_cache)} recipes, {len(materials_cache)} materials "
+                    f"and {len(profit_table.snapshot)} prices")
+        data_load_error = None
     except Exception as e:
         logger.error(f"Error loading data: {e}")
+        data_load_error = str(e)
+
+
+def load_data_in_background() -> threading.Thread:
+    """Run load_data in a daemon thread, so the server can start answering at once."""
+    data_loading.set()
+    
+    def run():
+        started = time.perf_counter()
+        try:
+            load_data()
+        finally:
+            data_loading.clear()
+        logger.info(f"Data loaded in background in {time.perf_counter() - started:.2f}s")
+    
+    thread = threading.Thread(target=run, name='load-data', daemon=True)
+    thread.start()
+    return thread
+
+
+def reload_prices() -> Dict[str, Any]:
+    """Apply the current horde.json to the profit tables, recomputing only changed recipes."""
+    with price_reload_lock:
+        snapshot = load_price_snapshot()
+        delta, affected = profit_table.apply_snapshot(snapshot)
+        if recipe_database is not None:
+            recipe_database.sync_prices(snapshot, delta)
+        price_analytics.apply_delta(delta, max(snapshot_timestamp(), price_analytics.updated_at or 0))
+        smoothed, smoothed_delta = price_analytics.update_smoothed(
+            smoothed_profit_table.snapshot, snapshot, delta.item_ids
+        )
+        _, smoothed_affected = smoothed_profit_table.apply_snapshot(smoothed, smoothed_delta)
+        
+        with realm_tables_lock:
+            changed_realms = load_realm_files(realm_prices)
+            for key in changed_realms:
+                realm_tables.pop(key, None)
+        
+        if delta or changed_realms:
+            refresh_arbitrage()
+        if delta or changed_realms or smoothed_affected:
+            invalidate_responses()
+        
+        publish_profits('profits', profit_table, affected)
+        publish_profits('smoothed_profits', smoothed_profit_table, smoothed_affected)
+        return {
+            'changed_items': len(delta.changed),
+            'removed_items': len(delta.removed),
+            'recomputed_recipes': len(affected),
+            'price_version': profit_table.version,
+            'changed_realms': changed_realms
+        }
+
+
+def refresh_arbitrage() -> None:
+    """Rescan every realm, horde.json and the vendor prices for arbitrage."""
+    global arbitrage_results
+    prices = realm_prices.copy()
+    prices.put(REALMS_CONFIG['default'], profit_table.snapshot)
+    names = {item_id: item.get('name', 'Unknown') for item_id, item in materials_cache.items()}
+    arbitrage_results = scan_arbitrage(prices, profit_table, names, load_vendor_prices())
+
+
+def publish_profits(event_type: str, table: ProfitTable, recipe_ids: set) -> None:
+    """Push the changed profits of a table to event subscribers."""
+    if not recipe_ids:
+        return
+    profit_events.publish(event_type, {
+        'price_version': table.version,
+        'profits': {
+            recipe_id: {key: table.profits[recipe_id].get(key) for key in EVENT_PROFIT_FIELDS}
+            for recipe_id in recipe_ids
+        }
+    })
+
+
+def invalidate_responses() -> None:
+    """Move to a new data version and drop every cached response."""
+    global data_version
+    data_version += 1
+    response_cache.clear()
+
+
+def cached_response(view):
+    """Serve successful responses of a GET endpoint from the response cache."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not CACHE_CONFIG['enabled']:
+            return view(*args, **kwargs)
+        
+        # Read the version first so a response built during a reload is stored under the old one
+        key = ResponseCache.make_key(request.path, request.args.items(multi=True), data_version)
+        with timed_stage('cache'):
+            body = response_cache.get(key)
+        if body is not None:
+            response = Response(body, mimetype='application/json')
+            response.headers['X-Cache'] = 'HIT'
+            return response
+        
+        result = view(*args, **kwargs)
+        if isinstance(result, Response) and result.status_code == 200:
+            response_cache.put(key, result.get_data())
+            result.headers['X-Cache'] = 'MISS'
+        return result
+    return wrapper
+
+
+def timed_stage(name: str):
+    """Time a block as a named stage of the current request, when metrics are enabled."""
+    if has_request_context() and 'timer' in g:
+        return g.timer.stage(name)
+    return nullcontext()
+
+
+def get_realm_table(key: str) -> Optional[ProfitTable]:
+    """Return the profit table of another realm, building it from its price vector if needed.
+    
+    Returns None if the realm has no prices loaded. Realms are only
+    added and removed under realm_tables_lock, so the check and the
+    build see the same prices.
+    """
+    with realm_tables_lock:
+        if key not in realm_prices:
+            return None
+        table = realm_tables.get(key)
+        if table is None:
+            table = ProfitTable(recipes_cache, materials_cache, realm_prices.snapshot(key))
+            realm_tables[key] = table
+            while len(realm_tables) > REALMS_CONFIG['max_tables']:
+                realm_tables.popitem(last=False)
+        else:
+            realm_tables.move_to_end(key)
+        return table
+
+
+def get_profit_table() -> ProfitTable:
+    """Return the profit table selected by the 'realm' and 'prices' query parameters."""
+    if 'realm_table' in g:
+        return g.realm_table
+    realm = request.args.get('realm')
+    if realm and realm != REALMS_CONFIG['default']:
+        table = get_realm_table(realm)
+        if table is None:
+            raise KeyError(f"Unknown realm '{realm}'")
+        return table
+    if request.args.get('prices') == 'smoothed':
+        return smoothed_profit_table
+    return profit_table
+
+
+def get_leveling_planner(table: ProfitTable) -> LevelingPlanner:
+    """Return the levelling planner for a profit table, rebuilding it when prices change."""
+    cached = leveling_planners.get(table)
+    if cached is None or cached[0] != table.version or cached[1].recipes is not recipes_cache:
+        cached = (table.version, LevelingPlanner(recipes_cache, table.profits))
+        leveling_planners[table] = cached
+    return cached[1]
+
+
+def get_recipe_index() -> RecipeIndex:
+    """Return the listing index of recipes_cache, rebuilding it when the recipes change."""
+    global recipe_index
+    if recipe_index is None or recipe_index.recipes is not recipes_cache:
+        recipe_index = RecipeIndex(recipes_cache)
+    return recipe_index
+
+
+def select_recipes(filters: Dict[str, Any], sort_by: str, sort_order: str,
+                   table: ProfitTable) -> List[Dict[str, Any]]:
+    """Filter and sort recipes, in SQL when the database backend holds the table's prices."""
+    if recipe_database is not None and table is profit_table:
+        with timed_stage('query'):
+            recipe_ids = recipe_database.query_recipe_ids(filters, sort_by, sort_order)
+            return [table.recipes[recipe_id] for recipe_id in recipe_ids if recipe_id in table.recipes]
+    
+    # Bitmap filters and a presorted order, so only the matching recipes are touched
+    with timed_stage('select'):
+        return get_recipe_index().select(filters, sort_by, sort_order, table.profits, table.version)
+
+
+def parse_filters() -> Dict[str, Any]:
+    """Build recipe filters from the request query parameters."""
+    profession = request.args.get('profession')
+    min_skill = request.args.get('min_skill', type=int)
+    max_skill = request.args.get('max_skill', type=int)
+    search = request.args.get('search')
+    min_profit = request.args.get('min_profit', type=float)
+    
+    filters = {}
+    if profession:
+        filters['profession'] = profession
+    if min_skill is not None:
+        filters['min_skill'] = min_skill
+    if max_skill is not None:
+        filters['max_skill'] = max_skill
+    if search:
+        filters['search'] = search
+    if min_profit is not None:
+        filters['min_profit'] = min_profit
+    return filters
+
+
+def json_response(payload: Dict[str, Any], raw: Optional[Dict[str, bytes]] = None) -> Response:
+    """Build a JSON response, splicing in pre-serialized fragments from raw."""
+    with timed_stage('serialize'):
+        if raw:
+            body = JSONSerializer.dumps_with_raw(payload, raw)
+        else:
+            body = JSONSerializer.dumps(payload)
+    return Response(body, mimetype='application/json')
+
+
+def recipe_with_profit(recipe: Dict[str, Any], table: ProfitTable) -> bytes:
+    """Serialize a recipe with its profit data attached, reusing cached fragments."""
+    return JSONSerializer.splice(
+        JSONSerializer.fragment(recipe), 'profit_data', JSONSerializer.fragment(table.get(recipe))
+    )
+
+
+def iter_ndjson(recipes: Iterable[Dict[str, Any]], table: ProfitTable,
+                batch_size: int = WEB_CONFIG['stream_batch_size']) -> Iterator[bytes]:
+    """Yield recipes with profit data as NDJSON, batch_size lines per chunk."""
+    batch = []
+    for recipe in recipes:
+        batch.append(recipe_with_profit(recipe, table))
+        if len(batch) >= batch_size:
+            yield b'\n'.join(batch) + b'\n'
+            batch = []
+    if batch:
+        yield b'\n'.join(batch) + b'\n'
+
+
+@app.before_request
+def wait_for_data():
+    """Answer data endpoints with 503 until a background load has finished."""
+    if data_loading.is_set() and request.path.startswith('/api/') \
+            and request.path not in ('/api/health', '/api/metrics'):
+        response = json_response({
+            'success': False,
+            'error': 'Data is still loading'
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+
+
+@app.before_request
+def check_realm():
+    """Reject requests for a realm that has no prices loaded, and pin the table of one that has."""
+    realm = request.args.get('realm')
+    if not realm or realm == REALMS_CONFIG['default']:
+        return
+    # Resolved once here so a reload removing the realm mid-request cannot fail the view
+    g.realm_table = get_realm_table(realm)
+    if g.realm_table is None:
+        response = json_response({
+            'success': False,
+            'error': f"Unknown realm '{realm}'"
+        })
+        response.status_code = 404
+        return response
+
+
+@app.before_request
+def start_request_timer():
+    """Start timing the request and, for opt-in profiling, sampling its stack."""
+    if not METRICS_CONFIG['enabled']:
+        return
+    g.timer = RequestTimer()
+    if METRICS_CONFIG['profile_slow_ms'] and request.path.startswith('/api/'):
+        g.sampler = StackSampler(threading.get_ident()).start()
+
+
+@app.after_request
+def finish_request_timer(response):
+    """Record the request's stage timings as metrics and a Server-Timing header."""
+    if 'timer' not in g:
+        return response
+    
+    total = g.timer.elapsed()
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    labels = (('endpoint', endpoint), ('method', request.method))
+    request_metrics.increment('http_requests_total', labels + (('status', str(response.status_code)),),
+                              help_text='API requests served')
+    request_metrics.observe('http_request_duration_seconds', total, labels,
+                            help_text='Time to build a response, excluding streamed bodies')
+    for stage, seconds in g.timer.stages.items():
+        request_metrics.observe('http_request_stage_seconds', seconds, labels + (('stage', stage),),
+                                help_text='Time spent in each processing stage')
+    response.headers['Server-Timing'] = g.timer.server_timing(total)
+    
+    sampler = g.pop('sampler', None)
+    if sampler is not None:
+        samples = sampler.stop()
+        if total * 1000 >= METRICS_CONFIG['profile_slow_ms']:
+            write_profile(METRICS_CONFIG['profile_dir'], endpoint, total, samples)
+    return response
+
+
+@app.teardown_request
+def stop_request_sampler(error=None):
+    """Stop a stack sampler left running by a request that raised."""
+    sampler = g.pop('sampler', None)
+    if sampler is not None:
+        sampler.stop()
+
+
+@app.after_request
+def record_request(response):
+    """Append the API request to the request log, if recording is enabled."""
+    if request_log is not None and request.path.startswith('/api/') and request.path != '/api/events':
+        entry = {'ts': round(time.time(), 3), 'method': request.method, 'path': request.full_path.rstrip('?')}
+        if request.is_json:
+            entry['json'] = request.get_json(silent=True)
+        with request_log_lock:
+            request_log.write(json.dumps(entry) + '\n')
+            request_log.flush()
+    return response
 
 
 @app.route('/')
@@ -52,53 +468,95 @@ def serve_static(filename):
 
 
 @app.route('/api/recipes', methods=['GET'])
+@cached_response
 def get_recipes():
     """Get all recipes with optional filtering."""
     try:
-        # Get query parameters
-        profession = request.args.get('profession')
-        min_skill = request.args.get('min_skill', type=int)
-        max_skill = request.args.get('max_skill', type=int)
-        search = request.args.get('search')
-        min_profit = request.args.get('min_profit', type=float)
+        filters = parse_filters()
         sort_by = request.args.get('sort_by', 'name')
         sort_order = request.args.get('sort_order', 'asc')
         
-        # Build filters
-        filters = {}
-        if profession:
-            filters['profession'] = profession
-        if min_skill is not None:
-            filters['min_skill'] = min_skill
-        if max_skill is not None:
-            filters['max_skill'] = max_skill
-        if search:
-            filters['search'] = search
-        if min_profit is not None:
-            filters['min_profit'] = min_profit
-        
         # Filter and sort recipes
-        filtered_recipes = DataProcessor.filter_recipes(recipes_cache, filters)
-        sorted_recipes = DataProcessor.sort_recipes(filtered_recipes, sort_by, sort_order)
-        
-        # Calculate profits for each recipe
-        recipes_with_profit = []
-        for recipe in sorted_recipes:
-            profit_data = DataProcessor.calculate_recipe_profit(recipe, materials_cache)
-            recipe_with_profit = recipe.copy()
-            recipe_with_profit['profit_data'] = profit_data
-            recipes_with_profit.append(recipe_with_profit)
-        
-        return jsonify({
+        table = get_profit_table()
+        sorted_recipes = select_recipes(filters, sort_by, sort_order, table)
+        
+        # Attach profits, reusing the cached recipe and profit bytes
+        with timed_stage('price'):
+            recipe_fragments = [recipe_with_profit(recipe, table) for recipe in sorted_recipes]
+        
+        return json_response({
             'success': True,
-            'data': recipes_with_profit,
-            'total': len(recipes_with_profit),
+            'total': len(recipe_fragments),
             'filters': filters
-        })
+        }, raw={'data': b'[' + b','.join(recipe_fragments) + b']'})
         
     except Exception as e:
         logger.error(f"Error getting recipes: {e}")
-        return jsonify({
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/recipes/stream', methods=['GET'])
+def stream_recipes():
+    """Stream filtered, sorted recipes with profit data as NDJSON, one recipe per line."""
+    try:
+        filters = parse_filters()
+        sort_by = request.args.get('sort_by', 'name')
+        sort_order = request.args.get('sort_order', 'asc')
+        
+        # Sorting only orders references; profits are attached and serialized lazily per chunk
+        table = get_profit_table()
+        sorted_recipes = select_recipes(filters, sort_by, sort_order, table)
+        
+        response = Response(iter_ndjson(sorted_recipes, table, WEB_CONFIG['stream_batch_size']),
+                            mimetype='application/x-ndjson')
+        response.headers['X-Total-Count'] = str(len(sorted_recipes))
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error streaming recipes: {e}")
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/recipes/top', methods=['GET'])
+@cached_response
+def get_top_recipes():
+    """Get the best crafts right now, ranked by gold per hour after AH fees."""
+    try:
+        filters = parse_filters()
+        k = request.args.get('k', 20, type=int)
+        rank_by = request.args.get('rank_by', 'gold_per_hour')
+        
+        if rank_by not in PROFIT_SORT_KEYS:
+            return json_response({
+                'success': False,
+                'error': f"rank_by must be one of {', '.join(PROFIT_SORT_KEYS)}"
+            }), 400
+        
+        table = get_profit_table()
+        with timed_stage('select'):
+            filtered_recipes = get_recipe_index().select(filters, profits=table.profits)
+        with timed_stage('sort'):
+            top_recipes = table.top_recipes(filtered_recipes, k, rank_by)
+        
+        with timed_stage('price'):
+            recipe_fragments = [recipe_with_profit(recipe, table) for recipe in top_recipes]
+        
+        return json_response({
+            'success': True,
+            'total': len(recipe_fragments),
+            'rank_by': rank_by,
+            'filters': filters
+        }, raw={'data': b'[' + b','.join(recipe_fragments) + b']'})
+        
+    except Exception as e:
+        logger.error(f"Error ranking recipes: {e}")
+        return json_response({
             'success': False,
             'error': str(e)
         }), 500
@@ -111,24 +569,19 @@ def get_recipe(recipe_id):
         recipe = next((r for r in recipes_cache if r['recipe_id'] == recipe_id), None)
         
         if not recipe:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'error': 'Recipe not found'
             }), 404
         
         # Calculate profit data
-        profit_data = DataProcessor.calculate_recipe_profit(recipe, materials_cache)
-        recipe_with_profit = recipe.copy()
-        recipe_with_profit['profit_data'] = profit_data
-        
-        return jsonify({
-            'success': True,
-            'data': recipe_with_profit
-        })
+        return json_response({
+            'success': True
+        }, raw={'data': recipe_with_profit(recipe, get_profit_table())})
         
     except Exception as e:
         logger.error(f"Error getting recipe {recipe_id}: {e}")
-        return jsonify({
+        return json_response({
             'success': False,
             'error': str(e)
         }), 500
@@ -138,40 +591,39 @@ def get_recipe(recipe_id):
 def get_materials():
     """Get all materials."""
     try:
-        return jsonify({
+        return json_response({
             'success': True,
-            'data': materials_cache,
             'total': len(materials_cache)
-        })
+        }, raw={'data': JSONSerializer.fragment(materials_cache)})
         
     except Exception as e:
         logger.error(f"Error getting materials: {e}")
-        return jsonify({
+        return json_response({
             'success': False,
             'error': str(e)
         }), 500
 
 
-@app.route('/api/materials/<item_id>', methods=['GET'])
+@app.route('/api/materials/<int:item_id>', methods=['GET'])
 def get_material(item_id):
     """Get a specific material by ID."""
     try:
-        material = materials_cache.get(str(item_id))
+        material = materials_cache.get(item_id)
         
         if not material:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'error': 'Material not found'
             }), 404
         
-        return jsonify({
+        return json_response({
             'success': True,
             'data': material
         })
         
     except Exception as e:
         logger.error(f"Error getting material {item_id}: {e}")
-        return jsonify({
+        return json_response({
             'success': False,
             'error': str(e)
         }), 500
@@ -182,14 +634,14 @@ def get_professions():
     """Get all professions."""
     try:
         from config import PROFESSIONS
-        return jsonify({
+        return json_response({
             'success': True,
             'data': PROFESSIONS
         })
         
     except Exception as e:
         logger.error(f"Error getting professions: {e}")
-        return jsonify({
+        return json_response({
             'success': False,
             'error': str(e)
         }), 500
@@ -199,36 +651,48 @@ def get_professions():
 def calculate_profit():
     """Calculate profit for a recipe with custom prices."""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
-        if not data:
-            return jsonify({
+        if not data or not isinstance(data, dict):
+            return json_response({
                 'success': False,
                 'error': 'No data provided'
             }), 400
         
         recipe_id = data.get('recipe_id')
-        result_price = data.get('result_price', 0)
+        result_price = data.get('result_price')
         material_prices = data.get('material_prices', {})
         
+        try:
+            prices_by_id = {int(item_id): price for item_id, price in material_prices.items()}
+        except (AttributeError, TypeError, ValueError):
+            return json_response({
+                'success': False,
+                'error': 'material_prices must map numeric item ids to prices'
+            }), 400
+        
         # Find recipe
         recipe = next((r for r in recipes_cache if r['recipe_id'] == recipe_id), None)
         if not recipe:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'error': 'Recipe not found'
             }), 404
         
+        table = get_profit_table()
+        if result_price is None:
+            result_price = table.result_price(recipe)
+        
         # Create custom materials data with provided prices
-        custom_materials = materials_cache.copy()
-        for item_id, price in material_prices.items():
-            if str(item_id) in custom_materials:
-                custom_materials[str(item_id)]['price'] = price
+        custom_materials = table.priced_materials.copy()
+        for item_id, price in prices_by_id.items():
+            if item_id in custom_materials:
+                custom_materials[item_id] = {**custom_materials[item_id], 'price': price}
         
         # Calculate profit
         profit_data = DataProcessor.calculate_recipe_profit(recipe, custom_materials, result_price)
         
-        return jsonify({
+        return json_response({
             'success': True,
             'data': {
                 'recipe': recipe,
@@ -239,13 +703,93 @@ def calculate_profit():
         
     except Exception as e:
         logger.error(f"Error calculating profit: {e}")
-        return jsonify({
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/plan', methods=['POST'])
+def plan_crafts():
+    """Plan a consolidated shopping list for a queue of crafts."""
+    try:
+        data = request.get_json(silent=True)
+        
+        if not isinstance(data, dict) or not isinstance(data.get('queue'), list):
+            return json_response({
+                'success': False,
+                'error': 'A craft queue is required'
+            }), 400
+        
+        table = get_profit_table()
+        planner = CraftPlanner(recipes_cache, materials_cache, table.snapshot)
+        
+        return json_response({
+            'success': True,
+            'data': planner.plan(data['queue'])
+        })
+        
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error planning crafts: {e}")
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/leveling', methods=['GET'])
+def plan_leveling():
+    """Get the cheapest crafts to level a profession between two skill levels."""
+    try:
+        profession = request.args.get('profession')
+        start = request.args.get('start', 1, type=int)
+        target = request.args.get('target', 300, type=int)
+        
+        if not profession:
+            return json_response({
+                'success': False,
+                'error': 'A profession is required'
+            }), 400
+        
+        if start < 0 or target <= start:
+            return json_response({
+                'success': False,
+                'error': 'target must be greater than start'
+            }), 400
+        
+        if target > LEVELING_CONFIG['max_skill']:
+            return json_response({
+                'success': False,
+                'error': f"target must be at most {LEVELING_CONFIG['max_skill']}"
+            }), 400
+        
+        planner = get_leveling_planner(get_profit_table())
+        if not planner.knows(profession):
+            return json_response({
+                'success': False,
+                'error': f"Unknown profession: {profession}"
+            }), 400
+        
+        return json_response({
+            'success': True,
+            'data': planner.cheapest_path(profession, start, target)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error planning leveling: {e}")
+        return json_response({
             'success': False,
             'error': str(e)
         }), 500
 
 
 @app.route('/api/stats', methods=['GET'])
+@cached_response
 def get_stats():
     """Get application statistics."""
     try:
@@ -260,17 +804,18 @@ def get_stats():
             profession_stats[profession] = profession_stats.get(profession, 0) + 1
         
         # Profitability stats
+        table = get_profit_table()
         profitable_recipes = 0
         total_profit = 0
         for recipe in recipes_cache:
-            profit_data = DataProcessor.calculate_recipe_profit(recipe, materials_cache)
+            profit_data = table.get(recipe)
             if profit_data['profit'] > 0:
                 profitable_recipes += 1
                 total_profit += profit_data['profit']
         
         avg_profit = total_profit / profitable_recipes if profitable_recipes > 0 else 0
         
-        return jsonify({
+        return json_response({
             'success': True,
             'data': {
                 'total_recipes': total_recipes,
@@ -285,27 +830,156 @@ def get_stats():
         
     except Exception as e:
         logger.error(f"Error getting stats: {e}")
-        return jsonify({
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/prices/<int:item_id>/stats', methods=['GET'])
+def get_price_stats(item_id):
+    """Get rolling price statistics for an item."""
+    try:
+        item_stats = price_analytics.stats(item_id)
+        
+        if not item_stats:
+            return json_response({
+                'success': False,
+                'error': 'No price history for item'
+            }), 404
+        
+        return json_response({
+            'success': True,
+            'data': item_stats
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting price stats for {item_id}: {e}")
+        return json_response({
             'success': False,
             'error': str(e)
         }), 500
 
 
+@app.route('/api/reload-prices', methods=['POST'])
+def reload_prices_endpoint():
+    """Reload horde.json and recompute the profits of affected recipes."""
+    try:
+        return json_response({
+            'success': True,
+            'data': reload_prices()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error reloading prices: {e}")
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """Push changed recipe profits as Server-Sent Events whenever prices are reloaded."""
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscriber = profit_events.subscribe(last_event_id)
+    
+    response = Response(profit_events.stream(subscriber), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({
+    return json_response({
         'success': True,
-        'status': 'healthy',
+        'status': 'loading' if data_loading.is_set() else 'healthy',
+        'load_error': data_load_error,
         'recipes_loaded': len(recipes_cache),
-        'materials_loaded': len(materials_cache)
+        'materials_loaded': len(materials_cache),
+        'data_version': data_version,
+        'cache': response_cache.stats(),
+        'event_subscribers': profit_events.subscriber_count
     })
 
 
+@app.route('/api/arbitrage', methods=['GET'])
+@cached_response
+def get_arbitrage():
+    """Get vendor, cross-realm and craft-vs-buy opportunities from the last price sync."""
+    try:
+        kind = request.args.get('type')
+        min_profit = request.args.get('min_profit', type=float)
+        limit = request.args.get('limit', type=int)
+        
+        if kind and kind not in OPPORTUNITY_TYPES:
+            return json_response({
+                'success': False,
+                'error': f"type must be one of {', '.join(OPPORTUNITY_TYPES)}"
+            }), 400
+        
+        if limit is not None and limit < 1:
+            return json_response({
+                'success': False,
+                'error': 'limit must be a positive integer'
+            }), 400
+        limit = min(limit or ARBITRAGE_CONFIG['max_results'], ARBITRAGE_CONFIG['max_results'])
+        
+        # arbitrage_results holds every ranked opportunity, so filter before limiting
+        results = arbitrage_results
+        if kind:
+            results = [result for result in results if result['type'] == kind]
+        if min_profit is not None:
+            results = [result for result in results if result['profit'] >= min_profit]
+        
+        return json_response({
+            'success': True,
+            'total': len(results),
+            'price_version': profit_table.version,
+            'data': results[:limit]
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting arbitrage opportunities: {e}")
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/realms', methods=['GET'])
+def get_realms():
+    """List the price snapshots that can be selected with ?realm=."""
+    realms = [{'realm': REALMS_CONFIG['default'], 'items': len(profit_table.snapshot), 'source': HORDE_FILE.name}]
+    for key, stats in realm_prices.stats().items():
+        realms.append({'realm': key, **stats, 'loaded': key in realm_tables})
+    return json_response({
+        'success': True,
+        'data': realms
+    })
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Request and stage timings in the Prometheus text exposition format."""
+    cache_stats = response_cache.stats()
+    gauges = {
+        'recipes_loaded': len(recipes_cache),
+        'data_version': data_version,
+        'response_cache_entries': cache_stats['entries'],
+        'response_cache_hits': cache_stats['hits'],
+        'response_cache_misses': cache_stats['misses'],
+        'event_subscribers': profit_events.subscriber_count,
+    }
+    return Response(request_metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors."""
-    return jsonify({
+    return json_response({
         'success': False,
         'error': 'Endpoint not found'
     }), 404
@@ -314,7 +988,7 @@ def not_found(error):
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors."""
-    return jsonify({
+    return json_response({
         'success': False,
         'error': 'Internal server error'
     }), 500
@@ -333,12 +1007,32 @@ def main():
                        help="Enable debug mode")
     parser.add_argument("--reload", action="store_true", 
                        help="Enable auto-reload")
+    parser.add_argument("--wait-for-data", action="store_true", 
+                       help="Load all data before accepting requests")
+    parser.add_argument("--profile-slow", type=float, metavar="MS",
+                       help="Save stack profiles of API requests slower than MS milliseconds")
+    parser.add_argument("--record", 
+                       help="Append API requests to this JSONL file for loadtest.py --replay")
     
     args = parser.parse_args()
     
-    # Load data
-    logger.info("Loading data...")
-    load_data()
+    if args.profile_slow:
+        METRICS_CONFIG['profile_slow_ms'] = args.profile_slow
+        logger.info(f"Profiling API requests slower than {args.profile_slow:g} ms "
+                    f"into {METRICS_CONFIG['profile_dir']}")
+    
+    if args.record:
+        global request_log
+        request_log = open(args.record, 'a', encoding='utf-8')
+        logger.info(f"Recording API requests to {args.record}")
+    
+    # Load data, in the background unless asked to wait for it
+    if WEB_CONFIG['background_load'] and not args.wait_for_data:
+        logger.info("Loading data in the background...")
+        load_data_in_background()
+    else:
+        logger.info("Loading data...")
+        load_data()
     
     # Run server
     logger.info(f"Starting server on {args.host}:{args.port}")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Static site generator for WoW Classic SoD Recipe Calculator
+Renders every read-only API view to static, precompressed JSON files.
+"""
+
+import gzip
+import logging
+import shutil
+from pathlib import Path
+from typing import Dict, List, Tuple
+from urllib.parse import urlencode
+
+from bundles import profession_slug
+from config import BUNDLES_DIR, PROJECT_ROOT, SITE_CONFIG, SITE_DIR
+from utils import JSONSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def view_paths(recipe_ids: List[int], professions: List[str]) -> List[Tuple[str, str]]:
+    """Return (API URL, file path under the site root) for every view to render."""
+    views = [
+        ('/api/stats', 'api/stats.json'),
+        ('/api/professions', 'api/professions.json'),
+        ('/api/materials', 'api/materials.json'),
+        ('/api/arbitrage', 'api/arbitrage.json'),
+    ]
+    
+    for profession in [None] + professions:
+        slug = profession_slug(profession) if profession else 'all'
+        filters = {'profession': profession} if profession else {}
+        for sort_by in SITE_CONFIG['sort_keys']:
+            for sort_order in SITE_CONFIG['sort_orders']:
+                query = urlencode({**filters, 'sort_by': sort_by, 'sort_order': sort_order})
+                views.append((f"/api/recipes?{query}", f"api/recipes/{slug}/{sort_by}-{sort_order}.json"))
+        query = urlencode({**filters, 'k': SITE_CONFIG['top_k']})
+        views.append((f"/api/recipes/top?{query}", f"api/recipes/top/{slug}.json"))
+    
+    for recipe_id in recipe_ids:
+        views.append((f"/api/recipes/{recipe_id}", f"api/recipes/{recipe_id}.json"))
+    
+    return views
+
+
+def write_file(path: Path, body: bytes) -> int:
+    """Write body and its gzip copy; returns the compressed size."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(body)
+    compressed = gzip.compress(body, compresslevel=SITE_CONFIG['compress_level'], mtime=0)
+    path.with_name(path.name + '.gz').write_bytes(compressed)
+    return len(compressed)
+
+
+def build_site(output_dir: Path = SITE_DIR) -> Dict[str, str]:
+    """
+    Render the API into output_dir and copy the web pages and data alongside it.
+    
+    The site is built in a sibling directory and swapped in at the end,
+    so a failed build leaves the previously published site untouched.
+    Returns the mapping of API URLs to files, also written as api/index.json.
+    """
+    import server
+    
+    # load_data logs and records failures rather than raising, so check before rendering
+    server.load_data()
+    if server.data_load_error:
+        raise RuntimeError(f"Could not load data: {server.data_load_error}")
+    if not server.recipes_cache:
+        raise RuntimeError("No recipes loaded; refusing to publish an empty site")
+    
+    output_dir = Path(output_dir)
+    staging_dir = output_dir.with_name(output_dir.name + '.tmp')
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir)
+    staging_dir.mkdir(parents=True)
+    
+    client = server.app.test_client()
+    
+    recipe_ids = [recipe['recipe_id'] for recipe in server.recipes_cache]
+    professions = sorted({recipe.get('profession', 'Unknown') for recipe in server.recipes_cache})
+    
+    routes = {}
+    compressed_total = 0
+    for url, relative_path in view_paths(recipe_ids, professions):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"Rendering {url} failed with status {response.status_code}")
+        compressed_total += write_file(staging_dir / relative_path, response.get_data())
+        routes[url] = relative_path
+    
+    write_file(staging_dir / 'api' / 'index.json', JSONSerializer.dumps(routes, pretty=True))
+    
+    for asset in SITE_CONFIG['assets']:
+        if (PROJECT_ROOT / asset).exists():
+            shutil.copy2(PROJECT_ROOT / asset, staging_dir / asset)
+    if BUNDLES_DIR.exists():
+        shutil.copytree(BUNDLES_DIR, staging_dir / BUNDLES_DIR.name)
+    
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    staging_dir.rename(output_dir)
+    
+    logger.info(f"Rendered {len(routes)} views ({compressed_total / 1024 / 1024:.1f} MB compressed) "
+                f"to {output_dir}")
+    return routes
+
+
+def main():
+    """Main function to build the static site."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="WoW Classic SoD static site generator")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    build_parser = subparsers.add_parser("build", help="Render the API views to static files")
+    build_parser.add_argument("--output", default=str(SITE_DIR),
+                             help="Directory to write the site to")
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    
+    build_site(Path(args.output))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -3,16 +3,43 @@
 Test suite for WoW Classic SoD Recipe Calculator
 """
 
+import asyncio
 import json
+import subprocess
+import sys
 import tempfile
+import threading
+import time
 import unittest
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 
-from config import PROFESSIONS, DEFAULT_VENDOR_PRICES
+from arbitrage import craft_vs_buy, cross_realm, net_sale, opportunity, scan, vendor_flips
+from async_scraper import AsyncScraper, TokenBucket, aiohttp
+from benchmarks import SCALE_ID_OFFSET, compare, scale_dataset
+from bundles import build_bundles
+from config import PROFESSIONS, DEFAULT_VENDOR_PRICES, PRICING_CONFIG, SITE_CONFIG
+from database import RecipeDatabase
+from events import EventBroadcaster
+from leveling import LevelingPlanner
+from loadtest import TrafficMix, load_request_log, percentile
+from metrics import MetricsRegistry, RequestTimer
+from planner import CraftPlanner, OrderBook
+from price_analytics import PriceAnalytics
+from price_history import PRICE_FIELDS, PriceHistoryStore, diff_snapshots
+from profit_table import ProfitTable
+from realm_prices import RealmPrices
+from recipe_parser import parse_recipe
+from recipe_index import RecipeIndex
+from response_cache import ResponseCache
+from scrape_telemetry import PageRecord, ScrapeTelemetry, summarize
+from static_site import build_site, view_paths
+from url_discovery import build_queue, extract_listing
 from utils import (
     DataValidator, DataProcessor, DataLoader, 
-    URLProcessor, PriceCalculator
+    URLProcessor, PriceCalculator, JSONSerializer, PROFIT_SORT_KEYS
 )
 
 
@@ -80,6 +107,16 @@ class TestDataValidator(unittest.TestCase):
         """Test validation of valid materials data."""
         self.assertTrue(DataValidator.validate_materials_data(self.valid_materials_data))
     
+    def test_validate_materials_data_list(self):
+        """Test validation of materials data in list format."""
+        materials = [{"itemId": 123, "name": "Test Material", "quality": 1, "iconname": "inv_misc_food_01"}]
+        self.assertTrue(DataValidator.validate_materials_data(materials))
+    
+    def test_validate_materials_data_list_invalid_id(self):
+        """Test validation of list materials data with a non-integer itemId."""
+        materials = [{"itemId": "123", "name": "Test Material"}]
+        self.assertFalse(DataValidator.validate_materials_data(materials))
+    
     def test_validate_materials_data_invalid_structure(self):
         """Test validation of materials data with invalid structure."""
         invalid_data = {
@@ -133,6 +170,17 @@ class TestDataProcessor(unittest.TestCase):
         expected_cost = 2 * 100 + 1 * 2  # 202
         self.assertEqual(cost_data["total_cost"], expected_cost)
     
+    def test_calculate_recipe_cost_with_materials_index(self):
+        """Test recipe cost calculation against an int-keyed materials index."""
+        materials_index = DataLoader.build_materials_index([
+            {"itemId": 123, "name": "Material 1", "price": 100},
+            {"itemId": 456, "name": "Material 2", "price": 50}
+        ])
+        cost_data = DataProcessor.calculate_recipe_cost(self.test_recipe, materials_index)
+        
+        self.assertEqual(cost_data["total_cost"], 250)
+        self.assertEqual(cost_data["material_costs"][1]["name"], "Material 2")
+    
     def test_calculate_recipe_profit(self):
         """Test recipe profit calculation."""
         result_price = 500
@@ -229,6 +277,21 @@ class TestURLProcessor(unittest.TestCase):
         cleaned = URLProcessor.clean_urls(urls)
         self.assertEqual(len(cleaned), 3)
         self.assertTrue(all(URLProcessor.validate_wowhead_url(url) for url in cleaned))
+    
+    def test_clean_urls_deduplicates_by_spell(self):
+        """Test that expansion paths and slugs of one spell collapse to one canonical URL."""
+        urls = [
+            "https://www.wowhead.com/tbc/spell=12345/recipe-1",
+            "https://www.wowhead.com/classic/spell=12345/other-slug",
+            "https://de.wowhead.com/classic/spell=12345?x=1",
+            "https://classic.wowhead.com/spell=67890"
+        ]
+        cleaned = URLProcessor.clean_urls(urls)
+        self.assertEqual(cleaned, [
+            "https://www.wowhead.com/classic/spell=12345/recipe-1",
+            "https://www.wowhead.com/classic/spell=67890"
+        ])
+        self.assertIsNone(URLProcessor.canonicalize_url("https://www.wowhead.com/classic/item=12345"))
 
 
 class TestPriceCalculator(unittest.TestCase):
@@ -285,6 +348,14 @@ class TestPriceCalculator(unittest.TestCase):
         self.assertEqual(fees["listing_fee"], 50)
         self.assertEqual(fees["total_fees"], 100)
         self.assertEqual(fees["net_profit"], 900)
+    
+    def test_estimate_sales_per_hour(self):
+        """Test sell-through estimate from market depth."""
+        deep_market = PriceCalculator.estimate_sales_per_hour(quantity=480, num_auctions=9)
+        thin_market = PriceCalculator.estimate_sales_per_hour(quantity=480, num_auctions=99)
+        
+        self.assertGreater(deep_market, thin_market)
+        self.assertEqual(PriceCalculator.estimate_sales_per_hour(quantity=0, num_auctions=0), 0)
 
 
 class TestDataLoader(unittest.TestCase):
@@ -323,6 +394,62 @@ class TestDataLoader(unittest.TestCase):
             self.assertEqual(len(recipes), 1)
             self.assertEqual(recipes[0]["name"], "Test Recipe")
     
+    def test_iter_recipes_data_streams_list(self):
+        """Test streaming a recipes array across chunk boundaries."""
+        test_data = [
+            {
+                "recipe_id": 1000 + i,
+                "name": f"Test Recipe {i}",
+                "profession": "Cooking",
+                "skill_level": i,
+                "materials": [{"itemId": 123, "quantity": 1}],
+                "result_item_id": 789,
+                "result_quantity": 1
+            }
+            for i in range(5)
+        ]
+        test_data.append({"recipe_id": "bad", "name": "Broken"})
+        test_data.append({"recipe_id": 2000, "name": ""})
+        
+        recipes_file = self.temp_path / "recipes.json"
+        with open(recipes_file, 'w') as f:
+            json.dump(test_data, f, indent=2)
+        
+        import utils
+        
+        for backend in (None, utils.orjson):
+            error_counts = Counter()
+            with patch('utils.STREAM_CHUNK_SIZE', 16), patch('utils.orjson', backend):
+                recipes = list(DataLoader.iter_recipes_data(recipes_file, error_counts))
+            
+            self.assertEqual([r["recipe_id"] for r in recipes], [1000, 1001, 1002, 1003, 1004])
+            self.assertEqual(sum(error_counts.values()), 2)
+            self.assertEqual(error_counts["missing field 'profession'"], 2)
+    
+    def test_iter_recipes_data_rejects_malformed_array(self):
+        """Test that missing, doubled or trailing commas fail like json.load instead of loading."""
+        recipe = json.dumps({"recipe_id": 1, "name": "Test Recipe", "profession": "Cooking",
+                             "skill_level": 1, "materials": [{"itemId": 123, "quantity": 1}],
+                             "result_item_id": 789, "result_quantity": 1})
+        recipes_file = self.temp_path / "recipes.json"
+        
+        for text in (f"[{recipe},,{recipe} {recipe}]", f"[{recipe} {recipe}]", f"[{recipe},]",
+                     f"[,{recipe}]", f"[{recipe}", f"[{recipe}] {recipe}"):
+            recipes_file.write_text(text)
+            for chunk_size in (7, 64 * 1024):
+                with patch('utils.STREAM_CHUNK_SIZE', chunk_size), patch('utils.orjson', None):
+                    with self.assertRaises(ValueError, msg=text):
+                        list(DataLoader.iter_recipes_data(recipes_file))
+            with self.assertRaises(ValueError, msg=text):
+                list(DataLoader.iter_recipes_data(recipes_file))
+        
+        recipes_file.write_text(f" [ {recipe} ,\n {recipe} ] \n")
+        with patch('utils.STREAM_CHUNK_SIZE', 7), patch('utils.orjson', None):
+            self.assertEqual(len(list(DataLoader.iter_recipes_data(recipes_file))), 2)
+        recipes_file.write_text("[ ]")
+        with patch('utils.orjson', None):
+            self.assertEqual(list(DataLoader.iter_recipes_data(recipes_file)), [])
+    
     def test_load_recipes_data_invalid_format(self):
         """Test loading recipes data with invalid format."""
         test_data = "invalid json"
@@ -350,7 +477,28 @@ class TestDataLoader(unittest.TestCase):
         with patch('utils.MATERIALS_FILE', materials_file):
             materials = DataLoader.load_materials_data()
             self.assertEqual(len(materials), 1)
-            self.assertEqual(materials["123"]["name"], "Test Material")
+            self.assertEqual(materials[123]["name"], "Test Material")
+    
+    def test_load_materials_data_list_format(self):
+        """Test loading materials data in the materials.json list format."""
+        test_data = [
+            {"itemId": 123, "name": "Test Material", "quality": 1, "iconname": "inv_misc_food_01"},
+            {"itemId": 456, "name": "Other Material", "quality": 2, "iconname": "inv_misc_food_02"}
+        ]
+        
+        materials_file = self.temp_path / "materials.json"
+        with open(materials_file, 'w') as f:
+            json.dump(test_data, f)
+        
+        with patch('utils.MATERIALS_FILE', materials_file):
+            materials = DataLoader.load_materials_data()
+            self.assertEqual(len(materials), 2)
+            self.assertEqual(materials[456]["name"], "Other Material")
+    
+    def test_build_materials_index_passthrough(self):
+        """Test that an already built index is returned unchanged."""
+        materials_index = {123: {"name": "Test Material", "price": 100}}
+        self.assertIs(DataLoader.build_materials_index(materials_index), materials_index)
     
     def test_load_materials_data_file_not_found(self):
         """Test loading materials data when file doesn't exist."""
@@ -361,6 +509,1352 @@ class TestDataLoader(unittest.TestCase):
             self.assertEqual(materials, {})
 
 
+class TestJSONSerializer(unittest.TestCase):
+    """Test JSON serialization helpers."""
+    
+    def test_dumps_compact_roundtrip(self):
+        """Test compact serialization round-trips through loads."""
+        data = {"name": "Elixir of Agility", "materials": [{"itemId": 3820, "quantity": 1}]}
+        serialized = JSONSerializer.dumps(data)
+        
+        self.assertIsInstance(serialized, bytes)
+        self.assertNotIn(b"\n", serialized)
+        self.assertEqual(JSONSerializer.loads(serialized), data)
+    
+    def test_dumps_int_keys(self):
+        """Test serialization of an int-keyed materials index."""
+        serialized = JSONSerializer.dumps({123: {"name": "Test Material"}})
+        self.assertEqual(json.loads(serialized), {"123": {"name": "Test Material"}})
+    
+    def test_fragment_is_cached(self):
+        """Test that fragments are reused for the same object."""
+        recipe = {"recipe_id": 12345, "name": "Test Recipe"}
+        self.assertIs(JSONSerializer.fragment(recipe), JSONSerializer.fragment(recipe))
+    
+    def test_fragment_cache_is_bounded(self):
+        """Test that the least recently used fragments are dropped past the limit."""
+        with patch.object(JSONSerializer, 'max_fragments', 2):
+            JSONSerializer.clear_cache()
+            first, second, third = {"a": 1}, {"b": 2}, {"c": 3}
+            for data in (first, second, first, third):
+                JSONSerializer.fragment(data)
+            self.assertEqual(set(JSONSerializer._fragment_cache), {id(first), id(third)})
+        JSONSerializer.clear_cache()
+    
+    def test_extend_object(self):
+        """Test appending a key to a serialized object."""
+        fragment = JSONSerializer.dumps({"recipe_id": 12345})
+        extended = JSONSerializer.extend_object(fragment, "profit_data", {"profit": 250})
+        self.assertEqual(json.loads(extended), {"recipe_id": 12345, "profit_data": {"profit": 250}})
+        
+        empty = JSONSerializer.extend_object(b"{}", "total", 0)
+        self.assertEqual(json.loads(empty), {"total": 0})
+    
+    def test_dumps_with_raw(self):
+        """Test splicing pre-serialized values into an envelope."""
+        serialized = JSONSerializer.dumps_with_raw({"success": True}, {"data": b"[1,2]"})
+        self.assertEqual(json.loads(serialized), {"success": True, "data": [1, 2]})
+
+
+class TestPriceHistoryStore(unittest.TestCase):
+    """Test the append-only price history store."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = PriceHistoryStore(Path(self.temp_dir))
+        self.timestamp = 1790000000  # 2026-09-21 14:13 UTC
+        self.snapshot = {
+            123: (100, 5, 120, 2),
+            456: (50, 20, 55, 4)
+        }
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def test_ingest_keyframe_then_delta(self):
+        """Test that only changed items are stored after the first snapshot."""
+        self.store.ingest(self.snapshot, self.timestamp)
+        changed = {123: (90, 6, 110, 3), 789: (10, 1, 10, 1)}
+        delta_file = self.store.ingest(changed, self.timestamp + 3600)
+        
+        record = PriceHistoryStore._read_record(delta_file)
+        self.assertEqual(record["type"], "delta")
+        self.assertEqual(record["items"], {"123": [90, 6, 110, 3], "789": [10, 1, 10, 1], "456": None})
+        self.assertEqual(self.store.snapshot_at(self.timestamp + 3600), changed)
+    
+    def test_diff_snapshots(self):
+        """Test snapshot diffing reports changed, added and removed items."""
+        current = {123: (90, 6, 110, 3), 789: (10, 1, 10, 1)}
+        delta = diff_snapshots(self.snapshot, current)
+        
+        self.assertEqual(set(delta.changed), {123, 789})
+        self.assertEqual(delta.removed, {456})
+        self.assertEqual(delta.field_deltas("marketValue"), {123: -10, 456: -55, 789: 10})
+        self.assertFalse(diff_snapshots(self.snapshot, dict(self.snapshot)))
+    
+    def test_ingest_unchanged_snapshot(self):
+        """Test that an identical snapshot is not stored again."""
+        self.store.ingest(self.snapshot, self.timestamp)
+        self.assertIsNone(self.store.ingest(dict(self.snapshot), self.timestamp + 3600))
+    
+    def test_ingest_rejects_older_snapshot(self):
+        """Test that history stays append-only."""
+        self.store.ingest(self.snapshot, self.timestamp)
+        with self.assertRaises(ValueError):
+            self.store.ingest(self.snapshot, self.timestamp - 60)
+    
+    def test_cli_ingest_with_previous_skips_replay(self):
+        """Test that the sync path's --previous snapshot supplies the delta instead of a replay."""
+        import price_history
+        
+        files = []
+        for name, snapshot in (("previous.json", self.snapshot), ("horde.json", {123: (90, 6, 110, 3)})):
+            path = Path(self.temp_dir) / name
+            path.write_text(json.dumps({"pricing_data": [
+                dict(zip(("itemId",) + PRICE_FIELDS, (item_id,) + values)) for item_id, values in snapshot.items()
+            ]}))
+            files.append(str(path))
+        root = str(Path(self.temp_dir) / "history")
+        
+        def ingest(*extra):
+            argv = ["price_history.py", "--root", root, "ingest", *extra]
+            with patch.object(sys, "argv", argv):
+                self.assertEqual(price_history.main(), 0)
+        
+        ingest(files[0], "--timestamp", str(self.timestamp))
+        with patch.object(PriceHistoryStore, "_replay_partition", side_effect=AssertionError("replayed")):
+            ingest(files[1], "--timestamp", str(self.timestamp + 3600), "--previous", files[0])
+        
+        store = PriceHistoryStore(Path(root))
+        self.assertEqual(store.snapshot_at(self.timestamp + 3600), {123: (90, 6, 110, 3)})
+    
+    def test_series_across_partitions(self):
+        """Test range queries spanning several day partitions."""
+        for step, price in enumerate([120, 130, 130, 90]):
+            snapshot = dict(self.snapshot)
+            snapshot[123] = (100, 5, price, 2)
+            self.store.ingest(snapshot, self.timestamp + step * 43200)
+        
+        self.assertEqual(len(self.store.partitions()), 3)
+        series = self.store.series(123, "marketValue")
+        self.assertEqual([value for _, value in series], [120, 130, 90])
+        
+        series = self.store.series(123, "marketValue", start=self.timestamp + 43200)
+        self.assertEqual(series[0], (self.timestamp + 43200, 130))
+
+
+class TestProfitTable(unittest.TestCase):
+    """Test incremental profit table updates."""
+    
+    def setUp(self):
+        self.recipes = [
+            {
+                "recipe_id": 1,
+                "name": "Recipe 1",
+                "profession": "Alchemy",
+                "skill_level": 100,
+                "materials": [{"itemId": 123, "quantity": 2}],
+                "result_item_id": 789,
+                "result_quantity": 1
+            },
+            {
+                "recipe_id": 2,
+                "name": "Recipe 2",
+                "profession": "Alchemy",
+                "skill_level": 150,
+                "materials": [{"itemId": 456, "quantity": 1}],
+                "result_item_id": 790,
+                "result_quantity": 1
+            }
+        ]
+        self.materials = {
+            123: {"itemId": 123, "name": "Material 1"},
+            456: {"itemId": 456, "name": "Material 2"}
+        }
+        self.snapshot = {
+            123: (100, 5, 100, 2),
+            456: (50, 5, 50, 2),
+            789: (500, 1, 500, 1),
+            790: (80, 1, 80, 1)
+        }
+        self.table = ProfitTable(self.recipes, self.materials, self.snapshot)
+    
+    def test_initial_profits(self):
+        """Test profits are priced from the snapshot."""
+        self.assertEqual(self.table.profits[1]["cost"], 200)
+        self.assertEqual(self.table.profits[1]["profit"], 300)
+        self.assertEqual(self.table.profits[2]["profit"], 30)
+    
+    def test_net_profit_after_ah_fees(self):
+        """Test that net profit deducts the AH cut and estimated deposit."""
+        profit_data = self.table.profits[1]
+        expected_fees = 500 * 0.05 + PriceCalculator.estimate_deposit(500)
+        
+        self.assertAlmostEqual(profit_data["ah_fees"], expected_fees)
+        self.assertAlmostEqual(profit_data["net_profit"], 500 - expected_fees - 200)
+        self.assertGreater(profit_data["gold_per_hour"], 0)
+    
+    def test_top_recipes(self):
+        """Test heap-based top-K ranking."""
+        top = self.table.top_recipes(self.recipes, k=1, rank_by="net_profit")
+        self.assertEqual([r["recipe_id"] for r in top], [1])
+        
+        top = self.table.top_recipes(self.recipes[1:], k=5, rank_by="net_profit")
+        self.assertEqual([r["recipe_id"] for r in top], [2])
+    
+    def test_apply_snapshot_recomputes_affected_only(self):
+        """Test that only recipes touching changed items are recomputed."""
+        untouched = self.table.profits[2]
+        snapshot = dict(self.snapshot)
+        snapshot[123] = (150, 5, 150, 2)
+        
+        delta, affected = self.table.apply_snapshot(snapshot)
+        
+        self.assertEqual(delta.item_ids, {123})
+        self.assertEqual(delta.field_deltas("marketValue"), {123: 50})
+        self.assertEqual(affected, {1})
+        self.assertEqual(self.table.profits[1]["profit"], 200)
+        self.assertIs(self.table.profits[2], untouched)
+        self.assertEqual(self.table.version, 1)
+    
+    def test_removed_item_falls_back_to_vendor_price(self):
+        """Test that items missing from a snapshot lose their auction price."""
+        snapshot = dict(self.snapshot)
+        del snapshot[456]
+        
+        delta, affected = self.table.apply_snapshot(snapshot)
+        
+        self.assertEqual(delta.removed, {456})
+        self.assertEqual(affected, {2})
+        self.assertTrue(self.table.profits[2]["material_costs"][0]["vendor_price"])
+
+
+class TestPriceAnalytics(unittest.TestCase):
+    """Test rolling price statistics."""
+    
+    def setUp(self):
+        self.analytics = PriceAnalytics(half_life_hours=1, window_days=1)
+        self.timestamp = 1790000000
+        self.analytics.apply_snapshot({123: (100, 10, 100, 4)}, self.timestamp)
+    
+    def test_ema_half_life(self):
+        """Test that the EMA moves halfway to a new price after one half-life."""
+        delta = diff_snapshots({123: (100, 10, 100, 4)}, {123: (200, 10, 200, 4)})
+        self.analytics.apply_delta(delta, self.timestamp + 3600)
+        
+        item_stats = self.analytics.stats(123, now=self.timestamp + 7200)
+        self.assertAlmostEqual(item_stats["ema"], 150.0)
+        self.assertEqual(item_stats["current"], 200)
+    
+    def test_median_ignores_short_dip(self):
+        """Test that a brief underpriced listing does not move the median."""
+        self.analytics.update_item(123, (5, 1, 5, 1), self.timestamp + 36000)
+        self.analytics.update_item(123, (100, 10, 100, 4), self.timestamp + 39600)
+        
+        item_stats = self.analytics.stats(123, now=self.timestamp + 43200)
+        self.assertEqual(item_stats["median"], 100)
+        self.assertGreater(item_stats["std"], 0)
+    
+    def test_smoothed_snapshot(self):
+        """Test pricing a snapshot against smoothed values."""
+        self.analytics.update_item(123, (5, 1, 5, 1), self.timestamp + 3000)
+        smoothed = self.analytics.smoothed_snapshot(
+            {123: (5, 1, 5, 1), 456: (50, 1, 50, 1)}, method="median", now=self.timestamp + 3060
+        )
+        
+        self.assertEqual(smoothed[123][2], 100)
+        self.assertEqual(smoothed[456], (50, 1, 50, 1))
+    
+    def test_update_smoothed_touches_only_changed_items(self):
+        """Test that an incremental update re-smooths only the given items."""
+        snapshot = {123: (100, 10, 100, 4), 456: (50, 1, 50, 1)}
+        smoothed = self.analytics.smoothed_snapshot(snapshot, method="median")
+        
+        self.analytics.update_item(456, (80, 1, 80, 1), self.timestamp + 3600)
+        new_snapshot = {123: (100, 10, 100, 4), 456: (80, 1, 80, 1)}
+        with patch.object(self.analytics, 'smoothed_price', wraps=self.analytics.smoothed_price) as priced:
+            updated, delta = self.analytics.update_smoothed(smoothed, new_snapshot, {456}, method="median")
+        
+        self.assertEqual([call.args[0] for call in priced.call_args_list], [456])
+        self.assertEqual(set(delta.changed), {456})
+        self.assertEqual(updated[123], smoothed[123])
+        self.assertEqual(updated[456], (80, 1, 80, 1))
+        
+        updated, delta = self.analytics.update_smoothed(updated, {123: (100, 10, 100, 4)}, {456})
+        self.assertEqual(delta.removed, {456})
+        self.assertNotIn(456, updated)
+    
+    def test_unknown_item(self):
+        """Test statistics for an item that was never seen."""
+        self.assertIsNone(self.analytics.stats(999))
+
+
+class TestCraftPlanner(unittest.TestCase):
+    """Test batch craft planning."""
+    
+    def setUp(self):
+        self.recipes = [
+            {
+                "recipe_id": 1,
+                "name": "Recipe 1",
+                "materials": [{"itemId": 123, "quantity": 2}, {"itemId": 2678, "quantity": 1}],
+                "result_item_id": 789,
+                "result_quantity": 1
+            },
+            {
+                "recipe_id": 2,
+                "name": "Recipe 2",
+                "materials": [{"itemId": 123, "quantity": 1}],
+                "result_item_id": 790,
+                "result_quantity": 1
+            }
+        ]
+        self.materials = {123: {"itemId": 123, "name": "Material 1"}}
+        # minBuyout, quantity, marketValue, numAuctions
+        self.snapshot = {123: (100, 10, 150, 5)}
+        self.planner = CraftPlanner(self.recipes, self.materials, self.snapshot)
+    
+    def test_order_book_cost(self):
+        """Test walking up a linear order book."""
+        book = OrderBook(min_buyout=100, quantity=10, market_value=150)
+        
+        self.assertEqual(book.cost(1)["marginal_price"], 100)
+        self.assertEqual(book.cost(10)["total_cost"], 1500)  # average equals market value
+        self.assertEqual(book.cost(12)["shortfall"], 2)
+        self.assertEqual(book.cost(12)["total_cost"], 1500 + 2 * 200)
+    
+    def test_plan_aggregates_shared_reagents(self):
+        """Test that shared reagents are consolidated into one line."""
+        plan = self.planner.plan([
+            {"recipe_id": 1, "count": 2},
+            {"recipe_id": 2, "count": 3},
+            {"recipe_id": 999, "count": 1}
+        ])
+        
+        lines = {line["itemId"]: line for line in plan["shopping_list"]}
+        self.assertEqual(lines[123]["quantity"], 7)
+        self.assertEqual(lines[123]["source"], "auction")
+        self.assertEqual(lines[2678]["source"], "vendor")
+        self.assertEqual(lines[2678]["total_cost"], 2 * DEFAULT_VENDOR_PRICES[2678])
+        self.assertEqual(plan["crafts"], 5)
+        self.assertEqual(plan["skipped"], [{"recipe_id": 999, "count": 1}])
+        self.assertGreater(plan["depth_premium"], 0)
+    
+    def test_plan_rejects_malformed_entries(self):
+        """Test that unhashable recipe ids and bad counts are rejected, not crashed on."""
+        for entry in ({"recipe_id": [1]}, {"recipe_id": {"id": 1}}, {"recipe_id": "1"},
+                      {"recipe_id": 1, "count": 0}, {"recipe_id": 1, "count": 1.5}, [1]):
+            with self.assertRaises(ValueError):
+                self.planner.aggregate_demand([{"recipe_id": 1, "count": 1}, entry])
+
+
+class TestLevelingPlanner(unittest.TestCase):
+    """Test the profession levelling planner."""
+    
+    def setUp(self):
+        self.recipes = [
+            {"recipe_id": 1, "name": "Cheap", "profession": "Alchemy", "skill_level": 1},
+            {"recipe_id": 2, "name": "Expensive", "profession": "Alchemy", "skill_level": 1},
+            {"recipe_id": 3, "name": "Later", "profession": "Alchemy", "skill_level": 20},
+            {"recipe_id": 4, "name": "Unpriced", "profession": "Alchemy", "skill_level": 1}
+        ]
+        priced = [{"itemId": 123, "unit_price": 10}]
+        self.profits = {
+            1: {"cost": 10, "material_costs": priced},
+            2: {"cost": 50, "material_costs": priced},
+            3: {"cost": 12, "material_costs": priced},
+            4: {"cost": 0, "material_costs": [{"itemId": 456, "unit_price": 0}]}
+        }
+        self.planner = LevelingPlanner(self.recipes, self.profits, yellow_offset=10, grey_offset=20)
+    
+    def test_skill_up_chance(self):
+        """Test orange, yellow and grey skill-up chances."""
+        self.assertEqual(self.planner.skill_up_chance(1, 5), 1.0)
+        self.assertEqual(self.planner.skill_up_chance(1, 16), 0.5)
+        self.assertEqual(self.planner.skill_up_chance(1, 21), 0.0)
+        self.assertEqual(self.planner.skill_up_chance(20, 5), 0.0)
+    
+    def test_cheapest_path(self):
+        """Test that each point uses the cheapest expected craft."""
+        path = self.planner.cheapest_path("Alchemy", 1, 40)
+        
+        self.assertEqual([step["recipe_id"] for step in path["steps"]], [1, 3])
+        # Once learned, recipe 3 at 12 per point beats yellow recipe 1 at 100
+        self.assertEqual(path["steps"][0]["to_skill"], 20)
+        self.assertEqual(path["steps"][1]["from_skill"], 20)
+        self.assertEqual(path["gaps"], [])
+        self.assertAlmostEqual(path["total_cost"], sum(
+            self.planner.best_step("Alchemy", skill)[0] for skill in range(1, 40)
+        ))
+    
+    def test_gaps_reported(self):
+        """Test that skill points no recipe can raise are reported."""
+        path = self.planner.cheapest_path("Alchemy", 38, 42)
+        self.assertEqual(path["gaps"], [40, 41])
+        self.assertEqual(self.planner.cheapest_path("Cooking", 1, 3)["gaps"], [1, 2])
+    
+    def test_profession_case_and_bounds(self):
+        """Test case-insensitive professions, the skill cap and an unmemoized unknown profession."""
+        self.assertEqual(self.planner.cheapest_path("alchemy", 1, 40)["steps"],
+                         self.planner.cheapest_path("Alchemy", 1, 40)["steps"])
+        self.assertEqual(self.planner.cheapest_path("ALCHEMY", 1, 2)["profession"], "Alchemy")
+        self.assertTrue(self.planner.knows("alchemy"))
+        self.assertFalse(self.planner.knows("x"))
+        with self.assertRaises(ValueError):
+            self.planner.cheapest_path("Alchemy", 1, 100000000)
+        self.planner.cheapest_path("x", 1, 300)
+        self.assertFalse(any(key[0] == "x" for key in self.planner._steps))
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test the LRU response cache."""
+    
+    def test_key_normalization(self):
+        """Test that parameter order and empty values do not change the key."""
+        key = ResponseCache.make_key("/api/recipes", [("sort_by", "profit"), ("profession", "Alchemy")], 1)
+        same = ResponseCache.make_key(
+            "/api/recipes", [("profession", "Alchemy"), ("search", ""), ("sort_by", "profit")], 1
+        )
+        self.assertEqual(key, same)
+        self.assertNotEqual(key, ResponseCache.make_key("/api/recipes", [("sort_by", "profit")], 1))
+        self.assertNotEqual(key, ResponseCache.make_key(
+            "/api/recipes", [("sort_by", "profit"), ("profession", "Alchemy")], 2
+        ))
+    
+    def test_lru_eviction_and_counters(self):
+        """Test eviction by entry count and byte size, and hit/miss counters."""
+        cache = ResponseCache(max_entries=2, max_bytes=10)
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        self.assertEqual(cache.get("a"), b"1234")  # a is now most recently used
+        cache.put("c", b"1234")
+        
+        self.assertIsNone(cache.get("b"))
+        cache.put("d", b"12345")  # over the byte bound, evicts a
+        self.assertIsNone(cache.get("a"))
+        
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["evictions"], 2)
+        self.assertEqual(stats["bytes"], 9)
+    
+    def test_clear(self):
+        """Test invalidation drops every entry."""
+        cache = ResponseCache()
+        cache.put("a", b"{}")
+        cache.clear()
+        
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertEqual(cache.stats()["invalidations"], 1)
+
+
+class TestEventBroadcaster(unittest.TestCase):
+    """Test Server-Sent Events broadcasting."""
+    
+    def test_publish_to_subscribers(self):
+        """Test that each subscriber receives the same encoded event."""
+        broadcaster = EventBroadcaster()
+        first = broadcaster.subscribe()
+        second = broadcaster.subscribe()
+        
+        event_id = broadcaster.publish("profits", {"profits": {"1": {"profit": 5}}})
+        
+        expected = b'id: 1\nevent: profits\ndata: {"profits":{"1":{"profit":5}}}\n\n'
+        self.assertEqual(event_id, 1)
+        self.assertEqual(first.get_nowait(), expected)
+        self.assertEqual(second.get_nowait(), expected)
+    
+    def test_replay_after_last_event_id(self):
+        """Test that a reconnecting client receives the events it missed."""
+        broadcaster = EventBroadcaster()
+        for i in range(3):
+            broadcaster.publish("profits", {"n": i})
+        
+        subscriber = broadcaster.subscribe(last_event_id=1)
+        self.assertEqual(subscriber.qsize(), 2)
+        self.assertTrue(subscriber.get_nowait().startswith(b"id: 2\n"))
+    
+    def test_slow_subscriber_dropped(self):
+        """Test that a subscriber that stops reading is dropped and its stream closes."""
+        broadcaster = EventBroadcaster(max_queue=2)
+        subscriber = broadcaster.subscribe()
+        for i in range(3):
+            broadcaster.publish("profits", {"n": i})
+        
+        self.assertEqual(broadcaster.subscriber_count, 0)
+        stream = list(broadcaster.stream(subscriber, heartbeat=0.01))
+        self.assertEqual(len(stream), 3)  # retry hint and the two queued events
+        
+        # A closed stream unregisters its subscriber
+        subscriber = broadcaster.subscribe()
+        stream = broadcaster.stream(subscriber, heartbeat=0.01)
+        next(stream)
+        self.assertEqual(next(stream), b": keepalive\n\n")
+        stream.close()
+        self.assertEqual(broadcaster.subscriber_count, 0)
+
+
+class TestBundles(unittest.TestCase):
+    """Test per-profession bundle building."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.recipes = [
+            {"recipe_id": 1, "name": "Potion", "profession": "Alchemy",
+             "materials": [{"itemId": 123, "quantity": 2}], "result_item_id": 789, "result_quantity": 1},
+            {"recipe_id": 2, "name": "Sword", "profession": "Blacksmithing",
+             "materials": [{"itemId": 456, "quantity": 1}], "result_item_id": 790, "result_quantity": 1}
+        ]
+        self.materials = {
+            item_id: {"itemId": item_id, "name": f"Item {item_id}"} for item_id in (123, 456, 789, 790)
+        }
+        self.pricing_rows = {
+            123: {"itemId": 123, "minBuyout": 90, "quantity": 10, "marketValue": 100, "numAuctions": 3},
+            789: {"itemId": 789, "minBuyout": 400, "quantity": 5, "marketValue": 500, "numAuctions": 2}
+        }
+        self.snapshot = {123: (90, 10, 100, 3), 789: (400, 5, 500, 2)}
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def build(self):
+        return build_bundles(self.recipes, self.materials, self.snapshot, self.pricing_rows,
+                             "2026-10-01T12:00:00Z", Path(self.temp_dir))
+    
+    def test_bundle_contents(self):
+        """Test that a bundle holds only its profession and referenced items."""
+        manifest = self.build()
+        entry = manifest["bundles"]["Alchemy"]
+        
+        self.assertRegex(entry["file"], r"^alchemy\.[0-9a-f]{12}\.json$")
+        bundle = json.loads((Path(self.temp_dir) / entry["file"]).read_bytes())
+        
+        self.assertEqual([r["recipe_id"] for r in bundle["recipes"]], [1])
+        self.assertEqual(bundle["recipes"][0]["profit_data"]["cost"], 200)
+        self.assertEqual([m["itemId"] for m in bundle["materials"]], [123, 789])
+        self.assertEqual([p["itemId"] for p in bundle["pricing"]], [123, 789])
+        
+        import gzip
+        compressed = (Path(self.temp_dir) / (entry["file"] + ".gz")).read_bytes()
+        self.assertEqual(json.loads(gzip.decompress(compressed)), bundle)
+    
+    def test_content_hash_and_stale_cleanup(self):
+        """Test that names follow content and superseded bundles are removed."""
+        first = self.build()["bundles"]["Alchemy"]["file"]
+        self.assertEqual(self.build()["bundles"]["Alchemy"]["file"], first)
+        
+        self.snapshot[123] = (95, 10, 110, 3)
+        second = self.build()["bundles"]["Alchemy"]["file"]
+        self.assertNotEqual(second, first)
+        self.assertTrue((Path(self.temp_dir) / first).exists())  # still in the previous manifest
+        
+        self.snapshot[123] = (97, 10, 120, 3)
+        self.build()
+        self.assertFalse((Path(self.temp_dir) / first).exists())
+        self.assertFalse((Path(self.temp_dir) / (first + ".gz")).exists())
+    
+    def test_stale_cleanup_keeps_other_files(self):
+        """Test that only hashed bundle names are ever deleted from the output directory."""
+        others = ["notes.json", "alchemy.json", "alchemy.latest.json", "alchemy.0123456789ab.json.bak"]
+        for name in others:
+            (Path(self.temp_dir) / name).write_text("{}")
+        
+        self.build()
+        self.snapshot[123] = (95, 10, 110, 3)
+        self.build()
+        self.snapshot[123] = (97, 10, 120, 3)
+        self.build()
+        for name in others:
+            self.assertTrue((Path(self.temp_dir) / name).exists(), name)
+
+
+class TestStaticSite(unittest.TestCase):
+    """Test static site view enumeration."""
+    
+    def test_view_paths(self):
+        """Test that every profession, ordering and recipe gets its own file."""
+        views = dict(view_paths([11, 12], ["Alchemy", "First Aid"]))
+        orderings = len(SITE_CONFIG["sort_keys"]) * len(SITE_CONFIG["sort_orders"])
+        
+        # stats, professions, materials, arbitrage, lists and top for all + 2 professions, 2 details
+        self.assertEqual(len(views), 4 + 3 * (orderings + 1) + 2)
+        self.assertEqual(views["/api/recipes?profession=First+Aid&sort_by=profit&sort_order=desc"],
+                         "api/recipes/first-aid/profit-desc.json")
+        self.assertEqual(views["/api/recipes?sort_by=name&sort_order=asc"], "api/recipes/all/name-asc.json")
+        self.assertEqual(views["/api/recipes/12"], "api/recipes/12.json")
+        self.assertEqual(len(set(views.values())), len(views))
+    
+    def test_build_refuses_failed_or_empty_load(self):
+        """Test that a failed or empty data load raises and leaves the published site alone."""
+        import shutil
+        import server
+        
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        output_dir = Path(temp_dir) / "site"
+        output_dir.mkdir()
+        (output_dir / "index.html").write_text("published")
+        
+        for error, recipes in (("recipes.json missing", []), (None, [])):
+            with patch.object(server, 'load_data'), \
+                 patch.object(server, 'data_load_error', error), \
+                 patch.object(server, 'recipes_cache', recipes):
+                with self.assertRaises(RuntimeError):
+                    build_site(output_dir)
+            self.assertEqual((output_dir / "index.html").read_text(), "published")
+            self.assertFalse((Path(temp_dir) / "site.tmp").exists())
+
+
+class TestRecipeDatabase(unittest.TestCase):
+    """Test the SQLite storage backend."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.database = RecipeDatabase(Path(self.temp_dir) / "recipes.db")
+        self.recipes = [
+            {"recipe_id": 1, "name": "Minor Potion", "profession": "Alchemy", "skill_level": 1,
+             "materials": [{"itemId": 123, "quantity": 2}, {"itemId": 2678, "quantity": 1}],
+             "result_item_id": 789, "result_quantity": 1},
+            {"recipe_id": 2, "name": "Major Potion", "profession": "Alchemy", "skill_level": 250,
+             "materials": [{"itemId": 456, "quantity": 1}], "result_item_id": 790, "result_quantity": 2},
+            {"recipe_id": 3, "name": "Copper Bar", "profession": "Mining", "skill_level": 1,
+             "materials": [{"itemId": 123, "quantity": 1}], "result_item_id": 791, "result_quantity": 1}
+        ]
+        self.materials = {123: {"itemId": 123, "name": "Herb"}, 456: {"itemId": 456, "name": "Dust"}}
+        self.snapshot = {123: (90, 10, 100, 3), 456: (40, 8, 50, 1), 789: (400, 5, 500, 2), 790: (30, 6, 40, 1)}
+        
+        self.database.upsert_recipes(self.recipes)
+        self.database.upsert_items(self.materials)
+        self.database.sync_prices(self.snapshot)
+    
+    def tearDown(self):
+        import shutil
+        self.database.close()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_round_trip(self):
+        """Test that recipes come back in the recipes.json shape."""
+        self.assertEqual(self.database.get_recipes([2, 1]), [self.recipes[1], self.recipes[0]])
+        self.assertEqual([r["recipe_id"] for r in self.database.iter_recipes(batch_size=2)], [1, 2, 3])
+    
+    def test_profits_match_profit_table(self):
+        """Test that SQL profit data matches the in-memory calculation."""
+        table = ProfitTable(self.recipes, self.materials, self.snapshot)
+        for recipe_id, profit_data in table.profits.items():
+            row = self.database.profit(recipe_id)
+            for key in PROFIT_SORT_KEYS + ("cost", "result_value"):
+                self.assertAlmostEqual(row[key], profit_data[key])
+    
+    def test_queries_match_filter_and_sort(self):
+        """Test that compiled queries return what filter_recipes and sort_recipes do."""
+        table = ProfitTable(self.recipes, self.materials, self.snapshot)
+        cases = [
+            ({}, "name", "asc"),
+            ({"profession": "alchemy"}, "profit", "desc"),
+            ({"min_skill": 1, "max_skill": 100, "search": "POT"}, "skill_level", "asc"),
+            ({"min_profit": 0}, "gold_per_hour", "desc"),
+        ]
+        for filters, sort_by, sort_order in cases:
+            expected = DataProcessor.sort_recipes(
+                DataProcessor.filter_recipes(self.recipes, filters, table.profits),
+                sort_by, sort_order, table.profits
+            )
+            self.assertEqual(self.database.query_recipe_ids(filters, sort_by, sort_order),
+                             [r["recipe_id"] for r in expected])
+        
+        self.assertEqual(self.database.query_recipe_ids({}, "name", "asc", limit=1, offset=1), [2])
+    
+    def test_incremental_price_sync(self):
+        """Test that a sync only writes changed items and refreshes dependent costs."""
+        self.snapshot[123] = (90, 10, 200, 3)
+        del self.snapshot[790]
+        delta = self.database.sync_prices(self.snapshot)
+        
+        self.assertEqual(set(delta.changed), {123})
+        self.assertEqual(delta.removed, {790})
+        self.assertEqual(self.database.profit(1)["cost"], 2 * 200 + DEFAULT_VENDOR_PRICES[2678])
+        self.assertEqual(self.database.profit(3)["cost"], 200)
+        self.assertEqual(self.database.profit(2)["result_value"], 0)
+        self.assertFalse(self.database.sync_prices(self.snapshot))
+    
+    def test_reads_wait_for_a_sync_in_progress(self):
+        """Test that another thread cannot read the shared connection halfway through a sync."""
+        results = []
+        reader = threading.Thread(target=lambda: results.append(self.database.profit(3)["cost"]))
+        refresh = self.database._refresh_costs_for_items
+        
+        def refresh_with_reader(item_ids):
+            # The new price is written but costs are not yet refreshed
+            reader.start()
+            reader.join(timeout=0.2)
+            self.assertTrue(reader.is_alive())
+            refresh(item_ids)
+        
+        with patch.object(self.database, '_refresh_costs_for_items', side_effect=refresh_with_reader):
+            self.database.sync_prices({**self.snapshot, 123: (90, 10, 150, 3)})
+        reader.join()
+        self.assertEqual(results, [150])
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Test benchmark dataset scaling and baseline comparison."""
+    
+    def test_scale_dataset(self):
+        """Test that scaled copies get distinct recipe and item ids."""
+        recipes = [{"recipe_id": 1, "name": "Potion", "materials": [{"itemId": 123, "quantity": 2}],
+                    "result_item_id": 789}]
+        recipes_10x, materials_10x, snapshot_10x = scale_dataset(
+            recipes, {123: {"itemId": 123}}, {123: (1, 2, 3, 4)}, 10
+        )
+        
+        self.assertEqual(len(recipes_10x), 10)
+        self.assertEqual(len({r["recipe_id"] for r in recipes_10x}), 10)
+        self.assertEqual(recipes_10x[1]["materials"][0]["itemId"], 123 + SCALE_ID_OFFSET)
+        self.assertEqual(len(materials_10x), 10)
+        self.assertEqual(snapshot_10x[123 + 9 * SCALE_ID_OFFSET], (1, 2, 3, 4))
+        self.assertEqual(recipes[0]["materials"][0]["itemId"], 123)
+    
+    def test_compare_flags_regressions(self):
+        """Test that only slowdowns beyond the threshold are reported."""
+        baseline = {"a[1x]": {"p50_ms": 10.0}, "b[1x]": {"p50_ms": 10.0}}
+        results = {"a[1x]": {"p50_ms": 12.0}, "b[1x]": {"p50_ms": 14.0}, "c[1x]": {"p50_ms": 99.0}}
+        
+        regressions = compare(results, baseline, threshold=0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("b[1x]"))
+
+
+class TestLoadTest(unittest.TestCase):
+    """Test load test traffic generation and request log replay."""
+    
+    def test_traffic_mix_is_reproducible(self):
+        """Test that a seeded mix repeats and covers every request kind."""
+        first = TrafficMix([1, 2, 3], seed=7)
+        second = TrafficMix([1, 2, 3], seed=7)
+        requests_sent = [first.next_request() for _ in range(200)]
+        
+        self.assertEqual(requests_sent, [second.next_request() for _ in range(200)])
+        self.assertTrue(any(r["method"] == "POST" and r["json"]["recipe_id"] in (1, 2, 3) for r in requests_sent))
+        self.assertTrue(any(r["path"].startswith("/api/recipes?profession=") for r in requests_sent))
+        self.assertTrue(any(r["path"] in ("/api/recipes/1", "/api/recipes/2", "/api/recipes/3")
+                            for r in requests_sent))
+    
+    def test_load_request_log_skips_bad_lines(self):
+        """Test that malformed log lines are skipped."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_path = Path(temp_dir) / "traffic.jsonl"
+            log_path.write_text(
+                '{"method": "GET", "path": "/api/stats"}\n'
+                'not json\n\n'
+                '{"method": "GET"}\n'
+                '{"method": "POST", "path": "/api/calculate-profit", "json": {"recipe_id": 1}}\n'
+            )
+            requests_logged = load_request_log(log_path)
+        
+        self.assertEqual([r["path"] for r in requests_logged], ["/api/stats", "/api/calculate-profit"])
+        self.assertEqual(requests_logged[1]["json"], {"recipe_id": 1})
+    
+    def test_percentile(self):
+        """Test percentiles of sorted latencies."""
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(percentile(values, 0.5), 51.0)
+        self.assertEqual(percentile(values, 0.99), 100.0)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+
+class TestMetrics(unittest.TestCase):
+    """Test request metrics rendering and stage timing."""
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that histogram buckets count every observation at or below their bound."""
+        registry = MetricsRegistry(buckets=[0.01, 0.1])
+        labels = (("endpoint", "/api/recipes"),)
+        for value in (0.005, 0.05, 0.5):
+            registry.observe("duration_seconds", value, labels)
+        registry.increment("requests_total", labels + (("status", "200"),), 3)
+        
+        lines = registry.render({"recipes_loaded": 2050}).splitlines()
+        self.assertIn('duration_seconds_bucket{endpoint="/api/recipes",le="0.01"} 1', lines)
+        self.assertIn('duration_seconds_bucket{endpoint="/api/recipes",le="0.1"} 2', lines)
+        self.assertIn('duration_seconds_bucket{endpoint="/api/recipes",le="+Inf"} 3', lines)
+        self.assertIn('duration_seconds_count{endpoint="/api/recipes"} 3', lines)
+        self.assertIn('requests_total{endpoint="/api/recipes",status="200"} 3', lines)
+        self.assertIn("recipes_loaded 2050", lines)
+    
+    def test_request_timer_accumulates_stages(self):
+        """Test that repeated stages add up and appear in the Server-Timing header."""
+        timer = RequestTimer()
+        with timer.stage("filter"):
+            pass
+        with timer.stage("filter"):
+            pass
+        with timer.stage("serialize"):
+            pass
+        
+        self.assertEqual(list(timer.stages), ["filter", "serialize"])
+        header = timer.server_timing(0.0125)
+        self.assertTrue(header.startswith("filter;dur="))
+        self.assertTrue(header.endswith("total;dur=12.50"))
+
+
+class TestScrapeTelemetry(unittest.TestCase):
+    """Test scraper telemetry records and run summaries."""
+    
+    def test_summarize(self):
+        """Test throughput, percentiles, slowest pages and error classes."""
+        records = [PageRecord(url=f"u{i}", success=True, fetch_seconds=i, parse_seconds=0.5) for i in range(1, 21)]
+        records.append(PageRecord(url="bad", success=False, retries=2, error_class="TimeoutException"))
+        
+        summary = summarize(records, wall_seconds=42.0, slowest=2)
+        self.assertEqual(summary["urls"], 21)
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(summary["urls_per_minute"], 30.0)
+        self.assertEqual(summary["p95_page_seconds"], 19.5)
+        self.assertEqual([page["url"] for page in summary["slowest"]], ["u20", "u19"])
+        self.assertEqual(summary["errors"], {"TimeoutException": 1})
+        self.assertEqual(summary["total_retries"], 2)
+    
+    def test_telemetry_file_ends_with_summary(self):
+        """Test that every page is written as a JSONL line before the summary."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            telemetry_path = Path(temp_dir) / "telemetry.jsonl"
+            with ScrapeTelemetry(telemetry_path) as telemetry:
+                telemetry.record(PageRecord(url="a", success=True, fetch_seconds=1.0, bytes=1000))
+                telemetry.record(PageRecord(url="b", success=False, error_class="ValueError"))
+            
+            lines = [json.loads(line) for line in telemetry_path.read_text().splitlines()]
+        
+        self.assertEqual([line["type"] for line in lines], ["page", "page", "summary"])
+        self.assertEqual(lines[0]["bytes"], 1000)
+        self.assertEqual(lines[1]["error_class"], "ValueError")
+        self.assertEqual(lines[2]["successful"], 1)
+
+
+class TestServerStartup(unittest.TestCase):
+    """Test that the server starts without scraper dependencies or loaded data."""
+    
+    def test_server_import_skips_scraper_dependencies(self):
+        """Test that importing the server does not import requests or BeautifulSoup."""
+        result = subprocess.run(
+            [sys.executable, "-c", "import sys, server; print(sorted({'requests', 'bs4'} & set(sys.modules)))"],
+            cwd=Path(__file__).parent, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), "[]")
+    
+    def test_data_endpoints_wait_for_background_load(self):
+        """Test that only health and metrics answer while data is loading."""
+        import server
+        
+        client = server.app.test_client()
+        server.data_loading.set()
+        try:
+            self.assertEqual(client.get("/api/health").get_json()["status"], "loading")
+            response = client.get("/api/recipes")
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers["Retry-After"], "1")
+        finally:
+            server.data_loading.clear()
+        self.assertEqual(client.get("/api/health").get_json()["status"], "healthy")
+
+
+class TestServerValidation(unittest.TestCase):
+    """Test that malformed API parameters are answered with 400, not 500."""
+    
+    def setUp(self):
+        import server
+        self.client = server.app.test_client()
+    
+    def test_calculate_profit_rejects_non_numeric_item_id(self):
+        """Test that a material price keyed by a non-numeric item id is a client error."""
+        response = self.client.post("/api/calculate-profit",
+                                    json={"recipe_id": 1, "material_prices": {"abc": 100}})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_calculate_profit_rejects_non_object_bodies(self):
+        """Test that array and string bodies are client errors."""
+        for body in ([1, 2], "x"):
+            self.assertEqual(self.client.post("/api/calculate-profit", json=body).status_code, 400, body)
+    
+    def test_leveling_rejects_unknown_profession_and_huge_target(self):
+        """Test that the levelling planner only runs for known professions up to the skill cap."""
+        import server
+        
+        with patch.object(server, 'recipes_cache', [{"recipe_id": 1, "name": "Potion",
+                                                     "profession": "Alchemy", "skill_level": 1,
+                                                     "materials": []}]):
+            self.assertEqual(self.client.get("/api/leveling?profession=alchemy&target=100000000").status_code, 400)
+            self.assertEqual(self.client.get("/api/leveling?profession=x&target=300").status_code, 400)
+            self.assertEqual(self.client.get("/api/leveling?profession=alchemy&target=300").status_code, 200)
+    
+    def test_leveling_planners_go_away_with_their_tables(self):
+        """Test that a planner is per table and is dropped once its table is garbage."""
+        import gc
+        import server
+        
+        recipes = [{"recipe_id": 1, "name": "Potion", "profession": "Alchemy", "skill_level": 1,
+                    "materials": []}]
+        with patch.object(server, 'recipes_cache', recipes):
+            first = ProfitTable(recipes, {}, {})
+            second = ProfitTable(recipes, {}, {})
+            planner = server.get_leveling_planner(first)
+            self.assertIs(server.get_leveling_planner(first), planner)
+            self.assertIsNot(server.get_leveling_planner(second), planner)
+            
+            del first, second
+            gc.collect()
+            self.assertNotIn(planner, [cached[1] for cached in server.leveling_planners.values()])
+    
+    def test_realm_removed_mid_request(self):
+        """Test that a realm removed by a reload is a 404 before the view and harmless after it."""
+        import server
+        
+        recipes = [{"recipe_id": 1, "name": "Potion", "profession": "Alchemy", "skill_level": 1,
+                    "materials": [{"itemId": 123, "quantity": 1}], "result_item_id": 789}]
+        prices = RealmPrices()
+        prices.put("other-horde", {123: (10, 5, 12, 2), 789: (50, 1, 60, 1)})
+        select_recipes = server.select_recipes
+        
+        def select_after_reload(*args, **kwargs):
+            prices.remove("other-horde")
+            server.realm_tables.clear()
+            return select_recipes(*args, **kwargs)
+        
+        with patch.object(server, 'recipes_cache', recipes), \
+             patch.object(server, 'realm_prices', prices), \
+             patch.object(server, 'realm_tables', server.OrderedDict()), \
+             patch.object(server, 'select_recipes', side_effect=select_after_reload):
+            server.invalidate_responses()
+            response = self.client.get("/api/recipes?realm=other-horde")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()["data"][0]["profit_data"]["result_value"], 60)
+            
+            self.assertIsNone(server.get_realm_table("other-horde"))
+            self.assertEqual(self.client.get("/api/recipes?realm=other-horde").status_code, 404)
+        server.invalidate_responses()
+    
+    def test_price_reloads_do_not_overlap(self):
+        """Test that a second reload waits for the first, so each delta is applied once."""
+        import server
+        
+        recipes = [{"recipe_id": 1, "name": "Potion", "profession": "Alchemy", "skill_level": 1,
+                    "materials": [{"itemId": 123, "quantity": 1}], "result_item_id": 789}]
+        snapshots = [{123: (10, 5, 12, 2)}, {123: (10, 5, 20, 2)}]
+        second = threading.Thread(target=server.reload_prices)
+        
+        def load_price_snapshot():
+            snapshot = snapshots.pop(0)
+            if snapshots:
+                second.start()
+                second.join(timeout=0.2)
+                self.assertTrue(second.is_alive())
+            return snapshot
+        
+        with patch.object(server, 'recipes_cache', recipes), \
+             patch.object(server, 'profit_table', ProfitTable(recipes, {}, {})), \
+             patch.object(server, 'smoothed_profit_table', ProfitTable(recipes, {}, {})), \
+             patch.object(server, 'price_analytics', PriceAnalytics()), \
+             patch.object(server, 'recipe_database', None), \
+             patch.object(server, 'load_price_snapshot', side_effect=load_price_snapshot), \
+             patch.object(server, 'snapshot_timestamp', return_value=1000), \
+             patch.object(server, 'load_realm_files', return_value=[]), \
+             patch.object(server, 'refresh_arbitrage'):
+            first = server.reload_prices()
+            second.join()
+            
+            self.assertEqual(first['price_version'], 1)
+            self.assertEqual(server.profit_table.version, 2)
+            self.assertEqual(server.profit_table.snapshot, {123: (10, 5, 20, 2)})
+        server.invalidate_responses()
+    
+    def test_plan_rejects_unhashable_recipe_id(self):
+        """Test that a list recipe_id in a craft queue is a client error."""
+        response = self.client.post("/api/plan", json={"queue": [{"recipe_id": [1, 2]}]})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_plan_rejects_non_object_bodies(self):
+        """Test that array, string and unparseable bodies are client errors."""
+        for body in ([1, 2], "x", 3, None):
+            self.assertEqual(self.client.post("/api/plan", json=body).status_code, 400, body)
+        response = self.client.post("/api/plan", data="{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+class TestRecipeStream(unittest.TestCase):
+    """Test the NDJSON recipe stream against the JSON recipe list."""
+    
+    def setUp(self):
+        import server
+        
+        self.server = server
+        recipes = [
+            {"recipe_id": i, "name": f"Recipe {name}", "profession": "Alchemy", "skill_level": i * 10,
+             "materials": [{"itemId": 123, "quantity": i}], "result_item_id": 1000 + i, "result_quantity": 1}
+            for i, name in enumerate("EDCBA", 1)
+        ]
+        materials = {123: {"name": "Herb"}}
+        patchers = [
+            patch.object(server, 'recipes_cache', recipes),
+            patch.object(server, 'materials_cache', materials),
+            patch.object(server, 'profit_table', ProfitTable(recipes, materials, {123: (10, 5, 12, 2)})),
+            patch.dict(server.WEB_CONFIG, {'stream_batch_size': 2}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        server.invalidate_responses()
+        self.addCleanup(server.invalidate_responses)
+        self.client = server.app.test_client()
+    
+    def test_stream_matches_recipe_list(self):
+        """Test that streamed lines match /api/recipes in order and content, in batches."""
+        query = "?sort_by=skill_level&sort_order=desc"
+        listed = self.client.get("/api/recipes" + query).get_json()["data"]
+        
+        response = self.client.get("/api/recipes/stream" + query, buffered=False)
+        chunks = list(response.iter_encoded())
+        response.close()
+        
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertEqual(response.headers["X-Total-Count"], str(len(listed)))
+        self.assertEqual([chunk.count(b"\n") for chunk in chunks], [2, 2, 1])
+        streamed = [json.loads(line) for line in b"".join(chunks).splitlines()]
+        self.assertEqual(streamed, listed)
+        self.assertEqual([recipe["recipe_id"] for recipe in streamed], [5, 4, 3, 2, 1])
+    
+    def test_stream_applies_filters(self):
+        """Test that filters reduce the stream and its total count alike."""
+        response = self.client.get("/api/recipes/stream?max_skill=20")
+        self.assertEqual(response.headers["X-Total-Count"], "2")
+        self.assertEqual(len(response.data.splitlines()), 2)
+
+
+class TestRecipeIndex(unittest.TestCase):
+    """Test bitmap filters and presorted orders against filter_recipes and sort_recipes."""
+    
+    def setUp(self):
+        self.recipes = [
+            {"recipe_id": i, "name": name, "profession": profession, "skill_level": skill}
+            for i, (name, profession, skill) in enumerate([
+                ("Elixir", "Alchemy", 150), ("Bread", "Cooking", 1), ("Potion", "Alchemy", 50),
+                ("Anvil", "Blacksmithing", 150), ("Flask", "alchemy", 300), ("Potion", "Alchemy", 150),
+            ])
+        ]
+        self.profits = {i: {"profit": [5, 1, 5, 0, -2, 7][i]} for i in range(6)}
+        self.index = RecipeIndex(self.recipes)
+    
+    def test_select_matches_filter_and_sort(self):
+        """Test that results, including the order of ties, match the list-based path."""
+        for filters in ({}, {"profession": "Alchemy"}, {"min_skill": 50, "max_skill": 150},
+                        {"profession": "ALCHEMY", "search": "potion", "min_profit": 5}, {"profession": "Tailoring"}):
+            for sort_by in ("name", "skill_level", "profession", "profit", "unknown"):
+                for sort_order in ("asc", "desc"):
+                    expected = DataProcessor.sort_recipes(
+                        DataProcessor.filter_recipes(self.recipes, filters, self.profits),
+                        sort_by, sort_order, self.profits
+                    )
+                    self.assertEqual(self.index.select(filters, sort_by, sort_order, self.profits), expected,
+                                     (filters, sort_by, sort_order))
+    
+    def test_profit_order_rebuilt_for_new_version(self):
+        """Test that a profit order is reused until the price version changes."""
+        top = self.index.select({}, "profit", "desc", self.profits, version=1)[0]
+        self.assertEqual(top["recipe_id"], 5)
+        
+        self.profits[1]["profit"] = 99
+        self.assertEqual(self.index.select({}, "profit", "desc", self.profits, version=1)[0]["recipe_id"], 5)
+        self.assertEqual(self.index.select({}, "profit", "desc", self.profits, version=2)[0]["recipe_id"], 1)
+    
+    def test_profit_orders_shared_across_threads(self):
+        """Test that concurrent lookups and evictions of profit orders never fail."""
+        errors = []
+        
+        def select(offset):
+            try:
+                for version in range(1000):
+                    profits = {i: {"profit": (i + offset) % 6} for i in range(6)}
+                    self.index.select({}, "profit", "desc", profits, version=version)
+            except Exception as e:
+                errors.append(e)
+        
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, switch_interval)
+        with patch('recipe_index.MAX_PROFIT_ORDERS', 1):
+            threads = [threading.Thread(target=select, args=(offset,)) for offset in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(self.index._profit_orders), 1)
+
+
+class TestRealmPrices(unittest.TestCase):
+    """Test realm price vectors aligned to the shared item index."""
+    
+    def test_snapshot_view_matches_dict(self):
+        """Test that a realm view behaves like the snapshot it was stored from."""
+        horde = {123: (100, 5, 120, 2), 456: (50, 1, 60, 1)}
+        alliance = {456: (70, 3, 80, 2), 789: (10, 9, 11, 4)}
+        prices = RealmPrices()
+        prices.put("test-horde", horde)
+        prices.put("test-alliance", alliance)
+        
+        # The horde vector predates item 789 but still reads correctly
+        horde_view = prices.snapshot("test-horde")
+        self.assertEqual(dict(horde_view), horde)
+        self.assertEqual(len(horde_view), 2)
+        self.assertNotIn(789, horde_view)
+        self.assertIsNone(horde_view.get(789))
+        self.assertFalse(diff_snapshots(horde, horde_view))
+        self.assertEqual(dict(prices.snapshot("test-alliance")), alliance)
+        self.assertEqual(len(prices.item_index), 3)
+    
+    def test_put_reports_changes(self):
+        """Test that storing identical prices is not reported as a change."""
+        prices = RealmPrices()
+        self.assertTrue(prices.put("a", {1: (1, 1, 1, 1)}))
+        prices.put("b", {2: (2, 2, 2, 2)})
+        self.assertFalse(prices.put("a", {1: (1, 1, 1, 1)}))
+        self.assertTrue(prices.put("a", {1: (1, 1, 1, 1), 2: (3, 3, 3, 3)}))
+
+
+class TestArbitrage(unittest.TestCase):
+    """Test the arbitrage scanner over realm price vectors."""
+    
+    def setUp(self):
+        # (minBuyout, quantity, marketValue, numAuctions)
+        self.prices = RealmPrices()
+        self.prices.put("a-horde", {1: (8000, 5, 10000, 2), 2: (400, 10, 500, 3)})
+        self.prices.put("a-alliance", {1: (29000, 2, 30000, 1), 2: (450, 4, 520, 2)})
+        self.names = {1: "Arcanite Bar", 2: "Linen Cloth"}
+    
+    def test_cross_realm_buys_cheapest_and_sells_highest(self):
+        """Test that a cross-faction gap is found in the right direction only."""
+        results = cross_realm(self.prices, self.names, min_profit=1000)
+        self.assertEqual(len(results), 1)
+        result = results[0]
+        self.assertEqual((result['item_id'], result['buy_from'], result['sell_to']), (1, "a-horde", "a-alliance"))
+        self.assertEqual(result['buy_price'], 8000)
+        self.assertLess(result['profit'], 30000 - 8000)
+        self.assertEqual(result['available'], 5)
+    
+    def test_vendor_opportunities(self):
+        """Test vendor flips and AH listings worth selling to a vendor."""
+        results = vendor_flips(self.prices, {2: {'buy': 100, 'sell': 600}}, self.names)
+        kinds = Counter(result['type'] for result in results)
+        self.assertEqual(kinds, Counter({'vendor_flip': 2, 'vendor_sell': 2}))
+        vendor_sell = [r for r in results if r['type'] == 'vendor_sell' and r['buy_from'] == "a-horde"][0]
+        self.assertEqual(vendor_sell['profit'], 200)
+    
+    def test_craft_vs_buy_skips_unpriced_reagents(self):
+        """Test that crafts are only compared when every reagent has a price."""
+        recipes = [
+            {"recipe_id": 1, "name": "Bar", "profession": "Mining", "result_item_id": 1, "result_quantity": 1,
+             "materials": [{"itemId": 2, "quantity": 4}]},
+            {"recipe_id": 2, "name": "Unpriced", "profession": "Mining", "result_item_id": 1,
+             "result_quantity": 1, "materials": [{"itemId": 2, "quantity": 1}, {"itemId": 99, "quantity": 1}]},
+        ]
+        materials = {1: {"name": "Arcanite Bar"}, 2: {"name": "Linen Cloth"}, 99: {"name": "Unknown"}}
+        table = ProfitTable(recipes, materials, self.prices.snapshot("a-horde"))
+        results = craft_vs_buy(table, "a-horde")
+        self.assertEqual([result['recipe_id'] for result in results], [1])
+        self.assertEqual(results[0]['buy_price'], 4 * 500)
+    
+    def test_scan_applies_thresholds_and_ranks(self):
+        """Test that scan drops small or low-return opportunities and sorts by profit."""
+        vendor_prices = {2: {'buy': 100, 'sell': 600}}
+        results = scan(self.prices, names=self.names, vendor_prices=vendor_prices, min_profit=150, min_roi=20)
+        profits = [result['profit'] for result in results]
+        self.assertEqual(profits, sorted(profits, reverse=True))
+        self.assertTrue(all(profit >= 150 for profit in profits))
+        self.assertEqual(results[0]['type'], 'cross_realm')
+        self.assertEqual(len(scan(self.prices, names=self.names, vendor_prices=vendor_prices,
+                                  min_profit=1, min_roi=10000)), 0)
+    
+    def test_scan_limits_after_filtering_by_type(self):
+        """Test that a type filter still fills the limit when other types rank higher."""
+        vendor_prices = {2: {'buy': 100, 'sell': 600}}
+        results = scan(self.prices, names=self.names, vendor_prices=vendor_prices, min_profit=150,
+                       min_roi=20, kind='vendor_sell', limit=1)
+        self.assertEqual([result['type'] for result in results], ['vendor_sell'])
+    
+    def test_endpoint_filters_before_limit(self):
+        """Test that /api/arbitrage finds low-ranked types beyond the first max_results entries."""
+        import server
+        
+        ranked = [opportunity('cross_realm', i, "Bar", "a-horde", 10, "a-alliance", 10000, 9000)
+                  for i in range(5)]
+        ranked.append(opportunity('vendor_sell', 9, "Cloth", "a-horde", 10, "vendor", 600, 600))
+        with patch.object(server, 'arbitrage_results', ranked), \
+             patch.dict(server.ARBITRAGE_CONFIG, {'max_results': 3}):
+            server.invalidate_responses()
+            client = server.app.test_client()
+            body = client.get("/api/arbitrage?type=vendor_sell").get_json()
+            self.assertEqual([result['item_id'] for result in body['data']], [9])
+            
+            body = client.get("/api/arbitrage?limit=10").get_json()
+            self.assertEqual((body['total'], len(body['data'])), (6, 3))
+            self.assertEqual(client.get("/api/arbitrage?limit=0").status_code, 400)
+        server.invalidate_responses()
+    
+    def test_fees_share_the_ah_cut(self):
+        """Test that fee shortcuts agree with PriceCalculator.calculate_ah_fees."""
+        self.assertAlmostEqual(net_sale(1), 1 - PRICING_CONFIG['ah_cut'] - PRICING_CONFIG['deposit_rate'])
+        with patch.dict(PRICING_CONFIG, {'ah_cut': 0.7}):
+            self.assertAlmostEqual(PriceCalculator.calculate_ah_fees(1000)['ah_cut'], 700)
+            self.assertEqual(cross_realm(self.prices, self.names, min_profit=1000), [])
+
+
+RECIPE_PAGE = """<html><body>
+<div class="breadcrumb"><a href="/classic/spells">Spells</a><a href="/classic/spells/professions/cooking">Cooking</a></div>
+<h1 class="heading-size-1">Recipe {recipe_id}</h1>
+<li class="icon-db-link"><ins style="background-image: url(https://wow.zamimg.com/images/wow/icons/large/inv_misc_food_{recipe_id}.jpg)"></ins></li>
+<div data-markup-content-target="1">Requires Cooking (125)</div>
+<div id="tt{recipe_id}">Reagents:<div class="indent q1"><a href="/classic/item=2672">Stringy Wolf Meat</a> (2)
+<a href="/classic/item=2678">Mild Spices</a></div>
+<a href="/classic/item=2680">Spiced Wolf Meat</a></div>
+</body></html>"""
+
+
+class RecipePageHandler(BaseHTTPRequestHandler):
+    """Fixture Wowhead server: /classic/spell=<id> pages after 50 ms, 404 otherwise."""
+    
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.in_flight -= 1
+        if not self.path.startswith('/classic/spell='):
+            self.send_error(404)
+            return
+        body = RECIPE_PAGE.format(recipe_id=self.path.split('=')[1]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class TestAsyncScraper(unittest.TestCase):
+    """Test the recipe page parser and the concurrent scraper against a local server."""
+    
+    def test_parse_recipe(self):
+        """Test that a recipe page parses into RecipeData."""
+        recipe = parse_recipe("https://www.wowhead.com/classic/spell=2546", RECIPE_PAGE.format(recipe_id=2546))
+        self.assertEqual(recipe.recipe_id, 2546)
+        self.assertEqual(recipe.name, "Recipe 2546")
+        self.assertEqual(recipe.profession, "Cooking")
+        self.assertEqual(recipe.skill_level, 125)
+        self.assertEqual(recipe.icon_name, "inv_misc_food_2546")
+        self.assertEqual(recipe.materials, [{"itemId": 2672, "quantity": 2}, {"itemId": 2678, "quantity": 1}])
+        self.assertEqual((recipe.result_item_id, recipe.result_quantity), (2680, 1))
+    
+    def test_token_bucket_spaces_requests(self):
+        """Test that requests past the burst wait for the bucket to refill."""
+        async def take(count):
+            bucket = TokenBucket(rate=50, capacity=2)
+            start = time.monotonic()
+            for _ in range(count):
+                await bucket.acquire()
+            return time.monotonic() - start
+        
+        self.assertLess(asyncio.run(take(2)), 0.01)
+        self.assertGreaterEqual(asyncio.run(take(6)), 0.07)
+    
+    @unittest.skipUnless(aiohttp, "aiohttp is not installed")
+    def test_scrape_urls_concurrently(self):
+        """Test that pages are fetched in parallel, in order, with failures recorded."""
+        server = ThreadingHTTPServer(('127.0.0.1', 0), RecipePageHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base = f"http://127.0.0.1:{server.server_address[1]}/classic"
+        urls = [f"{base}/spell={recipe_id}" for recipe_id in range(100, 116)] + [f"{base}/item=1"]
+        
+        async def run():
+            async with AsyncScraper(concurrency=8, requests_per_second=1000, burst=8, timeout=5,
+                                    max_retries=2, delay=0, parse_workers=2) as scraper:
+                return await scraper.scrape_urls(urls, telemetry)
+        
+        telemetry = ScrapeTelemetry()
+        RecipePageHandler.max_in_flight = 0
+        results = asyncio.run(run())
+        
+        self.assertEqual([recipe.recipe_id for recipe in results[:-1]], list(range(100, 116)))
+        self.assertIsNone(results[-1])
+        summary = telemetry.close()
+        self.assertEqual((summary['successful'], summary['failed']), (16, 1))
+        self.assertEqual(summary['errors'], {'ClientResponseError': 1})
+        # Requests overlapped, but never beyond the semaphore
+        self.assertGreater(RecipePageHandler.max_in_flight, 1)
+        self.assertLessEqual(RecipePageHandler.max_in_flight, 8)
+
+
+class TestURLDiscovery(unittest.TestCase):
+    """Test merging URL lists and listings into one spell-keyed queue."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.urls_file = Path(self.temp_dir) / "urls.txt"
+        self.urls_file.write_text(
+            "# Cooking !\n"
+            "https://www.wowhead.com/classic/spell=2542/goretusk-liver-pie\n"
+            "https://www.wowhead.com/tbc/spell=2542/goretusk-liver-pie\n"
+            "# Tailoring !\n"
+            "https://www.wowhead.com/classic/spell=2392/red-linen-shirt\n"
+        )
+        self.failed_file = Path(self.temp_dir) / "failed_urls.txt"
+        self.failed_file.write_text("https://www.wowhead.com/classic/spell=2392/red-linen-shirt\n")
+        self.listing = Path(self.temp_dir) / "cooking.html"
+        self.listing.write_text(
+            '<script>new Listview({"template":"item","id":"items","data":[{"id":1,"name":"Not a spell"}]});'
+            'new Listview({"template":"spell","id":"recipes","data":'
+            '[{"id":2542,"name":"Goretusk Liver Pie"},{"id":2545,"name":"Cooked Crab Claw"}]});</script>'
+        )
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def test_extract_listing_reads_spell_listviews(self):
+        """Test that only spell Listview entries are extracted."""
+        entries = extract_listing(self.listing.read_text())
+        self.assertEqual([entry['id'] for entry in entries], [2542, 2545])
+    
+    def test_build_queue_deduplicates_sources(self):
+        """Test that every spell is queued once, with its profession and sources."""
+        queue = build_queue([self.urls_file], [self.listing], failed_file=self.failed_file)
+        self.assertEqual(list(queue.entries), [2542, 2392, 2545])
+        self.assertEqual(queue.entries[2545].profession, "Cooking")
+        self.assertEqual(queue.entries[2392].sources, ["urls.txt", "failed_urls.txt"])
+        self.assertEqual(queue.stats()['duplicates'], 3)
+        self.assertEqual(queue.entries[2545].url, "https://www.wowhead.com/classic/spell=2545/cooked-crab-claw")
+    
+    def test_build_queue_skips_scraped_and_writes_urls(self):
+        """Test that scraped spells are dropped and the queue file holds plain URLs."""
+        queue = build_queue([self.urls_file], failed_file=None, scraped={2542})
+        self.assertEqual(queue.stats()['already_scraped'], 1)
+        output = Path(self.temp_dir) / "queue" / "url_queue.txt"
+        queue.write(output)
+        self.assertEqual(output.read_text().split(), ["https://www.wowhead.com/classic/spell=2392/red-linen-shirt"])
+
+
 class TestIntegration(unittest.TestCase):
     """Integration tests for the complete workflow."""
     
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Recipe URL discovery for WoW Classic SoD Recipe Calculator
+Merges hand-kept URL lists, Wowhead profession listings and failed URLs into one queue keyed by spell ID.
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import DISCOVERY_CONFIG, FAILED_URLS_FILE, PROFESSIONS, SCRAPER_CONFIG, URLS_FILE, WOWHEAD_CONFIG
+from utils import URLProcessor
+
+logger = logging.getLogger(__name__)
+
+# Section headers in urls.txt, e.g. "# Cooking !"
+SECTION_PATTERN = re.compile(r'^#\s*(.+?)\s*!?\s*$')
+LISTVIEW_PATTERN = re.compile(r'new Listview\(\s*\{')
+TEMPLATE_PATTERN = re.compile(r'["\']?template["\']?\s*:\s*["\'](\w+)["\']')
+DATA_PATTERN = re.compile(r'["\']?data["\']?\s*:\s*\[')
+
+
+@dataclass
+class QueueEntry:
+    """One spell to scrape, with every input that listed it."""
+    spell_id: int
+    url: str
+    profession: Optional[str] = None
+    sources: List[str] = field(default_factory=list)
+
+
+class WorkQueue:
+    """
+    Canonical recipe URLs keyed by spell ID, in the order they were first seen.
+    
+    Every URL is canonicalized before it is added, so the same spell
+    under /tbc/, a locale prefix or a different slug is queued once.
+    """
+    
+    def __init__(self):
+        self.entries: Dict[int, QueueEntry] = {}
+        self.seen = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.skipped = 0
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def add(self, url: str, profession: Optional[str] = None, source: str = 'urls') -> bool:
+        """Queue a URL; returns False when it is invalid or its spell is already queued."""
+        canonical = URLProcessor.canonicalize_url(url)
+        if canonical is None:
+            self.invalid += 1
+            logger.warning(f"Invalid URL skipped: {url}")
+            return False
+        
+        self.seen += 1
+        spell_id = URLProcessor.extract_recipe_id(canonical)
+        entry = self.entries.get(spell_id)
+        if entry is not None:
+            self.duplicates += 1
+            entry.profession = entry.profession or profession
+            if source not in entry.sources:
+                entry.sources.append(source)
+            return False
+        
+        self.entries[spell_id] = QueueEntry(spell_id, canonical, profession, [source])
+        return True
+    
+    def drop(self, spell_ids: Iterable[int]) -> int:
+        """Remove the given spells, e.g. those already scraped; returns how many were queued."""
+        dropped = 0
+        for spell_id in spell_ids:
+            if self.entries.pop(spell_id, None) is not None:
+                dropped += 1
+        self.skipped += dropped
+        return dropped
+    
+    def urls(self) -> List[str]:
+        return [entry.url for entry in self.entries.values()]
+    
+    def write(self, file_path: Path) -> None:
+        """Write the queue as plain URLs for the scrapers, or as spell-keyed JSON for a .json path."""
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            if file_path.suffix == '.json':
+                json.dump({
+                    str(entry.spell_id): {'url': entry.url, 'profession': entry.profession,
+                                          'sources': entry.sources}
+                    for entry in self.entries.values()
+                }, f, indent=2)
+            else:
+                f.writelines(f"{url}\n" for url in self.urls())
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return input and queue counts, and the share of requests deduplication saves."""
+        return {
+            'urls_read': self.seen,
+            'duplicates': self.duplicates,
+            'invalid': self.invalid,
+            'already_scraped': self.skipped,
+            'queued': len(self.entries),
+            'saved_percent': round((1 - len(self.entries) / self.seen) * 100, 1) if self.seen else 0.0
+        }
+
+
+def read_url_file(file_path: Path) -> List[Tuple[str, Optional[str]]]:
+    """Return (url, profession) pairs from a URL list, taking professions from "# Name !" headers."""
+    pairs = []
+    profession = None
+    if not Path(file_path).exists():
+        return pairs
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('#'):
+                match = SECTION_PATTERN.match(line)
+                if match and match.group(1) in PROFESSIONS:
+                    profession = match.group(1)
+                continue
+            pairs.append((line, profession))
+    return pairs
+
+
+def spell_url(spell_id: int, name: str = '') -> str:
+    """Build the canonical URL of a spell from a listing entry."""
+    slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+    return f"{WOWHEAD_CONFIG['classic_url']}/spell={spell_id}" + (f"/{slug}" if slug else '')
+
+
+def extract_listing(html: str) -> List[Dict[str, Any]]:
+    """Return the entries of every spell Listview embedded in a Wowhead listing page."""
+    decoder = json.JSONDecoder()
+    entries = []
+    for start in LISTVIEW_PATTERN.finditer(html):
+        # Options before the data array, e.g. template and id
+        data = DATA_PATTERN.search(html, start.end())
+        if not data:
+            continue
+        template = TEMPLATE_PATTERN.search(html, start.end(), data.start())
+        if template and template.group(1) != 'spell':
+            continue
+        try:
+            rows, _ = decoder.raw_decode(html, data.end() - 1)
+        except ValueError as e:
+            logger.warning(f"Could not parse a Listview data array: {e}")
+            continue
+        entries.extend(row for row in rows if isinstance(row, dict) and 'id' in row)
+    return entries
+
+
+def load_listing(file_path: Path) -> List[str]:
+    """
+    Return the recipe URLs of an exported listing.
+    
+    Accepts a saved Wowhead listing page, a JSON list of spell IDs or
+    {"id", "name"} objects, or a plain list of URLs.
+    """
+    text = Path(file_path).read_text(encoding='utf-8')
+    if Path(file_path).suffix == '.json':
+        data = json.loads(text)
+        rows = data.get('data', []) if isinstance(data, dict) else data
+        return [spell_url(row) if isinstance(row, int) else spell_url(row['id'], row.get('name', ''))
+                for row in rows if isinstance(row, int) or (isinstance(row, dict) and 'id' in row)]
+    if LISTVIEW_PATTERN.search(text):
+        return [spell_url(row['id'], row.get('name', '')) for row in extract_listing(text)]
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.startswith('#')]
+
+
+def crawl_listing(profession: str) -> List[str]:
+    """Download a profession's Wowhead listing page and return its recipe URLs."""
+    import requests
+    
+    url = DISCOVERY_CONFIG['listing_url'].format(profession=profession.lower().replace(' ', '-'))
+    response = requests.get(url, headers={'User-Agent': SCRAPER_CONFIG['user_agent']},
+                            timeout=SCRAPER_CONFIG['timeout'])
+    response.raise_for_status()
+    entries = extract_listing(response.text)
+    logger.info(f"Found {len(entries)} {profession} recipes at {url}")
+    return [spell_url(row['id'], row.get('name', '')) for row in entries]
+
+
+def profession_of(file_path: Path) -> Optional[str]:
+    """Return the profession a listing file is named after, e.g. cooking.html."""
+    stem = Path(file_path).stem.replace('-', ' ').replace('_', ' ').lower()
+    return next((name for name in PROFESSIONS if name.lower() == stem), None)
+
+
+def build_queue(url_files: Iterable[Path] = (URLS_FILE,), listings: Iterable[Path] = (),
+                crawl: Iterable[str] = (), failed_file: Optional[Path] = FAILED_URLS_FILE,
+                scraped: Optional[Set[int]] = None) -> WorkQueue:
+    """
+    Merge every URL source into one deduplicated queue.
+    
+    Hand-kept URL files come first so their order is kept, then exported
+    and crawled listings, then failed URLs so they are retried. Spells in
+    scraped are left out.
+    """
+    queue = WorkQueue()
+    for file_path in url_files:
+        for url, profession in read_url_file(file_path):
+            queue.add(url, profession, source=Path(file_path).name)
+    
+    for file_path in listings:
+        profession = profession_of(file_path)
+        for url in load_listing(file_path):
+            queue.add(url, profession, source=Path(file_path).name)
+    
+    for profession in crawl:
+        try:
+            urls = crawl_listing(profession)
+        except Exception as e:
+            logger.error(f"Could not crawl the {profession} listing: {e}")
+            continue
+        for url in urls:
+            queue.add(url, profession, source='wowhead')
+    
+    if failed_file is not None:
+        for url, _ in read_url_file(failed_file):
+            queue.add(url, source=Path(failed_file).name)
+    
+    if scraped:
+        queue.drop(scraped)
+    return queue
+
+
+def main():
+    """Main function to build the scrape queue."""
+    import argparse
+    from utils import DataLoader
+    
+    parser = argparse.ArgumentParser(description="Build a deduplicated recipe URL queue for the scrapers")
+    parser.add_argument("--urls", nargs="*", default=[str(URLS_FILE)], help="Hand-kept URL files")
+    parser.add_argument("--listing", action="append", default=[],
+                       help="Saved Wowhead listing page, or JSON/text export of one (repeatable)")
+    parser.add_argument("--crawl", action="append", default=[], choices=list(PROFESSIONS) + ['all'],
+                       help="Download a profession's listing from Wowhead (repeatable)")
+    parser.add_argument("--failed", default=str(FAILED_URLS_FILE), help="Failed URLs to retry")
+    parser.add_argument("--include-scraped", action="store_true",
+                       default=not DISCOVERY_CONFIG['skip_scraped'],
+                       help="Keep spells already in recipes.json")
+    parser.add_argument("--output", default=str(DISCOVERY_CONFIG['queue_file']),
+                       help="Queue file; plain URLs, or spell-keyed JSON for a .json path")
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    
+    crawl = list(PROFESSIONS) if 'all' in args.crawl else args.crawl
+    scraped = None
+    if not args.include_scraped:
+        scraped = {recipe['recipe_id'] for recipe in DataLoader.load_recipes_data()}
+    
+    queue = build_queue([Path(path) for path in args.urls], [Path(path) for path in args.listing],
+                        crawl, Path(args.failed) if args.failed else None, scraped)
+    queue.write(Path(args.output))
+    
+    stats = queue.stats()
+    print(f"Read {stats['urls_read']} URLs: {stats['duplicates']} duplicates, {stats['invalid']} invalid, "
+          f"{stats['already_scraped']} already scraped")
+    print(f"Queued {stats['queued']} spells in {args.output} ({stats['saved_percent']}% fewer requests)")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -5,21 +5,38 @@ Utility functions for WoW Classic SoD Recipe Calculator
 import json
 import logging
 import re
+import threading
+from collections import Counter, OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, Iterator, List, Optional, Any, Union
 from urllib.parse import urlparse
 
-import requests
-from bs4 import BeautifulSoup
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional fast JSON backend
+    orjson = None
 
 from config import (
     RECIPES_FILE, MATERIALS_FILE, DEFAULT_VENDOR_PRICES,
-    PROFESSIONS, QUALITY_COLORS, DATA_CONFIG
+    PROFESSIONS, QUALITY_COLORS, DATA_CONFIG, PRICING_CONFIG, WOWHEAD_CONFIG, CACHE_CONFIG
 )
 
 logger = logging.getLogger(__name__)
 
+# Recipe schema, compiled once so the loader does no per-recipe setup work
+RECIPE_REQUIRED_FIELDS = (
+    'recipe_id', 'name', 'profession', 'skill_level',
+    'materials', 'result_item_id', 'result_quantity'
+)
+MATERIAL_REQUIRED_FIELDS = ('itemId', 'quantity')
+
+# Profit data fields that recipes can be sorted and ranked by
+PROFIT_SORT_KEYS = ('profit', 'net_profit', 'profit_margin', 'roi', 'sales_per_hour', 'gold_per_hour')
+
+# Read size used when streaming JSON arrays from disk
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 class DataValidator:
     """Validates recipe and material data structures."""
@@ -27,73 +44,88 @@ class DataValidator:
     @staticmethod
     def validate_recipe(recipe: Dict[str, Any]) -> bool:
         """Validate recipe data structure."""
-        required_fields = [
-            'recipe_id', 'name', 'profession', 'skill_level',
-            'materials', 'result_item_id', 'result_quantity'
-        ]
+        error = DataValidator.check_recipe(recipe)
+        if error:
+            logger.error(f"Invalid recipe: {error}")
+            return False
+        return True
+    
+    @staticmethod
+    def validate_material(material: Dict[str, Any]) -> bool:
+        """Validate material data structure."""
+        error = DataValidator.check_material(material)
+        if error:
+            logger.error(f"Invalid material: {error}")
+            return False
+        return True
+    
+    @staticmethod
+    def check_recipe(recipe: Any) -> Optional[str]:
+        """
+        Check a recipe against the schema without logging.
+        
+        Returns None for a valid recipe, otherwise a short error class
+        such as ``"missing field 'name'"`` suitable for aggregation.
+        """
+        if not isinstance(recipe, dict):
+            return "recipe must be an object"
         
-        for field in required_fields:
+        for field in RECIPE_REQUIRED_FIELDS:
             if field not in recipe:
-                logger.error(f"Missing required field '{field}' in recipe")
-                return False
+                return f"missing field '{field}'"
         
         # Validate data types
         if not isinstance(recipe['recipe_id'], int):
-            logger.error("recipe_id must be an integer")
-            return False
+            return "recipe_id must be an integer"
         
-        if not isinstance(recipe['name'], str) or not recipe['name']:
-            logger.error("name must be a non-empty string")
-            return False
+        name = recipe['name']
+        if not isinstance(name, str) or not name:
+            return "name must be a non-empty string"
         
-        if not isinstance(recipe['materials'], list):
-            logger.error("materials must be a list")
-            return False
+        materials = recipe['materials']
+        if not isinstance(materials, list):
+            return "materials must be a list"
         
         # Validate materials structure
-        for material in recipe['materials']:
-            if not DataValidator.validate_material(material):
-                return False
+        for material in materials:
+            error = DataValidator.check_material(material)
+            if error:
+                return error
         
-        return True
+        return None
     
     @staticmethod
-    def validate_material(material: Dict[str, Any]) -> bool:
-        """Validate material data structure."""
-        required_fields = ['itemId', 'quantity']
+    def check_material(material: Any) -> Optional[str]:
+        """Check a recipe material against the schema without logging."""
+        if not isinstance(material, dict):
+            return "material must be an object"
         
-        for field in required_fields:
+        for field in MATERIAL_REQUIRED_FIELDS:
             if field not in material:
-                logger.error(f"Missing required field '{field}' in material")
-                return False
+                return f"missing material field '{field}'"
         
         if not isinstance(material['itemId'], int):
-            logger.error("itemId must be an integer")
-            return False
+            return "itemId must be an integer"
         
-        if not isinstance(material['quantity'], int) or material['quantity'] <= 0:
-            logger.error("quantity must be a positive integer")
-            return False
+        quantity = material['quantity']
+        if not isinstance(quantity, int) or quantity <= 0:
+            return "quantity must be a positive integer"
         
-        return True
+        return None
     
     @staticmethod
-    def validate_materials_data(materials: Dict[str, Any]) -> bool:
-        """Validate materials price data structure."""
-        for item_id, item_data in materials.items():
-            if not isinstance(item_id, str) or not item_id.isdigit():
-                logger.error(f"Invalid item ID: {item_id}")
-                return False
-            
-            if not isinstance(item_data, dict):
-                logger.error(f"Invalid item data structure for {item_id}")
+    def validate_materials_data(materials: Union[Dict[Any, Any], List[Dict[str, Any]]]) -> bool:
+        """Validate materials data in either the list or the keyed shape."""
+        try:
+            materials_index = DataLoader.build_materials_index(materials)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Invalid materials data structure: {e}")
+            return False
+        
+        for item_id, item_data in materials_index.items():
+            if 'name' not in item_data:
+                logger.error(f"Missing required field 'name' in item {item_id}")
                 return False
-            
-            required_fields = ['name', 'price']
-            for field in required_fields:
-                if field not in item_data:
-                    logger.error(f"Missing required field '{field}' in item {item_id}")
-                    return False
         
         return True
 
@@ -107,31 +139,34 @@ class DataProcessor:
         total_cost = 0.0
         material_costs = []
         
+        materials_index = DataLoader.build_materials_index(materials_data)
+        
         for material in recipe.get('materials', []):
-            item_id = str(material['itemId'])
+            item_id = material['itemId']
             quantity = material['quantity']
+            item_data = materials_index.get(item_id)
+            item_price = item_data.get('price') if item_data else None
             
-            if item_id in materials_data:
-                item_price = materials_data[item_id].get('price', 0)
+            if item_price is not None:
                 material_cost = item_price * quantity
                 total_cost += material_cost
                 
                 material_costs.append({
-                    'itemId': material['itemId'],
-                    'name': materials_data[item_id].get('name', 'Unknown'),
+                    'itemId': item_id,
+                    'name': item_data.get('name', 'Unknown'),
                     'quantity': quantity,
                     'unit_price': item_price,
                     'total_cost': material_cost
                 })
             else:
                 # Use vendor price as fallback
-                vendor_price = DEFAULT_VENDOR_PRICES.get(material['itemId'], 0)
+                vendor_price = DEFAULT_VENDOR_PRICES.get(item_id, 0)
                 material_cost = vendor_price * quantity
                 total_cost += material_cost
                 
                 material_costs.append({
-                    'itemId': material['itemId'],
-                    'name': 'Unknown',
+                    'itemId': item_id,
+                    'name': item_data.get('name', 'Unknown') if item_data else 'Unknown',
                     'quantity': quantity,
                     'unit_price': vendor_price,
                     'total_cost': material_cost,
@@ -169,8 +204,14 @@ class DataProcessor:
         }
     
     @staticmethod
-    def filter_recipes(recipes: List[Dict[str, Any]], filters: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Filter recipes based on criteria."""
+    def filter_recipes(recipes: List[Dict[str, Any]], filters: Dict[str, Any],
+                       profits: Optional[Dict[int, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Filter recipes based on criteria.
+        
+        ``profits`` maps recipe_id to precomputed profit data; without it,
+        profit filters price recipes against materials.json.
+        """
         filtered_recipes = recipes
         
         # Filter by profession
@@ -199,11 +240,17 @@ class DataProcessor:
         # Filter by profitability
         if 'min_profit' in filters and filters['min_profit'] is not None:
             min_profit = float(filters['min_profit'])
-            materials_data = DataLoader.load_materials_data()
-            filtered_recipes = [
-                r for r in filtered_recipes
-                if DataProcessor.calculate_recipe_profit(r, materials_data)['profit'] >= min_profit
-            ]
+            if profits is not None:
+                filtered_recipes = [
+                    r for r in filtered_recipes
+                    if profits[r['recipe_id']]['profit'] >= min_profit
+                ]
+            else:
+                materials_data = DataLoader.load_materials_data()
+                filtered_recipes = [
+                    r for r in filtered_recipes
+                    if DataProcessor.calculate_recipe_profit(r, materials_data)['profit'] >= min_profit
+                ]
         
         # Filter by search term
         if 'search' in filters and filters['search']:
@@ -217,11 +264,15 @@ class DataProcessor:
     
     @staticmethod
     def sort_recipes(recipes: List[Dict[str, Any]], sort_by: str = 'name', 
-                    sort_order: str = 'asc') -> List[Dict[str, Any]]:
+                    sort_order: str = 'asc',
+                    profits: Optional[Dict[int, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """Sort recipes by specified criteria."""
         reverse = sort_order.lower() == 'desc'
         
-        if sort_by == 'profit':
+        if sort_by in PROFIT_SORT_KEYS and profits is not None:
+            return sorted(recipes, key=lambda x: profits[x['recipe_id']].get(sort_by, 0), reverse=reverse)
+        
+        elif sort_by == 'profit':
             materials_data = DataLoader.load_materials_data()
             recipes_with_profit = []
             for recipe in recipes:
@@ -254,25 +305,12 @@ class DataLoader:
                 logger.warning(f"Recipes file not found: {RECIPES_FILE}")
                 return []
             
-            with open(RECIPES_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Handle different data formats
-            if isinstance(data, dict) and 'recipes' in data:
-                recipes = data['recipes']
-            elif isinstance(data, list):
-                recipes = data
-            else:
-                logger.error("Invalid recipes data format")
-                return []
+            error_counts = Counter()
+            valid_recipes = list(DataLoader.iter_recipes_data(RECIPES_FILE, error_counts))
             
-            # Validate recipes
-            valid_recipes = []
-            for recipe in recipes:
-                if DataValidator.validate_recipe(recipe):
-                    valid_recipes.append(recipe)
-                else:
-                    logger.warning(f"Skipping invalid recipe: {recipe.get('name', 'Unknown')}")
+            if error_counts:
+                skipped = sum(error_counts.values())
+                logger.warning(f"Skipped {skipped} invalid recipes: {dict(error_counts)}")
             
             logger.info(f"Loaded {len(valid_recipes)} valid recipes")
             return valid_recipes
@@ -282,8 +320,99 @@ class DataLoader:
             return []
     
     @staticmethod
-    def load_materials_data() -> Dict[str, Any]:
-        """Load materials data from file."""
+    def iter_recipes_data(file_path: Path, 
+                          error_counts: Optional[Counter] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield valid recipes from a recipes file as they are parsed.
+        
+        With orjson installed the file is decoded in one go, which is
+        fastest but holds the whole file in memory. Without it a
+        top-level JSON array is decoded one element at a time so memory
+        stays bounded by the largest recipe rather than the whole file.
+        The ``{"recipes": [...], "metadata": ...}`` export format is
+        always decoded in one go. Invalid recipes are skipped and counted
+        per error class in ``error_counts`` instead of being logged one by one.
+        """
+        with open(file_path, 'r', encoding='utf-8') as f:
+            head = f.read(STREAM_CHUNK_SIZE)
+            stripped = head.lstrip()
+            
+            if stripped.startswith('[') and orjson is None:
+                recipes = DataLoader._iter_json_array(f, stripped)
+            elif stripped.startswith(('[', '{')):
+                data = JSONSerializer.loads(head + f.read())
+                recipes = data.get('recipes') if isinstance(data, dict) else data
+                if not isinstance(recipes, list):
+                    logger.error("Invalid recipes data format")
+                    return
+            else:
+                logger.error("Invalid recipes data format")
+                return
+            
+            for recipe in recipes:
+                error = DataValidator.check_recipe(recipe)
+                if error is None:
+                    yield recipe
+                elif error_counts is not None:
+                    error_counts[error] += 1
+    
+    @staticmethod
+    def _iter_json_array(f, buffer: str) -> Iterator[Any]:
+        """Incrementally decode the elements of a JSON array read from f; raises ValueError if malformed."""
+        decoder = json.JSONDecoder()
+        pos = buffer.index('[') + 1
+        eof = False
+        
+        def next_char() -> str:
+            # Skip whitespace, reading more of f as needed; '' at the end of the file
+            nonlocal buffer, pos, eof
+            while True:
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return buffer[pos] if pos < len(buffer) else ''
+                buffer, pos = f.read(STREAM_CHUNK_SIZE), 0
+                eof = not buffer
+        
+        char = next_char()
+        if char == ']':
+            return
+        
+        while True:
+            if char in ('', ',', ']'):
+                raise ValueError("Expected an element in recipes array")
+            
+            while True:
+                try:
+                    element, end = decoder.raw_decode(buffer, pos)
+                    if end < len(buffer) or eof:
+                        break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                # Element is cut off at the chunk boundary; read more and retry
+                chunk = f.read(STREAM_CHUNK_SIZE)
+                buffer, pos = buffer[pos:] + chunk, 0
+                eof = not chunk
+            
+            yield element
+            pos = end
+            
+            # Exactly one comma between elements, and none before the closing bracket
+            char = next_char()
+            if char == ']':
+                pos += 1
+                if next_char():
+                    raise ValueError("Unexpected data after recipes array")
+                return
+            if char != ',':
+                raise ValueError("Expected ',' or ']' in recipes array")
+            pos += 1
+            char = next_char()
+    
+    @staticmethod
+    def load_materials_data() -> Dict[int, Dict[str, Any]]:
+        """Load materials data from file as an itemId-keyed index."""
         try:
             if not MATERIALS_FILE.exists():
                 logger.warning(f"Materials file not found: {MATERIALS_FILE}")
@@ -296,13 +425,50 @@ class DataLoader:
                 logger.error("Invalid materials data format")
                 return {}
             
-            logger.info(f"Loaded {len(data)} materials")
-            return data
+            materials_index = DataLoader.build_materials_index(data)
+            logger.info(f"Loaded {len(materials_index)} materials")
+            return materials_index
             
         except Exception as e:
             logger.error(f"Error loading materials data: {e}")
             return {}
     
+    @staticmethod
+    def build_materials_index(materials: Union[Dict[Any, Any], List[Dict[str, Any]]]) -> Dict[int, Dict[str, Any]]:
+        """
+        Normalize materials data into a dict keyed by integer itemId.
+        
+        Accepts the list shape of materials.json (``[{"itemId": ..., ...}]``)
+        and the legacy dict shape keyed by string itemId. An already
+        normalized index is returned as-is, so hot paths can call this
+        on every request without rebuilding it.
+        """
+        if isinstance(materials, dict):
+            if not materials or isinstance(next(iter(materials)), int):
+                return materials
+            
+            materials_index = {}
+            for item_id, item_data in materials.items():
+                if not isinstance(item_id, str) or not item_id.isdigit():
+                    raise ValueError(f"Invalid item ID: {item_id}")
+                if not isinstance(item_data, dict):
+                    raise TypeError(f"Invalid item data structure for {item_id}")
+                materials_index[int(item_id)] = item_data
+            return materials_index
+        
+        if isinstance(materials, list):
+            materials_index = {}
+            for item_data in materials:
+                if not isinstance(item_data, dict):
+                    raise TypeError(f"Invalid item data structure: {item_data!r}")
+                item_id = item_data.get('itemId')
+                if not isinstance(item_id, int):
+                    raise ValueError(f"Invalid item ID: {item_id}")
+                materials_index[item_id] = item_data
+            return materials_index
+        
+        raise TypeError(f"Unsupported materials data type: {type(materials).__name__}")
+    
     @staticmethod
     def save_recipes_data(recipes: List[Dict[str, Any]], backup: bool = True) -> bool:
         """Save recipes data to file."""
@@ -320,8 +486,8 @@ class DataLoader:
                 }
             }
             
-            with open(RECIPES_FILE, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, indent=2, ensure_ascii=False)
+            with open(RECIPES_FILE, 'wb') as f:
+                f.write(JSONSerializer.dumps(output_data, pretty=not DATA_CONFIG['compact_json']))
             
             logger.info(f"Saved {len(recipes)} recipes to {RECIPES_FILE}")
             return True
@@ -337,8 +503,8 @@ class DataLoader:
             if backup and DATA_CONFIG['backup_enabled']:
                 DataLoader._backup_file(MATERIALS_FILE)
             
-            with open(MATERIALS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(materials, f, indent=2, ensure_ascii=False)
+            with open(MATERIALS_FILE, 'wb') as f:
+                f.write(JSONSerializer.dumps(materials, pretty=not DATA_CONFIG['compact_json']))
             
             logger.info(f"Saved {len(materials)} materials to {MATERIALS_FILE}")
             return True
@@ -354,7 +520,7 @@ class DataLoader:
             return
         
         backup_dir = file_path.parent / 'backups'
-        backup_dir.mkdir(exist_ok=True)
+        backup_dir.mkdir(parents=True, exist_ok=True)
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_name = f"{file_path.stem}_{timestamp}{file_path.suffix}"
@@ -410,20 +576,46 @@ class URLProcessor:
         except Exception:
             return None
     
+    @staticmethod
+    def canonicalize_url(url: str) -> Optional[str]:
+        """
+        Return the /classic/ URL of any Wowhead spell URL, or None for other URLs.
+        
+        Expansion paths (/tbc/, /wotlk/), locale prefixes, old subdomains
+        like classic.wowhead.com, queries and fragments all map to the same
+        canonical URL; the name slug is kept when present.
+        """
+        parsed = urlparse(url.strip())
+        if parsed.netloc != 'wowhead.com' and not parsed.netloc.endswith('.wowhead.com'):
+            return None
+        match = re.search(r'/spell=(\d+)(?:/([\w-]+))?', parsed.path)
+        if not match:
+            return None
+        slug = f"/{match.group(2)}" if match.group(2) else ''
+        return f"{WOWHEAD_CONFIG['classic_url']}/spell={match.group(1)}{slug}"
+    
     @staticmethod
     def clean_urls(urls: List[str]) -> List[str]:
-        """Clean and validate a list of URLs."""
+        """Clean and validate a list of URLs, keeping the first canonical URL of each spell."""
         cleaned_urls = []
+        seen = set()
         
         for url in urls:
             url = url.strip()
             if not url or url.startswith('#'):
                 continue
             
-            if URLProcessor.validate_wowhead_url(url):
-                cleaned_urls.append(url)
-            else:
+            canonical = URLProcessor.canonicalize_url(url)
+            if canonical is None:
                 logger.warning(f"Invalid URL skipped: {url}")
+                continue
+            
+            recipe_id = URLProcessor.extract_recipe_id(canonical)
+            if recipe_id in seen:
+                logger.debug(f"Duplicate spell {recipe_id} skipped: {url}")
+                continue
+            seen.add(recipe_id)
+            cleaned_urls.append(canonical)
         
         return cleaned_urls
 
@@ -473,8 +665,7 @@ class PriceCalculator:
     @staticmethod
     def calculate_ah_fees(sell_price: float, deposit: float = 0) -> Dict[str, float]:
         """Calculate Auction House fees."""
-        # 5% cut for successful sales
-        ah_cut = sell_price * 0.05
+        ah_cut = sell_price * PRICING_CONFIG['ah_cut']
         listing_fee = deposit
         
         return {
@@ -483,6 +674,114 @@ class PriceCalculator:
             'total_fees': ah_cut + listing_fee,
             'net_profit': sell_price - ah_cut - listing_fee
         }
+    
+    @staticmethod
+    def estimate_deposit(sell_price: float) -> float:
+        """Estimate the listing deposit for an auction."""
+        return sell_price * PRICING_CONFIG['deposit_rate']
+    
+    @staticmethod
+    def estimate_sales_per_hour(quantity: float, num_auctions: float) -> float:
+        """
+        Estimate how many units one more auction sells per hour.
+        
+        The listed quantity is assumed to sell through over the configured
+        turnover time, shared between the existing auctions and ours.
+        """
+        if quantity <= 0:
+            return 0.0
+        market_sales_per_hour = quantity / PRICING_CONFIG['turnover_hours']
+        return market_sales_per_hour / (num_auctions + 1)
+
+
+class JSONSerializer:
+    """
+    Serializes data to JSON bytes with the fastest available backend.
+    
+    orjson is used when installed and the standard library otherwise;
+    both backends produce UTF-8 bytes. Objects that never change after
+    load, such as recipes, can be serialized once with ``fragment`` and
+    the cached bytes spliced into later responses.
+    """
+    
+    backend = 'orjson' if orjson is not None else 'json'
+    
+    # id(obj) -> (obj, serialized bytes); holding obj keeps the id stable.
+    # Least recently used first, bounded so per-request and per-realm objects are freed.
+    _fragment_cache: 'OrderedDict[int, tuple]' = OrderedDict()
+    _fragment_lock = threading.Lock()
+    max_fragments = CACHE_CONFIG['max_fragments']
+    
+    @staticmethod
+    def dumps(data: Any, pretty: bool = False) -> bytes:
+        """Serialize data to JSON bytes, compact unless pretty is set."""
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS
+            if pretty:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(data, option=option)
+        
+        if pretty:
+            return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    
+    @staticmethod
+    def loads(data: Union[str, bytes]) -> Any:
+        """Deserialize JSON text or bytes."""
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+    
+    @staticmethod
+    def fragment(data: Any) -> bytes:
+        """Serialize an immutable object once and reuse the bytes afterwards."""
+        cache = JSONSerializer._fragment_cache
+        with JSONSerializer._fragment_lock:
+            cached = cache.get(id(data))
+            if cached is not None and cached[0] is data:
+                cache.move_to_end(id(data))
+                return cached[1]
+        
+        serialized = JSONSerializer.dumps(data)
+        with JSONSerializer._fragment_lock:
+            cache[id(data)] = (data, serialized)
+            cache.move_to_end(id(data))
+            while len(cache) > JSONSerializer.max_fragments:
+                cache.popitem(last=False)
+        return serialized
+    
+    @staticmethod
+    def extend_object(fragment: bytes, key: str, value: Any) -> bytes:
+        """Append a key to a serialized JSON object without re-encoding it."""
+        return JSONSerializer.splice(fragment, key, JSONSerializer.dumps(value))
+    
+    @staticmethod
+    def dumps_with_raw(data: Dict[str, Any], raw: Dict[str, bytes]) -> bytes:
+        """Serialize a dict, splicing in values that are already JSON bytes."""
+        serialized = JSONSerializer.dumps(data)
+        for key, value in raw.items():
+            serialized = JSONSerializer.splice(serialized, key, value)
+        return serialized
+    
+    @staticmethod
+    def splice(fragment: bytes, key: str, raw_value: bytes) -> bytes:
+        """Insert a key and raw JSON value at the end of a serialized object."""
+        entry = JSONSerializer.dumps(key) + b':' + raw_value
+        if fragment == b'{}':
+            return b'{' + entry + b'}'
+        return fragment[:-1] + b',' + entry + b'}'
+    
+    @staticmethod
+    def discard(data: Any) -> None:
+        """Drop the cached fragment of an object that is being replaced."""
+        with JSONSerializer._fragment_lock:
+            JSONSerializer._fragment_cache.pop(id(data), None)
+    
+    @staticmethod
+    def clear_cache() -> None:
+        """Drop cached fragments, e.g. after data has been reloaded."""
+        with JSONSerializer._fragment_lock:
+            JSONSerializer._fragment_cache.clear()
 
 
 # Export main classes and functions
@@ -491,5 +790,7 @@ __all__ = [
     'DataProcessor', 
     'DataLoader',
     'URLProcessor',
-    'PriceCalculator'
+    'PriceCalculator',
+    'JSONSerializer',
+    'PROFIT_SORT_KEYS'
 ]
\ No newline at end of file